@@ -0,0 +1,114 @@
+"""
+Association encoding benchmark: size of the encoding, encoding time and
+solving time with each `EncodingOptions.associations` mode, on the example
+models and on generated ones of increasing size.
+
+Run from the repository root with `python -m benchmarks.associations`.
+"""
+import argparse
+import json
+import time
+import typing
+
+from doml_mc.intermediate_model.doml_element import (
+    reciprocate_inverse_associations,
+)
+from doml_mc.intermediate_model.doml_model2im import doml_model_to_im
+from doml_mc.intermediate_model.metamodel_snapshot import load_metamodel
+from doml_mc.intermediate_model.types import IntermediateModel, MetaModel
+from doml_mc.model.doml_model import parse_doml_model
+from doml_mc.z3.encoding import (
+    AssociationsEncoding,
+    EncodingOptions,
+    encode_doml_model,
+)
+
+from .generator import generate_doml_document, params_for_size
+
+EXAMPLES = [
+    "wordpress_json_example",
+    "wordpress_json_no_iface",
+    "nginx-openstack_v2",
+    "POSIDONIA",
+]
+SIZES = [25, 50, 100]
+MODES = typing.get_args(AssociationsEncoding)
+
+
+def run(
+    im: IntermediateModel,
+    mm: MetaModel,
+    inv_assoc: list[tuple[str, str]],
+    unbound_elems: list[str],
+    mode: AssociationsEncoding,
+) -> dict:
+    t = time.perf_counter()
+    enc = encode_doml_model(
+        im, mm, inv_assoc, unbound_elems, EncodingOptions(associations=mode)
+    )
+    encode_time = time.perf_counter() - t
+    rslt = enc.solver.check()
+    stats = enc.solver.statistics()
+    return {
+        "assertions": len(enc.solver.assertions()),
+        "encode_s": encode_time,
+        "solve_s": stats.time,
+        "q_inst": (
+            stats.quant_instantiations
+            if "quant instantiations" in stats.keys()
+            else 0
+        ),
+        "result": str(rslt),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--metamodel", default="assets/doml_meta.yaml")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--unbound", type=int, default=2)
+    parser.add_argument(
+        "--tuples-max",
+        type=int,
+        default=60,
+        help="elements of the largest model encoded with tuples",
+    )
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    mm, inv_assoc = load_metamodel(args.metamodel)
+    unbound_elems = [f"unbound{i}" for i in range(args.unbound)]
+
+    models: dict[str, dict] = {}
+    for ex in EXAMPLES:
+        with open(f"example_json_models/{ex}.doml") as jsonf:
+            models[ex] = json.load(jsonf)
+    for size in args.sizes:
+        models[f"generated_{size}"] = generate_doml_document(
+            params_for_size(size)
+        )
+
+    rows = []
+    for mname, doc in models.items():
+        im = doml_model_to_im(parse_doml_model(doc, mm), mm)
+        reciprocate_inverse_associations(im, inv_assoc)
+        for mode in MODES:
+            if mode == "tuples" and len(im) > args.tuples_max:
+                continue
+            row = {"model": mname, "elements": len(im), "mode": mode}
+            row |= run(im, mm, inv_assoc, unbound_elems, mode)
+            rows.append(row)
+            if not args.json:
+                print(
+                    f"{mname:>24} {len(im):>5} {mode:>10}"
+                    f" {row['assertions']:>8} assertions"
+                    f" {row['encode_s']:>8.2f} s enc"
+                    f" {row['solve_s']:>8.2f} s solve"
+                    f" {row['q_inst']:>8} q_inst {row['result']}"
+                )
+    if args.json:
+        print(json.dumps(rows, indent=2))
+
+
+if __name__ == "__main__":
+    main()
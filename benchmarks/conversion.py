@@ -0,0 +1,63 @@
+"""
+Conversion scaling benchmark: time taken by `doml_model_to_im` and by the
+streaming `doml_json_to_im` on generated documents of increasing size.
+
+Run from the repository root with `python -m benchmarks.conversion`.
+"""
+import argparse
+import io
+import json
+import statistics
+import time
+
+from doml_mc.intermediate_model.doml_model2im import doml_model_to_im
+from doml_mc.intermediate_model.json2im import doml_json_to_im
+from doml_mc.intermediate_model.metamodel_snapshot import load_metamodel
+from doml_mc.model.doml_model import parse_doml_model
+
+from .generator import generate_doml_document, params_for_size
+
+SIZES = [10, 100, 1_000, 10_000, 100_000]
+
+
+def median_time(f, runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        f()
+        times.append(time.perf_counter() - t)
+    return statistics.median(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--metamodel", default="assets/doml_meta.yaml")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    mm, _ = load_metamodel(args.metamodel)
+    print(
+        f"{'elements':>10} {'doml_model_to_im (ms)':>22} {'us/elem':>8}"
+        f" {'doml_json_to_im (ms)':>21} {'us/elem':>8}"
+    )
+    for size in args.sizes:
+        doc = generate_doml_document(params_for_size(size))
+        text = json.dumps(doc)
+        doml_model = parse_doml_model(doc, mm)
+        n = len(doml_model_to_im(doml_model, mm))
+
+        t_conv = median_time(
+            lambda: doml_model_to_im(doml_model, mm), args.runs
+        )
+        t_stream = median_time(
+            lambda: doml_json_to_im(io.StringIO(text), mm), args.runs
+        )
+        print(
+            f"{n:>10} {t_conv * 1e3:>22.2f} {t_conv / n * 1e6:>8.2f}"
+            f" {t_stream * 1e3:>21.2f} {t_stream / n * 1e6:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Model decoding benchmark: time to read what the solver synthesized for the
+unbound elements out of a model, with `decode_unbound_elems` and by
+evaluating the association relation on every pair of elements involving an
+unbound one, as in `example.ipynb`.
+
+The example models are checked with `--unbound` unbound elements and a
+requirement asking for `--needed` elements of a class they have none of.
+
+Run from the repository root with `python -m benchmarks.decoding`.
+"""
+import argparse
+import json
+from itertools import product
+
+from z3 import is_true, sat
+
+from doml_mc.intermediate_model.doml_element import (
+    reciprocate_inverse_associations,
+)
+from doml_mc.intermediate_model.doml_model2im import doml_model_to_im
+from doml_mc.intermediate_model.metamodel_snapshot import load_metamodel
+from doml_mc.model.doml_model import parse_doml_model
+from doml_mc.z3.decoding import decode_unbound_elems
+from doml_mc.z3.encoding import Encoding, EncodingOptions, encode_doml_model
+
+from .associations import EXAMPLES
+from .conversion import median_time
+from .deepening import mk_at_least
+
+
+def decode_by_evaluation(enc: Encoding) -> list[tuple[str, str, str]]:
+    m = enc.solver.model()
+    return [
+        (e1n, an, e2n)
+        for (e1n, e1), (an, a), (e2n, e2) in product(
+            enc.elem.items(), enc.assoc.items(), enc.elem.items()
+        )
+        if (e1n in enc.unbound_elems or e2n in enc.unbound_elems)
+        and is_true(m.eval(enc.assoc_rel(e1, a, e2), model_completion=True))
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--metamodel", default="assets/doml_meta.yaml")
+    parser.add_argument("--models", nargs="+", default=EXAMPLES)
+    parser.add_argument(
+        "--class", dest="cname", default="infrastructure_Location"
+    )
+    parser.add_argument("--needed", type=int, default=2)
+    parser.add_argument("--unbound", type=int, default=3)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    mm, inv_assoc = load_metamodel(args.metamodel)
+    unbound_elems = [f"unbound{i}" for i in range(args.unbound)]
+    at_least = mk_at_least(args.cname, args.needed)
+
+    print(
+        f"{'model':>24} {'mode':>10} {'decode (ms)':>12}"
+        f" {'evaluation (ms)':>16} {'edges':>6}"
+    )
+    for mname in args.models:
+        with open(f"example_json_models/{mname}.doml") as jsonf:
+            doc = json.load(jsonf)
+        im = doml_model_to_im(parse_doml_model(doc, mm), mm)
+        reciprocate_inverse_associations(im, inv_assoc)
+
+        for amode in ("sparse", "quantified"):
+            enc = encode_doml_model(
+                im,
+                mm,
+                inv_assoc,
+                unbound_elems,
+                EncodingOptions(associations=amode),
+            )
+            enc.solver.add(at_least(enc))
+            if enc.solver.check() != sat:
+                print(f"{mname:>24} {amode}: not sat")
+                continue
+            t_decode = median_time(
+                lambda: decode_unbound_elems(enc), args.runs
+            )
+            t_eval = median_time(lambda: decode_by_evaluation(enc), args.runs)
+            delta = decode_unbound_elems(enc)
+            n_edges = sum(
+                len(etns)
+                for e in delta.values()
+                for etns in e.associations.values()
+            )
+            print(
+                f"{mname:>24} {amode:>10} {t_decode * 1e3:>12.2f}"
+                f" {t_eval * 1e3:>16.2f} {n_edges:>6}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Iterative deepening benchmark: time to find the least number of unbound
+elements with which the example models satisfy a requirement asking for
+`--needed` elements of a class they have none of, with
+`check_doml_model_deepening` and by encoding the model anew for each number.
+
+Run from the repository root with `python -m benchmarks.deepening`.
+"""
+import argparse
+import json
+import time
+from collections.abc import Callable
+
+from z3 import And, BoolRef, Consts, Distinct, Exists
+
+from doml_mc.intermediate_model.doml_element import (
+    reciprocate_inverse_associations,
+)
+from doml_mc.intermediate_model.doml_model2im import doml_model_to_im
+from doml_mc.intermediate_model.metamodel_snapshot import load_metamodel
+from doml_mc.model.doml_model import parse_doml_model
+from doml_mc.z3.check import Requirement, check_doml_model
+from doml_mc.z3.deepening import check_doml_model_deepening
+from doml_mc.z3.encoding import Encoding, EncodingOptions
+
+from .associations import EXAMPLES
+
+
+def mk_at_least(cname: str, n: int) -> Callable[[Encoding], BoolRef]:
+    def at_least(enc: Encoding) -> BoolRef:
+        xs = Consts(" ".join(f"x{i}" for i in range(n)), enc.elem_sort)
+        return Exists(
+            xs,
+            And(
+                Distinct(*xs),
+                *(enc.elem_class_f(x) == enc.class_[cname] for x in xs),
+            ),
+        )
+
+    return at_least
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--metamodel", default="assets/doml_meta.yaml")
+    parser.add_argument("--models", nargs="+", default=EXAMPLES)
+    parser.add_argument(
+        "--class", dest="cname", default="infrastructure_Location"
+    )
+    parser.add_argument("--needed", type=int, default=2)
+    parser.add_argument("--max-unbound", type=int, default=6)
+    args = parser.parse_args()
+
+    mm, inv_assoc = load_metamodel(args.metamodel)
+    requirements = [
+        Requirement(
+            f"at_least_{args.needed}", mk_at_least(args.cname, args.needed)
+        )
+    ]
+    options = EncodingOptions(associations="sparse")
+
+    print(f"{'model':>24} {'mode':>10} {'unbound':>7} {'time (s)':>9}")
+    for mname in args.models:
+        with open(f"example_json_models/{mname}.doml") as jsonf:
+            doc = json.load(jsonf)
+        im = doml_model_to_im(parse_doml_model(doc, mm), mm)
+        reciprocate_inverse_associations(im, inv_assoc)
+
+        t = time.perf_counter()
+        res = check_doml_model_deepening(
+            im, mm, inv_assoc, requirements, args.max_unbound
+        )
+        print(
+            f"{mname:>24} {'deepening':>10} {str(res.n_unbound):>7}"
+            f" {time.perf_counter() - t:>9.2f}"
+        )
+
+        t = time.perf_counter()
+        n_unbound = None
+        for n in range(args.max_unbound + 1):
+            unbound_elems = [f"unbound{i}" for i in range(n)]
+            result = check_doml_model(
+                im, mm, inv_assoc, unbound_elems, requirements, options
+            )
+            if str(result.result) == "sat":
+                n_unbound = n
+                break
+        print(
+            f"{mname:>24} {'fresh':>10} {str(n_unbound):>7}"
+            f" {time.perf_counter() - t:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
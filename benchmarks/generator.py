@@ -0,0 +1,197 @@
+"""
+Seeded generator of synthetic DOML documents, in the JSON format accepted by
+`parse_doml_model`, for benchmarking on models larger than the examples.
+"""
+import json
+import random
+from dataclasses import dataclass, field
+from ipaddress import ip_network
+
+# The kinds of violations of the metamodel that can be injected in a
+# document, with the constraint `validate_im` reports them as. Deployments
+# cannot be generated, since `parse_doml_model` does not read them.
+VIOLATIONS = {
+    # A node with a cost which is not an integer.
+    "attribute_type": "attribute_st_types",
+    # A virtual machine generated from a network rather than an image.
+    "association_class": "association_st_classes",
+}
+
+
+@dataclass
+class GeneratorParams:
+    # Application software packages.
+    components: int = 4
+    # Interfaces exposed by each component.
+    exposed_interfaces: int = 1
+    # Interfaces consumed by each component, among those of other components.
+    consumed_interfaces: int = 1
+    # Virtual machines in the infrastructure layer.
+    nodes: int = 4
+    # Network interfaces of each node.
+    interfaces: int = 1
+    networks: int = 1
+    concretizations: int = 1
+    # Kinds of violations in `VIOLATIONS` to inject, each in a different
+    # node, at most one per node.
+    violations: list[str] = field(default_factory=list)
+    seed: int = 0
+
+    def n_elements(self) -> int:
+        """Number of elements of the intermediate model of the document."""
+        return (
+            self.components * (1 + self.exposed_interfaces)
+            + self.nodes * (1 + self.interfaces)
+            + self.networks
+            + self.concretizations * (2 + self.nodes + self.networks)
+        )
+
+
+def params_for_size(n_elements: int, seed: int = 0) -> GeneratorParams:
+    """Parameters for a document of about `n_elements` elements."""
+    k = max(1, n_elements // 5)
+    return GeneratorParams(
+        components=k,
+        nodes=k,
+        networks=max(1, k // 50),
+        seed=seed,
+    )
+
+
+def generate_doml_document(params: GeneratorParams) -> dict:
+    rng = random.Random(params.seed)
+
+    # Each network gets its own /16, so that up to 65534 interfaces fit in it.
+    networks = [
+        {
+            "typeId": "infrastructure_Network",
+            "name": f"net{i}",
+            "protocol": "TCP/IP",
+            "addressRange": f"10.{i % 256}.0.0/16",
+        }
+        for i in range(params.networks)
+    ]
+    hosts = [ip_network(net["addressRange"]).hosts() for net in networks]
+
+    def mk_interface(node_n: str, j: int) -> dict:
+        i = rng.randrange(params.networks)
+        return {
+            "name": f"{node_n}_niface{j}",
+            "belongsTo": networks[i]["name"],
+            "endPoint": str(next(hosts[i])),
+        }
+
+    nodes = [
+        {
+            "typeId": "infrastructure_VirtualMachine",
+            "name": node_n,
+            "os": rng.choice(["ubuntu", "debian", "centos"]),
+            "cpu": rng.choice(["x86_64", "arm64"]),
+            "cost": rng.randrange(1, 100),
+            "interfaces": [
+                mk_interface(node_n, j) for j in range(params.interfaces)
+            ],
+        }
+        for i in range(params.nodes)
+        for node_n in [f"vm{i}"]
+    ]
+
+    if len(params.violations) > len(nodes):
+        raise ValueError(
+            f"Cannot inject {len(params.violations)} violations in"
+            f" {len(nodes)} nodes."
+        )
+    for kind, node in zip(
+        params.violations, rng.sample(nodes, len(params.violations))
+    ):
+        if kind == "attribute_type":
+            node["cost"] = "free"
+        elif kind == "association_class":
+            node["generatedFrom"] = networks[0]["name"]
+        else:
+            raise ValueError(f"Unknown violation {kind}.")
+
+    components = [
+        {
+            "typeId": "application_SoftwarePackage",
+            "name": f"sw{i}",
+            "exposedInterfaces": [
+                {
+                    "typeId": "application_SoftwareInterface",
+                    "name": f"iface{j}",
+                    "endPoint": str(rng.randrange(1024, 65536)),
+                }
+                for j in range(params.exposed_interfaces)
+            ],
+        }
+        for i in range(params.components)
+    ]
+    if params.components > 1 and params.exposed_interfaces > 0:
+        for i, comp in enumerate(components):
+            for _ in range(params.consumed_interfaces):
+                # Any other component.
+                k = (i + rng.randrange(1, params.components)) % len(components)
+                ifacen = f"iface{rng.randrange(params.exposed_interfaces)}"
+                comp.setdefault(f"consumedInterfaces->sw{k}", []).append(
+                    ifacen
+                )
+
+    concretizations = [
+        {
+            "typeId": "concrete_ConcreteInfrastructure",
+            "name": f"conc{c}",
+            "vms": [
+                {
+                    "typeId": "concrete_VirtualMachine",
+                    "name": f"conc{c}_{node['name']}",
+                    "maps": node["name"],
+                }
+                for node in nodes
+            ],
+            "networks": [
+                {
+                    "typeId": "concrete_Network",
+                    "name": f"conc{c}_{net['name']}",
+                    "maps": net["name"],
+                }
+                for net in networks
+            ],
+            "providers": [
+                {
+                    "typeId": "concrete_RuntimeProvider",
+                    "name": f"conc{c}_provider",
+                    "providedVMs": [
+                        f"conc{c}_{node['name']}" for node in nodes
+                    ],
+                    "providedNetworks": [
+                        f"conc{c}_{net['name']}" for net in networks
+                    ],
+                }
+            ],
+        }
+        for c in range(params.concretizations)
+    ]
+
+    return {
+        "typeId": "commons_DOMLModel",
+        "name": "synthetic",
+        "modelname": "Synthetic DOML model",
+        "version": "0.1",
+        "id": f"synthetic_{params.seed}",
+        "application": {
+            "name": "app_layer",
+            "typeId": "application_ApplicationLayer",
+            "children": components,
+        },
+        "infrastructure": {
+            "typeId": "infrastructure_InfrastructureLayer",
+            "nodes": nodes,
+            "networks": networks,
+        },
+        "concretizations": concretizations,
+    }
+
+
+def write_doml_document(params: GeneratorParams, path: str) -> None:
+    with open(path, "w") as jsonf:
+        json.dump(generate_doml_document(params), jsonf, indent=4)
@@ -0,0 +1,228 @@
+"""
+Benchmark suite: runs scenarios, each a model, a number of unbound elements,
+a set of requirements and encoding options, a number of times, timing each
+phase of the pipeline separately, from loading the JSON document to the
+check, and reports the median and the 90th percentile of each phase, with
+the statistics of the solver. Results can be written as JSON with
+`--output`.
+
+The phases between loading the document and checking it are the functions
+decorated with `doml_mc.instrumentation.instrumented`, as they report
+themselves to a sink, named after them. The time of `encode_doml_model`
+includes that of the phases it calls.
+
+Requirements are either checked together with the metamodel
+("cumulative"), or after a check of the metamodel alone, on the same solver
+("incremental"), in which case the phase "check" is the first check and
+"check requirements" the second.
+
+Run from the repository root with `python -m benchmarks.harness`.
+"""
+import argparse
+import json
+import statistics
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Literal, Optional
+
+from z3 import CheckSatResult
+
+from doml_mc.instrumentation import MemorySink, recording
+from doml_mc.intermediate_model.doml_element import (
+    reciprocate_inverse_associations,
+)
+from doml_mc.intermediate_model.doml_model2im import doml_model_to_im
+from doml_mc.intermediate_model.metamodel_snapshot import load_metamodel
+from doml_mc.intermediate_model.types import CompiledMetaModel
+from doml_mc.model.doml_model import parse_doml_model
+from doml_mc.z3.encoding import EncodingOptions, encode_doml_model
+from doml_mc.z3.perf_store import z3_statistics
+from doml_mc.z3.utils import assert_tracked
+
+from .requirements import REQUIREMENTS
+
+RequirementsMode = Literal["cumulative", "incremental"]
+
+# The Z3 statistics summarized, as named by `Statistics.keys`; all of them
+# are kept in the results of each run.
+Z3_STATISTICS = ["time", "quant instantiations", "conflicts", "memory"]
+
+
+@dataclass
+class Scenario:
+    name: str
+    # A path, or the name of a model in `example_json_models`.
+    model: str
+    unbound_elems_n: int = 0
+    # Names of requirements in `REQUIREMENTS`.
+    requirements: list[str] = field(default_factory=list)
+    requirements_mode: RequirementsMode = "cumulative"
+    options: EncodingOptions = field(default_factory=EncodingOptions)
+
+    @property
+    def path(self) -> str:
+        if "/" in self.model or self.model.endswith(".doml"):
+            return self.model
+        return f"example_json_models/{self.model}.doml"
+
+
+@dataclass
+class RunResult:
+    # Seconds taken by each phase, in the order they ran.
+    phases: dict[str, float]
+    result: str
+    # All the statistics of the solver after the last check.
+    statistics: dict[str, float]
+
+
+_REQUIREMENT_NAMES = [req.name for req in REQUIREMENTS]
+
+SCENARIOS = [
+    Scenario(
+        f"{mname} {mode}",
+        mname,
+        unbound_n,
+        requirements=[] if mode == "first" else _REQUIREMENT_NAMES,
+        requirements_mode=(
+            "incremental" if mode == "incremental" else "cumulative"
+        ),
+        options=EncodingOptions(associations="sparse"),
+    )
+    for mname, unbound_n in [
+        ("wordpress_json_example", 2),
+        ("wordpress_json_no_iface", 3),
+        ("nginx-openstack_v2", 2),
+    ]
+    for mode in ("first", "incremental", "cumulative")
+]
+
+
+class PhaseTimer:
+    def __init__(self) -> None:
+        self.phases: dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = (
+                self.phases.get(name, 0.0) + time.perf_counter() - t
+            )
+
+
+def run_scenario(
+    scenario: Scenario, mm: CompiledMetaModel, inv_assoc: list[tuple[str, str]]
+) -> RunResult:
+    requirements = {req.name: req for req in REQUIREMENTS}
+    timer = PhaseTimer()
+    with timer.phase("json load"):
+        with open(scenario.path) as jsonf:
+            doc = json.load(jsonf)
+    unbound_elems = [f"unbound{i}" for i in range(scenario.unbound_elems_n)]
+
+    # The instrumented functions report their own times; assertions are not
+    # counted, as that would show in the time of `encode_doml_model`.
+    with recording(MemorySink(counts=False)) as sink:
+        im = doml_model_to_im(parse_doml_model(doc, mm), mm)
+        reciprocate_inverse_associations(im, inv_assoc)
+        enc = encode_doml_model(
+            im, mm, inv_assoc, unbound_elems, scenario.options
+        )
+    for name, rec in sink.totals().items():
+        timer.phases[name.rsplit(".", 1)[-1]] = rec.time
+
+    result: Optional[CheckSatResult] = None
+    if scenario.requirements_mode == "incremental":
+        with timer.phase("check"):
+            result = enc.solver.check()
+    with timer.phase("requirements"):
+        for rname in scenario.requirements:
+            assert_tracked(enc.solver, requirements[rname].formula(enc), rname)
+    with timer.phase(
+        "check requirements"
+        if scenario.requirements_mode == "incremental"
+        else "check"
+    ):
+        result = enc.solver.check()
+    return RunResult(timer.phases, str(result), z3_statistics(enc.solver))
+
+
+def _summary(samples: list[float]) -> dict[str, float]:
+    return {
+        "median": statistics.median(samples),
+        "p90": (
+            statistics.quantiles(samples, n=10, method="inclusive")[-1]
+            if len(samples) > 1
+            else samples[0]
+        ),
+    }
+
+
+def summarize(runs: list[RunResult]) -> dict:
+    """The median and 90th percentile of each phase and statistic."""
+    return {
+        "phases": {
+            phase: _summary([run.phases[phase] for run in runs])
+            for phase in runs[0].phases
+        },
+        "statistics": {
+            key: _summary([run.statistics.get(key, 0) for run in runs])
+            for key in Z3_STATISTICS
+        },
+        "results": sorted({run.result for run in runs}),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--metamodel", default="assets/doml_meta.yaml")
+    parser.add_argument(
+        "--scenarios",
+        nargs="+",
+        help="names, or parts of names, of the scenarios to run",
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="path of a JSON file of results")
+    args = parser.parse_args()
+
+    mm, inv_assoc = load_metamodel(args.metamodel)
+    scenarios = [
+        s
+        for s in SCENARIOS
+        if args.scenarios is None or any(p in s.name for p in args.scenarios)
+    ]
+
+    output = []
+    for scenario in scenarios:
+        runs = [
+            run_scenario(scenario, mm, inv_assoc) for _ in range(args.runs)
+        ]
+        summary = summarize(runs)
+        print(f"{scenario.name} ({', '.join(summary['results'])})")
+        print(f"  {'phase':>36} {'median (ms)':>12} {'p90 (ms)':>9}")
+        for phase, s in summary["phases"].items():
+            print(
+                f"  {phase:>36} {s['median'] * 1e3:>12.2f}"
+                f" {s['p90'] * 1e3:>9.2f}"
+            )
+        for key, s in summary["statistics"].items():
+            print(f"  {key:>36} {s['median']:>12.2f} {s['p90']:>9.2f}")
+        output.append(
+            {
+                "scenario": asdict(scenario),
+                "summary": summary,
+                "runs": [asdict(run) for run in runs],
+            }
+        )
+
+    if args.output is not None:
+        with open(args.output, "w") as outf:
+            json.dump(output, outf, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Import-time benchmark: cold-start cost of the entry points of `doml_mc`, as
+reported by `python -X importtime`.
+
+Parsing and converting models must not load the solver or graph libraries, so
+the benchmark also fails if any scenario pulls in one of its forbidden
+modules. Run from the repository root with `python -m benchmarks.importtime`.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from dataclasses import dataclass, field
+
+
+@dataclass
+class Scenario:
+    modules: list[str]
+    forbidden: set[str] = field(default_factory=set)
+
+
+SCENARIOS = {
+    "parse": Scenario(
+        ["doml_mc.model.doml_model"],
+        forbidden={"z3", "networkx"},
+    ),
+    "parse + convert": Scenario(
+        [
+            "doml_mc.model.doml_model",
+            "doml_mc.intermediate_model.doml_model2im",
+            "doml_mc.intermediate_model.doml_element",
+            "doml_mc.intermediate_model.metamodel_snapshot",
+        ],
+        forbidden={"z3", "networkx"},
+    ),
+    "encode": Scenario(
+        [
+            "doml_mc.z3.metamodel_encoding",
+            "doml_mc.z3.im_encoding",
+        ],
+    ),
+}
+
+
+@dataclass
+class ImportTimes:
+    # Microseconds spent importing each of the scenario's modules, including
+    # their dependencies.
+    cumulative_us: dict[str, int]
+    loaded: set[str]
+
+
+def measure(modules: list[str]) -> ImportTimes:
+    stderr = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            f"import {', '.join(modules)}",
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stderr
+
+    cumulative_us = {}
+    loaded = set()
+    for line in stderr.splitlines():
+        # Lines look like `import time:  self | cumulative | [indent]name`.
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        name = name.strip()
+        loaded.add(name)
+        if name in modules:
+            cumulative_us[name] = int(cumulative)
+    return ImportTimes(cumulative_us, loaded)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    failed = False
+    for sname, scenario in SCENARIOS.items():
+        rslts = [measure(scenario.modules) for _ in range(args.runs)]
+        print(sname)
+        for mod in scenario.modules:
+            times = [
+                r.cumulative_us[mod] for r in rslts if mod in r.cumulative_us
+            ]
+            if times:
+                print(
+                    f"  {mod} (ms):", round(statistics.median(times) / 1000, 2)
+                )
+        print(
+            "  Total (ms):",
+            round(
+                statistics.median(sum(r.cumulative_us.values()) for r in rslts)
+                / 1000,
+                2,
+            ),
+        )
+        offending = sorted(
+            name
+            for name in rslts[0].loaded
+            if name.split(".")[0] in scenario.forbidden
+        )
+        if offending:
+            failed = True
+            print("  Loads forbidden modules:", ", ".join(offending[:5]))
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Incremental checking benchmark: time to re-check a model after editing one
+of its elements with a full encoding and with a `CheckSession`, on the
+example models and on generated ones.
+
+The edit increments an integer attribute of the first element having one.
+
+Run from the repository root with `python -m benchmarks.incremental`.
+"""
+import argparse
+import json
+import statistics
+import time
+
+from doml_mc.intermediate_model.doml_element import (
+    DOMLElement,
+    reciprocate_inverse_associations,
+)
+from doml_mc.intermediate_model.doml_model2im import doml_model_to_im
+from doml_mc.intermediate_model.metamodel_snapshot import load_metamodel
+from doml_mc.intermediate_model.types import IntermediateModel
+from doml_mc.model.doml_model import parse_doml_model
+from doml_mc.z3.encoding import EncodingOptions, encode_doml_model
+from doml_mc.z3.session import CheckSession
+
+from .associations import EXAMPLES
+from .generator import generate_doml_document, params_for_size
+
+SIZES = [50]
+
+
+def edit(im: IntermediateModel, n: int) -> IntermediateModel:
+    """A copy of `im` with an integer attribute set to `n`."""
+    for ename, e in im.items():
+        for aname, avalue in e.attributes.items():
+            if type(avalue) is int:
+                return im | {
+                    ename: DOMLElement(
+                        name=e.name,
+                        class_=e.class_,
+                        attributes=e.attributes | {aname: n},
+                        associations=e.associations,
+                    )
+                }
+    raise ValueError("No element has an integer attribute.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--metamodel", default="assets/doml_meta.yaml")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--unbound", type=int, default=2)
+    parser.add_argument("--edits", type=int, default=3)
+    args = parser.parse_args()
+
+    mm, inv_assoc = load_metamodel(args.metamodel)
+    unbound_elems = [f"unbound{i}" for i in range(args.unbound)]
+    options = EncodingOptions(associations="sparse")
+
+    models: dict[str, dict] = {}
+    for ex in EXAMPLES:
+        with open(f"example_json_models/{ex}.doml") as jsonf:
+            models[ex] = json.load(jsonf)
+    for size in args.sizes:
+        models[f"generated_{size}"] = generate_doml_document(
+            params_for_size(size)
+        )
+
+    print(
+        f"{'model':>24} {'mode':>8} {'encode (s)':>10} {'solve (s)':>10}"
+        f" {'reused':>7}"
+    )
+    for mname, doc in models.items():
+        im = doml_model_to_im(parse_doml_model(doc, mm), mm)
+        reciprocate_inverse_associations(im, inv_assoc)
+        edits = [edit(im, n) for n in range(args.edits)]
+
+        encode_times, solve_times = [], []
+        for im_edit in edits:
+            t = time.perf_counter()
+            enc = encode_doml_model(
+                im_edit, mm, inv_assoc, unbound_elems, options
+            )
+            encode_times.append(time.perf_counter() - t)
+            t = time.perf_counter()
+            enc.solver.check()
+            solve_times.append(time.perf_counter() - t)
+        print(
+            f"{mname:>24} {'full':>8}"
+            f" {statistics.median(encode_times):>10.4f}"
+            f" {statistics.median(solve_times):>10.2f} {'':>7}"
+        )
+
+        session = CheckSession(mm, inv_assoc, unbound_elems)
+        session.update(im)
+        session.check()
+        encode_times, solve_times, reused = [], [], []
+        for im_edit in edits:
+            t = time.perf_counter()
+            update = session.update(im_edit)
+            encode_times.append(time.perf_counter() - t)
+            reused.append(update.reused_ratio)
+            t = time.perf_counter()
+            session.check()
+            solve_times.append(time.perf_counter() - t)
+        print(
+            f"{mname:>24} {'session':>8}"
+            f" {statistics.median(encode_times):>10.4f}"
+            f" {statistics.median(solve_times):>10.2f}"
+            f" {statistics.median(reused):>7.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
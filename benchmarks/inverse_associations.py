@@ -0,0 +1,87 @@
+"""
+Microbenchmark of `reciprocate_inverse_associations` on generated models
+whose networks connect many interfaces, compared to the previous
+implementation, which allocated a new set for every pair.
+
+Among the associations of the metamodel, only infrastructure ones have
+inverses, `infrastructure_NetworkInterface::belongsTo` being the densest.
+
+Run from the repository root with `python -m benchmarks.inverse_associations`.
+"""
+import argparse
+import statistics
+import time
+
+from doml_mc.intermediate_model.doml_element import (
+    reciprocate_inverse_associations,
+)
+from doml_mc.intermediate_model.doml_model2im import doml_model_to_im
+from doml_mc.intermediate_model.metamodel_snapshot import load_metamodel
+from doml_mc.intermediate_model.types import IntermediateModel
+from doml_mc.model.doml_model import parse_doml_model
+
+from .generator import GeneratorParams, generate_doml_document
+
+# The previous implementation is quadratic in the interfaces of a network.
+SIZES = [100, 1_000, 5_000, 10_000]
+
+
+def reciprocate_inverse_associations_legacy(
+    im: IntermediateModel,
+    invs: list[tuple[str, str]],
+) -> None:
+    inv_dict = dict(invs) | {an2: an1 for an1, an2 in invs}
+    for ename, elem in im.items():
+        for aname, atgts in elem.associations.items():
+            if aname in inv_dict:
+                for atgt in atgts:
+                    im[atgt].associations[inv_dict[aname]] = im[
+                        atgt
+                    ].associations.get(inv_dict[aname], set()) | {ename}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--metamodel", default="assets/doml_meta.yaml")
+    parser.add_argument("--nodes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--interfaces", type=int, default=4)
+    parser.add_argument("--networks", type=int, default=2)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    mm, inv_assoc = load_metamodel(args.metamodel)
+    impls = {
+        "legacy": reciprocate_inverse_associations_legacy,
+        "bulk": reciprocate_inverse_associations,
+    }
+    print(f"{'elements':>10} {'pairs':>8}", end="")
+    for iname in impls:
+        print(f" {iname + ' (ms)':>12}", end="")
+    print()
+    for nodes in args.nodes:
+        params = GeneratorParams(
+            components=0,
+            nodes=nodes,
+            interfaces=args.interfaces,
+            networks=args.networks,
+        )
+        doml_model = parse_doml_model(generate_doml_document(params), mm)
+        n_elems = len(doml_model_to_im(doml_model, mm))
+
+        times = {}
+        for iname, impl in impls.items():
+            times[iname] = []
+            for _ in range(args.runs):
+                im = doml_model_to_im(doml_model, mm)
+                t = time.perf_counter()
+                impl(im, inv_assoc)
+                times[iname].append(time.perf_counter() - t)
+
+        print(f"{n_elems:>10} {nodes * args.interfaces:>8}", end="")
+        for iname in impls:
+            print(f" {statistics.median(times[iname]) * 1e3:>12.2f}", end="")
+        print()
+
+
+if __name__ == "__main__":
+    main()
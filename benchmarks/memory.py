@@ -0,0 +1,119 @@
+"""
+Memory benchmark: bytes per element of the intermediate model of a generated
+document, as built by `doml_model_to_im`.
+
+It compares the current slotted representation, whose class names and mangled
+names are shared with the metamodel, to the previous one, emulated by copying
+every element into an unslotted dataclass, see `to_baseline`.
+
+Run from the repository root with `python -m benchmarks.memory`.
+"""
+import argparse
+import gc
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, Union
+
+from doml_mc.intermediate_model.doml_model2im import doml_model_to_im
+from doml_mc.intermediate_model.metamodel_snapshot import load_metamodel
+from doml_mc.intermediate_model.types import IntermediateModel
+from doml_mc.model.doml_model import DOMLModel, parse_doml_model
+
+from .generator import generate_doml_document, params_for_size
+
+
+@dataclass
+class UnslottedDOMLElement:
+    name: str
+    class_: str
+    attributes: dict[str, Union[str, int, bool]]
+    associations: dict[str, set[str]]
+
+
+def _copy_str(s: str) -> str:
+    # Slicing and concatenating yields a new, equal string object.
+    return s[:1] + s[1:]
+
+
+def to_baseline(
+    im: IntermediateModel, doml_model: DOMLModel
+) -> dict[str, UnslottedDOMLElement]:
+    """
+    Copies `im`, converted from `doml_model`, into the layout it had before
+    elements were slotted. Only the strings which each element owned back then
+    are copied: the class names taken from the `typeId` of the components,
+    nodes and groups of the document, and the mangled names of the attributes
+    and associations parsed from the nodes, which were built with an f-string
+    each. The other class names and mangled names were string literals of the
+    converters, which all the elements shared then too.
+    """
+    infra = doml_model.infrastructure
+    typed = {
+        *(comp.name for comp in doml_model.application.children.values()),
+        *(node.name for node in infra.nodes.values()),
+        *(group.name for group in infra.groups.values()),
+    }
+    parsed = {
+        node.name: node.attributes.keys() | node.associations.keys()
+        for node in infra.nodes.values()
+    }
+
+    def copy_key(ename: str, k: str) -> str:
+        return _copy_str(k) if k in parsed.get(ename, ()) else k
+
+    return {
+        ename: UnslottedDOMLElement(
+            name=e.name,
+            class_=_copy_str(e.class_) if ename in typed else e.class_,
+            attributes={
+                copy_key(ename, k): v for k, v in e.attributes.items()
+            },
+            associations={
+                copy_key(ename, k): set(v) for k, v in e.associations.items()
+            },
+        )
+        for ename, e in im.items()
+    }
+
+
+def measure(build: Callable[[], Any]) -> tuple[Any, int]:
+    """Returns what `build` returns, and how many bytes it retains."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    built = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return built, after - before
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--metamodel", default="assets/doml_meta.yaml")
+    parser.add_argument("--elements", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    mm, _ = load_metamodel(args.metamodel)
+    params = params_for_size(args.elements, args.seed)
+    doml_model = parse_doml_model(generate_doml_document(params), mm)
+
+    im, im_bytes = measure(lambda: doml_model_to_im(doml_model, mm))
+    # The copy shares the element names with `im`, whose size is thus not
+    # counted, while `im_bytes` includes it: subtract it for a fair count.
+    names_bytes = sum(name.__sizeof__() for name in im)
+    _, baseline_bytes = measure(lambda: to_baseline(im, doml_model))
+    baseline_bytes += names_bytes
+
+    print("Number of elements:", len(im))
+    print(
+        "Bytes per element (before, unslotted):",
+        round(baseline_bytes / len(im), 1),
+    )
+    print("Bytes per element (after):", round(im_bytes / len(im), 1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Metamodel encoding benchmark: solver statistics with the quantified and the
+ground encodings of the metamodel constraints (`EncodingOptions.metamodel`)
+on the example models.
+
+Run from the repository root with `python -m benchmarks.metamodel`.
+"""
+import argparse
+import json
+import statistics
+import time
+import typing
+
+from doml_mc.intermediate_model.doml_element import (
+    reciprocate_inverse_associations,
+)
+from doml_mc.intermediate_model.doml_model2im import doml_model_to_im
+from doml_mc.intermediate_model.metamodel_snapshot import load_metamodel
+from doml_mc.model.doml_model import parse_doml_model
+from doml_mc.z3.encoding import (
+    EncodingOptions,
+    MetaModelEncoding,
+    encode_doml_model,
+)
+
+from .associations import EXAMPLES
+
+MODES = typing.get_args(MetaModelEncoding)
+STATS = ["quant instantiations", "conflicts", "time", "memory"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--metamodel", default="assets/doml_meta.yaml")
+    parser.add_argument("--models", nargs="+", default=EXAMPLES)
+    parser.add_argument("--unbound", type=int, default=2)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument(
+        "--associations", default="sparse", help="EncodingOptions.associations"
+    )
+    args = parser.parse_args()
+
+    mm, inv_assoc = load_metamodel(args.metamodel)
+    unbound_elems = [f"unbound{i}" for i in range(args.unbound)]
+
+    print(
+        f"{'model':>24} {'mode':>10} {'result':>6} {'encode (s)':>10}"
+        + "".join(f" {sname:>20}" for sname in STATS)
+    )
+    for mname in args.models:
+        with open(f"example_json_models/{mname}.doml") as jsonf:
+            doc = json.load(jsonf)
+        im = doml_model_to_im(parse_doml_model(doc, mm), mm)
+        reciprocate_inverse_associations(im, inv_assoc)
+        for mode in MODES:
+            options = EncodingOptions(
+                associations=args.associations, metamodel=mode
+            )
+            encode_times = []
+            stats: dict[str, list[float]] = {sname: [] for sname in STATS}
+            for _ in range(args.runs):
+                t = time.perf_counter()
+                enc = encode_doml_model(
+                    im, mm, inv_assoc, unbound_elems, options
+                )
+                encode_times.append(time.perf_counter() - t)
+                rslt = enc.solver.check()
+                z3_stats = enc.solver.statistics()
+                for sname in STATS:
+                    stats[sname].append(
+                        z3_stats.get_key_value(sname)
+                        if sname in z3_stats.keys()
+                        else 0
+                    )
+            print(
+                f"{mname:>24} {mode:>10} {str(rslt):>6}"
+                f" {statistics.median(encode_times):>10.2f}"
+                + "".join(
+                    f" {statistics.median(stats[sname]):>20.2f}"
+                    for sname in STATS
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
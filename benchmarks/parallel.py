@@ -0,0 +1,93 @@
+"""
+Parallel requirement checking benchmark: time to check each of a set of
+requirements on the example models with `check_requirements_parallel`, by
+number of processes, against checking them in sequence on one solver.
+
+The requirements are those of `benchmarks.requirements`, repeated
+`--copies` times under different names to make up a larger suite.
+
+Run from the repository root with `python -m benchmarks.parallel`.
+"""
+import argparse
+import json
+import os
+import time
+from dataclasses import replace
+
+from doml_mc.intermediate_model.doml_element import (
+    reciprocate_inverse_associations,
+)
+from doml_mc.intermediate_model.doml_model2im import doml_model_to_im
+from doml_mc.intermediate_model.metamodel_snapshot import load_metamodel
+from doml_mc.model.doml_model import parse_doml_model
+from doml_mc.z3.encoding import EncodingOptions, encode_doml_model
+from doml_mc.z3.parallel import check_requirements_parallel
+
+from .associations import EXAMPLES
+from .requirements import REQUIREMENTS
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--metamodel", default="assets/doml_meta.yaml")
+    parser.add_argument("--models", nargs="+", default=EXAMPLES)
+    parser.add_argument("--unbound", type=int, default=2)
+    parser.add_argument("--copies", type=int, default=4)
+    parser.add_argument(
+        "--processes",
+        type=int,
+        nargs="+",
+        default=sorted({1, 2, 4, os.cpu_count() or 1}),
+    )
+    args = parser.parse_args()
+
+    mm, inv_assoc = load_metamodel(args.metamodel)
+    unbound_elems = [f"unbound{i}" for i in range(args.unbound)]
+    options = EncodingOptions(associations="sparse")
+    requirements = [
+        replace(req, name=f"{req.name}_{i}")
+        for i in range(args.copies)
+        for req in REQUIREMENTS
+    ]
+
+    print(f"{'model':>24} {'processes':>10} {'time (s)':>9} {'verdicts':>9}")
+    for mname in args.models:
+        with open(f"example_json_models/{mname}.doml") as jsonf:
+            doc = json.load(jsonf)
+        im = doml_model_to_im(parse_doml_model(doc, mm), mm)
+        reciprocate_inverse_associations(im, inv_assoc)
+
+        t = time.perf_counter()
+        enc = encode_doml_model(im, mm, inv_assoc, unbound_elems, options)
+        verdicts = []
+        for req in requirements:
+            enc.solver.push()
+            enc.solver.add(req.formula(enc))
+            verdicts.append(str(enc.solver.check()))
+            enc.solver.pop()
+        print(
+            f"{mname:>24} {'sequential':>10} {time.perf_counter() - t:>9.2f}"
+            f" {verdicts.count('sat'):>4}/{len(verdicts):<4}"
+        )
+
+        for processes in args.processes:
+            t = time.perf_counter()
+            results = check_requirements_parallel(
+                im,
+                mm,
+                inv_assoc,
+                unbound_elems,
+                requirements,
+                options,
+                processes,
+            )
+            verdicts = [str(r.check_result.result) for r in results]
+            print(
+                f"{mname:>24} {processes:>10}"
+                f" {time.perf_counter() - t:>9.2f}"
+                f" {verdicts.count('sat'):>4}/{len(verdicts):<4}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Portfolio solving benchmark: time to check the example models with each
+solver configuration of the portfolio alone, and racing all of them with
+`check_doml_model_portfolio`.
+
+Run from the repository root with `python -m benchmarks.portfolio`.
+"""
+import argparse
+import json
+
+from doml_mc.intermediate_model.doml_element import (
+    reciprocate_inverse_associations,
+)
+from doml_mc.intermediate_model.doml_model2im import doml_model_to_im
+from doml_mc.intermediate_model.metamodel_snapshot import load_metamodel
+from doml_mc.model.doml_model import parse_doml_model
+from doml_mc.z3.encoding import EncodingOptions
+from doml_mc.z3.portfolio import (
+    DEFAULT_PORTFOLIO,
+    check_doml_model_portfolio,
+    portfolio_wins,
+)
+
+from .associations import EXAMPLES
+from .requirements import REQUIREMENTS
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--metamodel", default="assets/doml_meta.yaml")
+    parser.add_argument("--models", nargs="+", default=EXAMPLES)
+    parser.add_argument("--unbound", type=int, default=2)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--log", help="Log to append the winners to")
+    args = parser.parse_args()
+
+    mm, inv_assoc = load_metamodel(args.metamodel)
+    unbound_elems = [f"unbound{i}" for i in range(args.unbound)]
+    options = EncodingOptions(associations="sparse")
+
+    print(f"{'model':>24} {'config':>16} {'result':>7} {'time (s)':>9}")
+    for mname in args.models:
+        with open(f"example_json_models/{mname}.doml") as jsonf:
+            doc = json.load(jsonf)
+        im = doml_model_to_im(parse_doml_model(doc, mm), mm)
+        reciprocate_inverse_associations(im, inv_assoc)
+
+        for config in DEFAULT_PORTFOLIO:
+            res = check_doml_model_portfolio(
+                im,
+                mm,
+                inv_assoc,
+                unbound_elems,
+                REQUIREMENTS,
+                options,
+                [config],
+                args.timeout,
+            )
+            print(
+                f"{mname:>24} {config.name:>16}"
+                f" {str(res.check_result.result):>7} {res.time:>9.2f}"
+            )
+        res = check_doml_model_portfolio(
+            im,
+            mm,
+            inv_assoc,
+            unbound_elems,
+            REQUIREMENTS,
+            options,
+            DEFAULT_PORTFOLIO,
+            args.timeout,
+            args.log,
+        )
+        print(
+            f"{mname:>24} {'portfolio':>16}"
+            f" {str(res.check_result.result):>7} {res.time:>9.2f}"
+            f"  won by {res.config}"
+        )
+
+    if args.log is not None:
+        print("Wins:", dict(portfolio_wins(args.log)))
+
+
+if __name__ == "__main__":
+    main()
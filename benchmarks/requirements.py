@@ -0,0 +1,108 @@
+"""
+The requirements of `avg_benchmark.ipynb` and `example.ipynb`, checked by
+`benchmark.py` and by the benchmarks of this package.
+"""
+from z3 import And, BoolRef, Consts, Exists, ExprRef, ForAll, Implies, Or
+
+from doml_mc.z3.check import Requirement
+from doml_mc.z3.encoding import Encoding
+
+
+def iface_uniq(enc: Encoding) -> BoolRef:
+    e1, e2, ni = Consts("e1 e2 i", enc.elem_sort)
+    ifaces = [
+        enc.assoc["infrastructure_ComputingNode::ifaces"],
+        enc.assoc["infrastructure_Storage::ifaces"],
+    ]
+    return ForAll(
+        [e1, e2, ni],
+        Implies(
+            And(
+                Or(*(enc.assoc_rel(e1, a, ni) for a in ifaces)),
+                Or(*(enc.assoc_rel(e2, a, ni) for a in ifaces)),
+            ),
+            e1 == e2,
+        ),
+    )
+
+
+def software_package_iface_net(enc: Encoding) -> BoolRef:
+    spp, spc, i, n, ni, cn, c, d, dc = Consts(
+        "spp spc i n ni cn c d dc", enc.elem_sort
+    )
+    rel, assoc = enc.assoc_rel, enc.assoc
+
+    def on_net(sp: ExprRef) -> BoolRef:
+        return Or(
+            Exists(
+                [cn, d, ni],
+                And(
+                    rel(d, assoc["commons_Deployment::source"], sp),
+                    rel(d, assoc["commons_Deployment::target"], cn),
+                    rel(cn, assoc["infrastructure_ComputingNode::ifaces"], ni),
+                    rel(
+                        ni,
+                        assoc["infrastructure_NetworkInterface::belongsTo"],
+                        n,
+                    ),
+                ),
+            ),
+            Exists(
+                [cn, d, c, dc, ni],
+                And(
+                    rel(d, assoc["commons_Deployment::source"], sp),
+                    rel(d, assoc["commons_Deployment::target"], c),
+                    rel(dc, assoc["commons_Deployment::source"], c),
+                    rel(dc, assoc["commons_Deployment::target"], cn),
+                    rel(cn, assoc["infrastructure_ComputingNode::ifaces"], ni),
+                    rel(
+                        ni,
+                        assoc["infrastructure_NetworkInterface::belongsTo"],
+                        n,
+                    ),
+                ),
+            ),
+        )
+
+    return ForAll(
+        [spp, spc, i],
+        Implies(
+            And(
+                rel(
+                    spp,
+                    assoc["application_SoftwarePackage::exposedInterfaces"],
+                    i,
+                ),
+                rel(
+                    spc,
+                    assoc["application_SoftwarePackage::consumedInterfaces"],
+                    i,
+                ),
+            ),
+            Exists([n], And(on_net(spp), on_net(spc))),
+        ),
+    )
+
+
+REQUIREMENTS = [
+    Requirement(
+        "software_package_iface_net",
+        software_package_iface_net,
+        associations=[
+            "application_SoftwarePackage::exposedInterfaces",
+            "application_SoftwarePackage::consumedInterfaces",
+            "commons_Deployment::source",
+            "commons_Deployment::target",
+            "infrastructure_ComputingNode::ifaces",
+            "infrastructure_NetworkInterface::belongsTo",
+        ],
+    ),
+    Requirement(
+        "iface_uniq",
+        iface_uniq,
+        associations=[
+            "infrastructure_ComputingNode::ifaces",
+            "infrastructure_Storage::ifaces",
+        ],
+    ),
+]
@@ -0,0 +1,178 @@
+"""
+Scaling benchmark: encoding and solving time on generated documents as each
+knob of `GeneratorParams` is swept in turn, the others being left at their
+defaults, with each `--modes` associations encoding. Checks taking longer
+than `--timeout` seconds give `unknown`, and larger values of the knob are
+then skipped for that mode.
+
+With `--violations`, the given kinds of `VIOLATIONS` are injected in every
+document, so that each check is expected to be `unsat`. Each kind is
+injected in a different node, so values of `nodes` smaller than the number
+of kinds are skipped.
+
+Results are written as CSV to `--csv`, and plotted to `--plot` if
+matplotlib is installed.
+
+Run from the repository root with `python -m benchmarks.scaling`.
+"""
+import argparse
+import csv
+import time
+import typing
+from dataclasses import replace
+
+from doml_mc.intermediate_model.doml_element import (
+    reciprocate_inverse_associations,
+)
+from doml_mc.intermediate_model.doml_model2im import doml_model_to_im
+from doml_mc.intermediate_model.metamodel_snapshot import load_metamodel
+from doml_mc.model.doml_model import parse_doml_model
+from doml_mc.z3.encoding import (
+    AssociationsEncoding,
+    EncodingOptions,
+    encode_doml_model,
+)
+
+from .generator import VIOLATIONS, GeneratorParams, generate_doml_document
+
+KNOBS = [
+    "components",
+    "exposed_interfaces",
+    "consumed_interfaces",
+    "nodes",
+    "interfaces",
+    "networks",
+    "concretizations",
+]
+VALUES = [1, 2, 4, 8, 16, 32]
+FIELDS = [
+    "knob",
+    "value",
+    "elements",
+    "mode",
+    "assertions",
+    "encode_s",
+    "solve_s",
+    "result",
+]
+
+
+def plot(rows: list[dict], path: str) -> None:
+    try:
+        import matplotlib
+
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("matplotlib is not installed, not plotting.")
+        return
+
+    modes = sorted({row["mode"] for row in rows})
+    fig, axes = plt.subplots(
+        2, len(KNOBS), figsize=(3 * len(KNOBS), 6), squeeze=False
+    )
+    for j, knob in enumerate(KNOBS):
+        for i, key in enumerate(["encode_s", "solve_s"]):
+            ax = axes[i][j]
+            for mode in modes:
+                points = [
+                    (row["elements"], row[key])
+                    for row in rows
+                    if row["knob"] == knob and row["mode"] == mode
+                ]
+                ax.plot(*zip(*points), marker="o", label=mode)
+            ax.set_title(f"{knob}: {key}", fontsize="small")
+            ax.set_xlabel("elements")
+            ax.set_yscale("log")
+    axes[0][0].legend()
+    fig.tight_layout()
+    fig.savefig(path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--metamodel", default="assets/doml_meta.yaml")
+    parser.add_argument("--knobs", nargs="+", default=KNOBS, choices=KNOBS)
+    parser.add_argument("--values", type=int, nargs="+", default=VALUES)
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        default=["quantified", "sparse"],
+        choices=typing.get_args(AssociationsEncoding),
+    )
+    parser.add_argument("--unbound", type=int, default=0)
+    parser.add_argument(
+        "--violations", nargs="+", default=[], choices=list(VIOLATIONS)
+    )
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--csv", default="scaling.csv")
+    parser.add_argument("--plot")
+    args = parser.parse_args()
+
+    mm, inv_assoc = load_metamodel(args.metamodel)
+    unbound_elems = [f"unbound{i}" for i in range(args.unbound)]
+    base = GeneratorParams(violations=args.violations, seed=args.seed)
+
+    rows = []
+    print(
+        f"{'knob':>20} {'value':>5} {'elements':>8} {'mode':>10}"
+        f" {'encode (s)':>10} {'solve (s)':>9} result"
+    )
+    for knob in args.knobs:
+        timed_out: set[str] = set()
+        for value in args.values:
+            params = replace(base, **{knob: value})
+            if params.nodes < len(params.violations):
+                print(
+                    f"{knob:>20} {value:>5} skipped: fewer nodes than"
+                    " violations"
+                )
+                continue
+            doc = generate_doml_document(params)
+            im = doml_model_to_im(parse_doml_model(doc, mm), mm)
+            reciprocate_inverse_associations(im, inv_assoc)
+            for mode in args.modes:
+                if mode in timed_out:
+                    continue
+                t = time.perf_counter()
+                enc = encode_doml_model(
+                    im,
+                    mm,
+                    inv_assoc,
+                    unbound_elems,
+                    EncodingOptions(associations=mode),
+                )
+                encode_s = time.perf_counter() - t
+                enc.solver.set("timeout", int(args.timeout * 1000))
+                t = time.perf_counter()
+                result = str(enc.solver.check())
+                solve_s = time.perf_counter() - t
+                if result == "unknown":
+                    timed_out.add(mode)
+                row = {
+                    "knob": knob,
+                    "value": value,
+                    "elements": len(im),
+                    "mode": mode,
+                    "assertions": len(enc.solver.assertions()),
+                    "encode_s": encode_s,
+                    "solve_s": solve_s,
+                    "result": result,
+                }
+                rows.append(row)
+                print(
+                    f"{knob:>20} {value:>5} {len(im):>8} {mode:>10}"
+                    f" {encode_s:>10.2f} {solve_s:>9.2f} {result}"
+                )
+
+    with open(args.csv, "w", newline="") as csvf:
+        writer = csv.DictWriter(csvf, FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    if args.plot is not None:
+        plot(rows, args.plot)
+
+
+if __name__ == "__main__":
+    main()
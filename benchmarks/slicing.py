@@ -0,0 +1,132 @@
+"""
+Metamodel slicing benchmark: encoding and solving time, and verdict, with
+and without `EncodingOptions.slice`, on the example models, checked against
+the metamodel alone, with the requirements of `benchmarks.requirements`, and
+with a violation of a multiplicity of the metamodel injected. The verdicts
+must be the same.
+
+Run from the repository root with `python -m benchmarks.slicing`.
+"""
+import argparse
+import json
+import statistics
+import time
+from copy import deepcopy
+
+from doml_mc.intermediate_model.doml_element import (
+    reciprocate_inverse_associations,
+)
+from doml_mc.intermediate_model.doml_model2im import doml_model_to_im
+from doml_mc.intermediate_model.metamodel_snapshot import load_metamodel
+from doml_mc.intermediate_model.types import (
+    CompiledMetaModel,
+    IntermediateModel,
+)
+from doml_mc.model.doml_model import parse_doml_model
+from doml_mc.z3.check import Requirement
+from doml_mc.z3.encoding import EncodingOptions, encode_doml_model
+from doml_mc.z3.utils import assert_tracked
+
+from .associations import EXAMPLES
+from .requirements import REQUIREMENTS
+
+CASES = ["metamodel", "requirements", "violation"]
+# Every network interface must belong to exactly one network.
+VIOLATED_ASSOCIATION = "infrastructure_NetworkInterface::belongsTo"
+
+
+def violate(im: IntermediateModel) -> IntermediateModel:
+    """A copy of `im` with `VIOLATED_ASSOCIATION` removed from an element."""
+    im = deepcopy(im)
+    for e in im.values():
+        if VIOLATED_ASSOCIATION in e.associations:
+            del e.associations[VIOLATED_ASSOCIATION]
+            break
+    return im
+
+
+def run(
+    im: IntermediateModel,
+    mm: CompiledMetaModel,
+    inv_assoc: list[tuple[str, str]],
+    unbound_elems: list[str],
+    requirements: list[Requirement],
+    options: EncodingOptions,
+) -> tuple[str, int, float, float]:
+    """The verdict, the number of classes encoded and the encoding and
+    solving times."""
+    t = time.perf_counter()
+    enc = encode_doml_model(
+        im, mm, inv_assoc, unbound_elems, options, requirements=requirements
+    )
+    for req in requirements:
+        assert_tracked(enc.solver, req.formula(enc), req.name)
+    encode_s = time.perf_counter() - t
+    t = time.perf_counter()
+    result = str(enc.solver.check())
+    return result, len(enc.class_), encode_s, time.perf_counter() - t
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--metamodel", default="assets/doml_meta.yaml")
+    parser.add_argument("--models", nargs="+", default=EXAMPLES)
+    parser.add_argument("--unbound", type=int, default=2)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument(
+        "--associations", default="sparse", help="EncodingOptions.associations"
+    )
+    args = parser.parse_args()
+
+    mm, inv_assoc = load_metamodel(args.metamodel)
+    unbound_elems = [f"unbound{i}" for i in range(args.unbound)]
+
+    print(
+        f"{'model':>24} {'case':>12} {'slice':>5} {'classes':>7}"
+        f" {'encode (ms)':>11} {'solve (ms)':>10} result"
+    )
+    mismatches = 0
+    for mname in args.models:
+        with open(f"example_json_models/{mname}.doml") as jsonf:
+            doc = json.load(jsonf)
+        im = doml_model_to_im(parse_doml_model(doc, mm), mm)
+        reciprocate_inverse_associations(im, inv_assoc)
+
+        for case in CASES:
+            case_im = violate(im) if case == "violation" else im
+            requirements = REQUIREMENTS if case == "requirements" else []
+            verdicts = set()
+            for slice_ in (False, True):
+                options = EncodingOptions(
+                    associations=args.associations, slice=slice_
+                )
+                runs = [
+                    run(
+                        case_im,
+                        mm,
+                        inv_assoc,
+                        unbound_elems,
+                        requirements,
+                        options,
+                    )
+                    for _ in range(args.runs)
+                ]
+                result, n_classes = runs[0][:2]
+                verdicts.update(r[0] for r in runs)
+                encode_s = statistics.median(r[2] for r in runs)
+                solve_s = statistics.median(r[3] for r in runs)
+                print(
+                    f"{mname:>24} {case:>12} {'on' if slice_ else 'off':>5}"
+                    f" {n_classes:>7} {encode_s * 1e3:>11.1f}"
+                    f" {solve_s * 1e3:>10.1f} {result}"
+                )
+            if len(verdicts) > 1:
+                mismatches += 1
+                print(f"{mname:>24} {case:>12} verdicts differ!")
+
+    if mismatches:
+        raise SystemExit(f"{mismatches} checks gave different verdicts.")
+
+
+if __name__ == "__main__":
+    main()
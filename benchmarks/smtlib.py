@@ -0,0 +1,92 @@
+"""
+Encoder backend benchmark: encoding time with the Z3 Python API and with
+SMT-LIB2 text (`EncodingOptions.backend`), on the example models and on
+generated ones of increasing size.
+
+Run from the repository root with `python -m benchmarks.smtlib`.
+"""
+import argparse
+import json
+import statistics
+import time
+import typing
+
+from doml_mc.intermediate_model.doml_element import (
+    reciprocate_inverse_associations,
+)
+from doml_mc.intermediate_model.doml_model2im import doml_model_to_im
+from doml_mc.intermediate_model.metamodel_snapshot import load_metamodel
+from doml_mc.model.doml_model import parse_doml_model
+from doml_mc.z3.encoding import (
+    EncoderBackend,
+    EncodingOptions,
+    encode_doml_model,
+)
+
+from .associations import EXAMPLES
+from .generator import generate_doml_document, params_for_size
+
+SIZES = [100, 500, 1_000]
+BACKENDS = typing.get_args(EncoderBackend)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--metamodel", default="assets/doml_meta.yaml")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--unbound", type=int, default=2)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument(
+        "--associations", default="sparse", help="EncodingOptions.associations"
+    )
+    parser.add_argument("--track", action="store_true")
+    parser.add_argument(
+        "--solve", action="store_true", help="also time the first check"
+    )
+    args = parser.parse_args()
+
+    mm, inv_assoc = load_metamodel(args.metamodel)
+    unbound_elems = [f"unbound{i}" for i in range(args.unbound)]
+
+    models: dict[str, dict] = {}
+    for ex in EXAMPLES:
+        with open(f"example_json_models/{ex}.doml") as jsonf:
+            models[ex] = json.load(jsonf)
+    for size in args.sizes:
+        models[f"generated_{size}"] = generate_doml_document(
+            params_for_size(size)
+        )
+
+    print(
+        f"{'model':>24} {'elements':>8} {'backend':>8}"
+        f" {'encode (s)':>10} {'solve (s)':>10}"
+    )
+    for mname, doc in models.items():
+        im = doml_model_to_im(parse_doml_model(doc, mm), mm)
+        reciprocate_inverse_associations(im, inv_assoc)
+        for backend in BACKENDS:
+            options = EncodingOptions(
+                associations=args.associations,
+                track=args.track,
+                backend=backend,
+            )
+            encode_times = []
+            for _ in range(args.runs):
+                t = time.perf_counter()
+                enc = encode_doml_model(
+                    im, mm, inv_assoc, unbound_elems, options
+                )
+                encode_times.append(time.perf_counter() - t)
+            solve = ""
+            if args.solve:
+                t = time.perf_counter()
+                rslt = enc.solver.check()
+                solve = f"{time.perf_counter() - t:.2f} {rslt}"
+            print(
+                f"{mname:>24} {len(im):>8} {backend:>8}"
+                f" {statistics.median(encode_times):>10.3f} {solve:>10}"
+            )
+
+
+if __name__ == "__main__":
+    main()
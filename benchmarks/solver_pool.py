@@ -0,0 +1,87 @@
+"""
+Solver pool benchmark: time to encode and check a model in a new solver and
+on a warm `SolverPool`, on the example models and on generated ones.
+
+Run from the repository root with `python -m benchmarks.solver_pool`.
+"""
+import argparse
+import json
+import statistics
+import time
+
+from doml_mc.intermediate_model.doml_element import (
+    reciprocate_inverse_associations,
+)
+from doml_mc.intermediate_model.doml_model2im import doml_model_to_im
+from doml_mc.intermediate_model.metamodel_snapshot import load_metamodel
+from doml_mc.model.doml_model import parse_doml_model
+from doml_mc.z3.encoding import EncodingOptions, encode_doml_model
+from doml_mc.z3.solver_pool import SolverPool
+
+from .associations import EXAMPLES
+from .generator import generate_doml_document, params_for_size
+
+SIZES = [50]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--metamodel", default="assets/doml_meta.yaml")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--unbound", type=int, default=2)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument(
+        "--associations", default="sparse", help="EncodingOptions.associations"
+    )
+    args = parser.parse_args()
+
+    mm, inv_assoc = load_metamodel(args.metamodel)
+    unbound_elems = [f"unbound{i}" for i in range(args.unbound)]
+    options = EncodingOptions(associations=args.associations)
+    pool = SolverPool()
+
+    models: dict[str, dict] = {}
+    for ex in EXAMPLES:
+        with open(f"example_json_models/{ex}.doml") as jsonf:
+            models[ex] = json.load(jsonf)
+    for size in args.sizes:
+        models[f"generated_{size}"] = generate_doml_document(
+            params_for_size(size)
+        )
+
+    print(
+        f"{'model':>24} {'elements':>8} {'mode':>6} {'result':>6}"
+        f" {'encode (s)':>10} {'solve (s)':>10}"
+    )
+    for mname, doc in models.items():
+        im = doml_model_to_im(parse_doml_model(doc, mm), mm)
+        reciprocate_inverse_associations(im, inv_assoc)
+        for mode in ["fresh", "pooled"]:
+            encode_times, solve_times = [], []
+            for _ in range(args.runs):
+                t = time.perf_counter()
+                if mode == "fresh":
+                    enc = encode_doml_model(
+                        im, mm, inv_assoc, unbound_elems, options
+                    )
+                    encode_times.append(time.perf_counter() - t)
+                    t = time.perf_counter()
+                    rslt = enc.solver.check()
+                else:  # mode == "pooled"
+                    with pool.encode(
+                        im, mm, inv_assoc, unbound_elems, options
+                    ) as enc:
+                        encode_times.append(time.perf_counter() - t)
+                        t = time.perf_counter()
+                        rslt = enc.solver.check()
+                solve_times.append(time.perf_counter() - t)
+            print(
+                f"{mname:>24} {len(im):>8} {mode:>6} {str(rslt):>6}"
+                f" {statistics.median(encode_times):>10.3f}"
+                f" {statistics.median(solve_times):>10.2f}"
+            )
+    print(f"pool hits: {pool.hits}, misses: {pool.misses}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Startup benchmark: how long a fresh process takes to get the metamodel ready,
+with the plain YAML loader, with the C YAML loader, and from a snapshot.
+
+Run from the repository root with `python -m benchmarks.startup`.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Each snippet runs in a fresh interpreter and prints the seconds it spent
+# loading the metamodel, imports included.
+LOADERS = {
+    "yaml (pure Python loader)": """
+import time
+t = time.perf_counter()
+import yaml
+from doml_mc.intermediate_model.metamodel import (
+    parse_metamodel,
+    parse_inverse_associations,
+)
+with open({path!r}) as mmf:
+    mmdoc = yaml.load(mmf, yaml.Loader)
+mm = parse_metamodel(mmdoc)
+inv_assoc = parse_inverse_associations(mmdoc)
+print(time.perf_counter() - t)
+""",
+    "yaml (C loader) + compile": """
+import time
+t = time.perf_counter()
+from doml_mc.intermediate_model.metamodel_snapshot import (
+    parse_metamodel_bytes,
+)
+with open({path!r}, "rb") as mmf:
+    mm, inv_assoc = parse_metamodel_bytes(mmf.read())
+print(time.perf_counter() - t)
+""",
+    "snapshot": """
+import time
+t = time.perf_counter()
+from doml_mc.intermediate_model.metamodel_snapshot import load_metamodel
+mm, inv_assoc = load_metamodel({path!r}, {cache_dir!r})
+print(time.perf_counter() - t)
+""",
+}
+
+
+def run_loader(snippet: str) -> tuple[float, float]:
+    """Returns the in-process load time and the whole process wall time."""
+    t = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", snippet],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return float(out), time.perf_counter() - t
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--metamodel", default="assets/doml_meta.yaml")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for name, template in LOADERS.items():
+            snippet = template.format(path=args.metamodel, cache_dir=cache_dir)
+            run_loader(snippet)  # Warms up the OS caches and the snapshot.
+            rslts = [run_loader(snippet) for _ in range(args.runs)]
+            print(name)
+            print(
+                "  Median load time (ms):",
+                round(statistics.median(r[0] for r in rslts) * 1000, 2),
+            )
+            print(
+                "  Median process time (ms):",
+                round(statistics.median(r[1] for r in rslts) * 1000, 2),
+            )
+
+
+if __name__ == "__main__":
+    main()
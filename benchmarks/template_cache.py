@@ -0,0 +1,83 @@
+"""
+Metamodel template cache benchmark: encoding time without the cache, with a
+cold cache (cleared before every encoding) and with a warm one, for each
+encoder backend, on the example models.
+
+Run from the repository root with `python -m benchmarks.template_cache`.
+"""
+import argparse
+import json
+import statistics
+import time
+import typing
+
+from doml_mc.intermediate_model.doml_element import (
+    reciprocate_inverse_associations,
+)
+from doml_mc.intermediate_model.doml_model2im import doml_model_to_im
+from doml_mc.intermediate_model.metamodel_snapshot import load_metamodel
+from doml_mc.model.doml_model import parse_doml_model
+from doml_mc.z3.encoding import (
+    EncoderBackend,
+    EncodingOptions,
+    encode_doml_model,
+)
+from doml_mc.z3.template_cache import metamodel_template_cache
+
+from .associations import EXAMPLES
+
+BACKENDS = typing.get_args(EncoderBackend)
+CACHE_STATES = ["off", "cold", "warm"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--metamodel", default="assets/doml_meta.yaml")
+    parser.add_argument("--models", nargs="+", default=EXAMPLES)
+    parser.add_argument("--unbound", type=int, default=2)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--associations", default="sparse", help="EncodingOptions.associations"
+    )
+    args = parser.parse_args()
+
+    mm, inv_assoc = load_metamodel(args.metamodel)
+    unbound_elems = [f"unbound{i}" for i in range(args.unbound)]
+
+    print(
+        f"{'model':>24} {'backend':>8}"
+        + "".join(f" {state + ' (ms)':>10}" for state in CACHE_STATES)
+    )
+    for mname in args.models:
+        with open(f"example_json_models/{mname}.doml") as jsonf:
+            doc = json.load(jsonf)
+        im = doml_model_to_im(parse_doml_model(doc, mm), mm)
+        reciprocate_inverse_associations(im, inv_assoc)
+        for backend in BACKENDS:
+            times: dict[str, list[float]] = {}
+            for state in CACHE_STATES:
+                options = EncodingOptions(
+                    associations=args.associations,
+                    backend=backend,
+                    template_cache=state != "off",
+                )
+                times[state] = []
+                for _ in range(args.runs):
+                    if state == "cold":
+                        metamodel_template_cache.clear()
+                    t = time.perf_counter()
+                    encode_doml_model(
+                        im, mm, inv_assoc, unbound_elems, options
+                    )
+                    times[state].append(time.perf_counter() - t)
+            print(
+                f"{mname:>24} {backend:>8}"
+                + "".join(
+                    f" {statistics.median(times[state]) * 1e3:>10.1f}"
+                    for state in CACHE_STATES
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
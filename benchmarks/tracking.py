@@ -0,0 +1,75 @@
+"""
+Assertion tracking benchmark: encoding and solving time with and without
+`EncodingOptions.track` on the example models.
+
+Run from the repository root with `python -m benchmarks.tracking`.
+"""
+import argparse
+import json
+import statistics
+import time
+
+from doml_mc.intermediate_model.doml_element import (
+    reciprocate_inverse_associations,
+)
+from doml_mc.intermediate_model.doml_model2im import doml_model_to_im
+from doml_mc.intermediate_model.metamodel_snapshot import load_metamodel
+from doml_mc.model.doml_model import parse_doml_model
+from doml_mc.z3.encoding import EncodingOptions, encode_doml_model
+
+from .associations import EXAMPLES
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--metamodel", default="assets/doml_meta.yaml")
+    parser.add_argument("--models", nargs="+", default=EXAMPLES)
+    parser.add_argument("--unbound", type=int, default=2)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument(
+        "--associations", default="sparse", help="EncodingOptions.associations"
+    )
+    parser.add_argument(
+        "--metamodel-encoding",
+        default="ground",
+        help="EncodingOptions.metamodel",
+    )
+    args = parser.parse_args()
+
+    mm, inv_assoc = load_metamodel(args.metamodel)
+    unbound_elems = [f"unbound{i}" for i in range(args.unbound)]
+
+    print(
+        f"{'model':>24} {'track':>6} {'result':>6}"
+        f" {'encode (s)':>10} {'solve (s)':>10}"
+    )
+    for mname in args.models:
+        with open(f"example_json_models/{mname}.doml") as jsonf:
+            doc = json.load(jsonf)
+        im = doml_model_to_im(parse_doml_model(doc, mm), mm)
+        reciprocate_inverse_associations(im, inv_assoc)
+        for track in [False, True]:
+            options = EncodingOptions(
+                associations=args.associations,
+                metamodel=args.metamodel_encoding,
+                track=track,
+            )
+            encode_times, solve_times = [], []
+            for _ in range(args.runs):
+                t = time.perf_counter()
+                enc = encode_doml_model(
+                    im, mm, inv_assoc, unbound_elems, options
+                )
+                encode_times.append(time.perf_counter() - t)
+                t = time.perf_counter()
+                rslt = enc.solver.check()
+                solve_times.append(time.perf_counter() - t)
+            print(
+                f"{mname:>24} {str(track):>6} {str(rslt):>6}"
+                f" {statistics.median(encode_times):>10.2f}"
+                f" {statistics.median(solve_times):>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
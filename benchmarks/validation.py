@@ -0,0 +1,75 @@
+"""
+Validation benchmark: time to decide whether the example models and
+generated ones, with no unbound elements, satisfy the metamodel with
+`validate_im` and with the solver.
+
+Run from the repository root with `python -m benchmarks.validation`.
+"""
+import argparse
+import json
+import statistics
+import time
+
+from doml_mc.intermediate_model.doml_element import (
+    reciprocate_inverse_associations,
+)
+from doml_mc.intermediate_model.doml_model2im import doml_model_to_im
+from doml_mc.intermediate_model.metamodel_snapshot import load_metamodel
+from doml_mc.intermediate_model.validation import validate_im
+from doml_mc.model.doml_model import parse_doml_model
+from doml_mc.z3.check import check_doml_model
+from doml_mc.z3.encoding import EncodingOptions
+
+from .associations import EXAMPLES
+from .generator import generate_doml_document, params_for_size
+
+SIZES = [50]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--metamodel", default="assets/doml_meta.yaml")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    mm, inv_assoc = load_metamodel(args.metamodel)
+    options = EncodingOptions(associations="sparse", metamodel="ground")
+
+    models: dict[str, dict] = {}
+    for ex in EXAMPLES:
+        with open(f"example_json_models/{ex}.doml") as jsonf:
+            models[ex] = json.load(jsonf)
+    for size in args.sizes:
+        models[f"generated_{size}"] = generate_doml_document(
+            params_for_size(size)
+        )
+
+    print(
+        f"{'model':>24} {'violations':>10} {'validate (ms)':>13}"
+        f" {'result':>6} {'solver (ms)':>11}"
+    )
+    for mname, doc in models.items():
+        im = doml_model_to_im(parse_doml_model(doc, mm), mm)
+        reciprocate_inverse_associations(im, inv_assoc)
+
+        validate_times, solver_times = [], []
+        for _ in range(args.runs):
+            t = time.perf_counter()
+            violations = validate_im(im, mm, inv_assoc)
+            validate_times.append(time.perf_counter() - t)
+            t = time.perf_counter()
+            result = check_doml_model(
+                im, mm, inv_assoc, options=options, validate=False
+            )
+            solver_times.append(time.perf_counter() - t)
+        print(
+            f"{mname:>24} {len(violations):>10}"
+            f" {statistics.median(validate_times) * 1000:>13.2f}"
+            f" {str(result.result):>6}"
+            f" {statistics.median(solver_times) * 1000:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
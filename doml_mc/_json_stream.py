@@ -0,0 +1,120 @@
+import json
+from collections.abc import Iterator
+from typing import Any, TextIO
+
+_WHITESPACE = " \t\n\r"
+
+
+class JSONStream:
+    """
+    A pull parser over a JSON text file, which is read in chunks.
+
+    Containers can be walked one entry at a time with `iter_object` and
+    `iter_array`, so that only the entry being processed is held in memory.
+    Whole values are decoded with `read_value`, which relies on the C
+    implementation of `json`. As that decoder cannot resume, a value which
+    does not fit in the buffer is decoded again from its start after each
+    read, and each read is twice as large as the previous one, so that
+    decoding a large value takes linear time.
+
+    After `iter_object` yields a key, or `iter_array` yields, the caller must
+    consume exactly one value (with `read_value`, `skip_value` or by iterating
+    over it) before resuming the iteration.
+    """
+
+    def __init__(self, f: TextIO, chunk_size: int = 1 << 16) -> None:
+        self._f = f
+        self._chunk_size = chunk_size
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self, size: int = 0) -> bool:
+        """
+        Reads `size` more characters, or a chunk if not given, returning
+        `False` at the end of the file.
+        """
+        if self._eof:
+            return False
+        chunk = self._f.read(size or self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos :] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """
+        Skips whitespace and returns the next character, or `""` at the end of
+        the file.
+        """
+        while True:
+            while self._pos < len(self._buf):
+                if self._buf[self._pos] not in _WHITESPACE:
+                    return self._buf[self._pos]
+                self._pos += 1
+            if not self._fill():
+                return ""
+
+    def _expect(self, ch: str) -> None:
+        if (found := self.peek()) != ch:
+            raise json.JSONDecodeError(
+                f"Expecting {ch!r}, found {found!r}", self._buf, self._pos
+            )
+        self._pos += 1
+
+    def read_value(self) -> Any:
+        self.peek()
+        size = self._chunk_size
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                # The value may just be truncated by the end of the buffer.
+                if self._fill(size):
+                    size *= 2
+                    continue
+                raise
+            # A number ending with the buffer may continue in the next chunk.
+            if end == len(self._buf) and self._fill(size):
+                size *= 2
+                continue
+            self._pos = end
+            return value
+
+    def skip_value(self) -> None:
+        self.read_value()
+
+    def iter_object(self) -> Iterator[str]:
+        self._expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self.read_value()
+            if type(key) is not str:
+                raise json.JSONDecodeError(
+                    "Expecting property name", self._buf, self._pos
+                )
+            self._expect(":")
+            yield key
+            if self.peek() == ",":
+                self._pos += 1
+            else:
+                self._expect("}")
+                return
+
+    def iter_array(self) -> Iterator[None]:
+        self._expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield
+            if self.peek() == ",":
+                self._pos += 1
+            else:
+                self._expect("]")
+                return
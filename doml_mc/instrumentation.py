@@ -0,0 +1,208 @@
+"""
+Instrumentation of the encoders and converters: the functions decorated with
+`instrumented` report, for each call, their wall time and, if they assert
+on a solver, the number of assertions, quantifiers and AST nodes they added,
+to the sinks installed with `add_sink` or `recording`.
+
+With no sink installed, a decorated function only costs an extra call and
+a test. Counting the assertions takes a walk over them, which shows in the
+wall time of the enclosing phases; sinks which only want the times, such as
+a `MemorySink(counts=False)`, can opt out of it, and it is skipped if they
+all do. Z3 is only imported when a solver's assertions have to be walked, so
+that the converters, which are decorated too, can still be imported without
+it.
+"""
+import json
+import logging
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from functools import wraps
+from typing import TYPE_CHECKING, Any, Optional, Protocol, TypeVar
+
+if TYPE_CHECKING:
+    from z3 import ExprRef, Solver
+
+
+@dataclass
+class PhaseRecord:
+    # The qualified name of the function, e.g.,
+    # "doml_mc.z3.im_encoding.assert_im_attributes".
+    name: str
+    # Wall time, in seconds, including that of nested phases.
+    time: float
+    # What was added to the solver the function asserted on, or what the
+    # solver of the `Encoding` it returned holds, or `None` if neither.
+    assertions: Optional[int] = None
+    quantifiers: Optional[int] = None
+    # The number of distinct AST nodes in the assertions added.
+    ast_size: Optional[int] = None
+
+
+class Sink(Protocol):
+    def record(self, rec: PhaseRecord) -> None:
+        ...
+
+
+def _wants_counts(sink: Sink) -> bool:
+    # Sinks without a `counts` attribute get them.
+    return getattr(sink, "counts", True)
+
+
+class MemorySink:
+    def __init__(self, counts: bool = True) -> None:
+        self.counts = counts
+        self.records: list[PhaseRecord] = []
+
+    def record(self, rec: PhaseRecord) -> None:
+        self.records.append(rec)
+
+    def totals(self) -> dict[str, PhaseRecord]:
+        """The records summed by function."""
+        totals: dict[str, PhaseRecord] = {}
+        for rec in self.records:
+            if (tot := totals.get(rec.name)) is None:
+                totals[rec.name] = PhaseRecord(**asdict(rec))
+                continue
+            tot.time += rec.time
+            if rec.assertions is not None:
+                tot.assertions = (tot.assertions or 0) + rec.assertions
+                tot.quantifiers = (tot.quantifiers or 0) + rec.quantifiers
+                tot.ast_size = (tot.ast_size or 0) + rec.ast_size
+        return totals
+
+
+class JSONLinesSink:
+    """Appends each record to the file at `path` as a JSON line."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def record(self, rec: PhaseRecord) -> None:
+        with open(self.path, "a") as f:
+            f.write(json.dumps(asdict(rec)) + "\n")
+
+
+class LoggingSink:
+    def __init__(
+        self,
+        logger: Optional[logging.Logger] = None,
+        level: int = logging.DEBUG,
+    ) -> None:
+        self.logger = logger or logging.getLogger(__name__)
+        self.level = level
+
+    def record(self, rec: PhaseRecord) -> None:
+        if rec.assertions is None:
+            self.logger.log(
+                self.level, "%s: %.2f ms", rec.name, rec.time * 1e3
+            )
+        else:
+            self.logger.log(
+                self.level,
+                "%s: %.2f ms, %d assertions, %d quantifiers, %d AST nodes",
+                rec.name,
+                rec.time * 1e3,
+                rec.assertions,
+                rec.quantifiers,
+                rec.ast_size,
+            )
+
+
+_sinks: list[Sink] = []
+
+
+def add_sink(sink: Sink) -> None:
+    _sinks.append(sink)
+
+
+def remove_sink(sink: Sink) -> None:
+    _sinks.remove(sink)
+
+
+@contextmanager
+def recording(sink: Sink) -> Iterator[Sink]:
+    """Installs `sink` for the duration of the block."""
+    add_sink(sink)
+    try:
+        yield sink
+    finally:
+        remove_sink(sink)
+
+
+def _quantifiers_and_size(assertions: list["ExprRef"]) -> tuple[int, int]:
+    from z3 import is_quantifier
+
+    seen: set[int] = set()
+    quantifiers = 0
+    stack = list(assertions)
+    while stack:
+        expr = stack.pop()
+        if (eid := expr.get_id()) in seen:
+            continue
+        seen.add(eid)
+        if is_quantifier(expr):
+            quantifiers += 1
+            stack.append(expr.body())
+        else:
+            stack.extend(expr.children())
+    return quantifiers, len(seen)
+
+
+def _is_solver(obj: Any) -> bool:
+    # Duck typed, so that telling whether an argument is a solver does not
+    # need Z3.
+    return hasattr(obj, "assertions") and hasattr(obj, "assert_and_track")
+
+
+def _record_added(
+    rec: PhaseRecord, solver: "Solver", n_before: int = 0
+) -> None:
+    assertions = solver.assertions()
+    added = [assertions[i] for i in range(n_before, len(assertions))]
+    rec.assertions = len(added)
+    rec.quantifiers, rec.ast_size = _quantifiers_and_size(added)
+
+
+_F = TypeVar("_F", bound=Callable)
+
+
+def instrumented(f: _F) -> _F:
+    """
+    Reports each call of `f` to the installed sinks. The solver it asserts
+    on, if any, is the first of its arguments that is a solver; if there is
+    none but `f` returns an `Encoding`, what its solver holds is reported.
+    """
+    name = f"{f.__module__}.{f.__qualname__}"
+
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        if not _sinks:
+            return f(*args, **kwargs)
+
+        if not any(_wants_counts(sink) for sink in _sinks):
+            t = time.perf_counter()
+            result = f(*args, **kwargs)
+            rec = PhaseRecord(name, time.perf_counter() - t)
+            for sink in _sinks:
+                sink.record(rec)
+            return result
+
+        solver = next(
+            (arg for arg in (*args, *kwargs.values()) if _is_solver(arg)),
+            None,
+        )
+        n_before = len(solver.assertions()) if solver is not None else 0
+        t = time.perf_counter()
+        result = f(*args, **kwargs)
+        rec = PhaseRecord(name, time.perf_counter() - t)
+        if solver is not None:
+            _record_added(rec, solver, n_before)
+        elif _is_solver(result_solver := getattr(result, "solver", None)):
+            _record_added(rec, result_solver)
+        for sink in _sinks:
+            sink.record(rec)
+        return result
+
+    return wrapper  # type: ignore
@@ -0,0 +1,63 @@
+from collections.abc import Callable, Iterable
+from typing import TypeVar
+
+from .doml_element import DOMLElement
+from .types import IntermediateModel
+
+_T = TypeVar("_T")
+
+
+class DuplicateElementName(Exception):
+    pass
+
+
+def parse_by_name(
+    docs: Iterable[dict], parse: Callable[[dict], _T]
+) -> dict[str, _T]:
+    """
+    Parses each of `docs` with `parse`, keyed by its name.
+
+    ### Raises
+    `DuplicateElementName` if two of `docs` have the same name, rather than
+    letting the last one overwrite the others.
+    """
+    parsed: dict[str, _T] = {}
+    for doc in docs:
+        if (name := doc["name"]) in parsed:
+            raise DuplicateElementName(
+                f"Two elements of the document are named {name}."
+            )
+        parsed[name] = parse(doc)
+    return parsed
+
+
+class IMBuilder:
+    """
+    Accumulates the elements of an intermediate model into a single dict, in
+    the order in which they are added.
+
+    Converters add each element once, instead of building a dict per object
+    and merging them, which would copy the elements gathered so far at every
+    merge.
+    """
+
+    __slots__ = ("im",)
+
+    def __init__(self) -> None:
+        self.im: IntermediateModel = {}
+
+    def add(self, elem: DOMLElement) -> str:
+        """
+        Adds `elem` to the model and returns its name.
+
+        ### Raises
+        `DuplicateElementName` if an element with the same name has already
+        been added.
+        """
+        if elem.name in self.im:
+            raise DuplicateElementName(
+                f"Element {elem.name} of class {elem.class_} has the same "
+                f"name as an element of class {self.im[elem.name].class_}."
+            )
+        self.im[elem.name] = elem
+        return elem.name
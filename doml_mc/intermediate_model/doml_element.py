@@ -1,22 +1,28 @@
-from typing import Union
+from collections.abc import Iterator
+from typing import TYPE_CHECKING, Union
 from dataclasses import dataclass
 
-from doml_mc.intermediate_model.types import IntermediateModel
-
+from ..instrumentation import instrumented
 from .metamodel import (
     AssociationNotFound,
     AttributeNotFound,
-    MetaModel,
+    CompiledMetaModel,
     get_mangled_attribute_name,
     get_mangled_association_name,
 )
 
+if TYPE_CHECKING:
+    # `types` imports this module to define `IntermediateModel`.
+    from .types import IntermediateModel
+
 Attributes = dict[str, Union[str, int, bool]]
 Associations = dict[str, set[str]]
 
 
 @dataclass
 class DOMLElement:
+    __slots__ = ("name", "class_", "attributes", "associations")
+
     name: str
     class_: str
     # the keys of the `attributes`/`associations` dicts are
@@ -29,7 +35,7 @@ class DOMLElement:
 def parse_attrs_and_assocs_from_doc(
     doc: dict,
     cname: str,
-    mm: MetaModel,
+    mm: CompiledMetaModel,
 ) -> tuple[Attributes, Associations]:
     attrs = {}
     assocs = {}
@@ -48,21 +54,65 @@ def parse_attrs_and_assocs_from_doc(
     return attrs, assocs
 
 
+class DanglingAssociationTarget(Exception):
+    def __init__(self, source: str, association: str, target: str) -> None:
+        super().__init__(
+            f"Association {association} of element {source} targets {target},"
+            " which is not an element of the model."
+        )
+        self.source = source
+        self.association = association
+        self.target = target
+
+
+@instrumented
 def reciprocate_inverse_associations(
-    im: IntermediateModel,
+    im: "IntermediateModel",
     invs: list[tuple[str, str]],
 ) -> None:
     """
+    Adds to `im` the pairs of the inverses of its associations, so that each
+    pair of inverse associations relates the same elements.
+
     ### Effects
     This procedure is effectful on `im`.
+
+    ### Raises
+    `DanglingAssociationTarget` if an association with an inverse targets an
+    element which is not in `im`. In that case, `im` is left unchanged.
     """
     # A dict for inverse lookup where inverse relationships are mapped both
     # ways.
     inv_dict = dict(invs) | {an2: an1 for an1, an2 in invs}
+
+    # The sources of the inverse pairs, by inverse association and target.
+    reverse: dict[str, dict[str, list[str]]] = {}
     for ename, elem in im.items():
         for aname, atgts in elem.associations.items():
-            if aname in inv_dict:
+            if (inv_aname := inv_dict.get(aname)) is not None:
+                by_tgt = reverse.setdefault(inv_aname, {})
                 for atgt in atgts:
-                    im[atgt].associations[inv_dict[aname]] = im[
-                        atgt
-                    ].associations.get(inv_dict[aname], set()) | {ename}
+                    if atgt not in im:
+                        raise DanglingAssociationTarget(ename, aname, atgt)
+                    by_tgt.setdefault(atgt, []).append(ename)
+
+    for inv_aname, by_tgt in reverse.items():
+        for atgt, srcs in by_tgt.items():
+            tgt_assocs = im[atgt].associations
+            # The sets may be shared with the `DOMLModel` the elements come
+            # from, so they are replaced rather than updated.
+            tgt_assocs[inv_aname] = tgt_assocs.get(inv_aname, set()).union(
+                srcs
+            )
+
+
+def iter_im_edges(im: "IntermediateModel") -> Iterator[tuple[str, str, str]]:
+    """
+    The pairs of all associations of `im`, as (source, association, target).
+    """
+    return (
+        (esn, amn, etn)
+        for esn, e in im.items()
+        for amn, etns in e.associations.items()
+        for etn in etns
+    )
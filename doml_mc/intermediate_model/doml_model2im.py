@@ -1,18 +1,26 @@
-from .._utils import merge_dicts
+from .._utils import gc_paused
+from ..instrumentation import instrumented
 from ..model.doml_model import DOMLModel
 
-from .types import IntermediateModel, MetaModel
-from .application2im import application_to_im
-from .infrastructure2im import infrastructure_to_im
-from .concrete2im import concretization_to_im
+from .builder import IMBuilder
+from .types import CompiledMetaModel, IntermediateModel
+from .application2im import add_application_to_im
+from .infrastructure2im import add_infrastructure_to_im
+from .concrete2im import add_concretization_to_im
 
 
-def doml_model_to_im(model: DOMLModel, mm: MetaModel) -> IntermediateModel:
-    return (
-        application_to_im(model.application)
-        | infrastructure_to_im(model.infrastructure, mm)
-        | merge_dicts(
-            concretization_to_im(conc)
-            for conc in model.concretizations.values()
-        )
-    )
+@instrumented
+def doml_model_to_im(
+    model: DOMLModel, mm: CompiledMetaModel
+) -> IntermediateModel:
+    """
+    ### Raises
+    `DuplicateElementName` if two elements of the model have the same name.
+    """
+    builder = IMBuilder()
+    with gc_paused():
+        add_application_to_im(builder, model.application)
+        add_infrastructure_to_im(builder, model.infrastructure, mm)
+        for conc in model.concretizations.values():
+            add_concretization_to_im(builder, conc)
+    return builder.im
@@ -0,0 +1,243 @@
+"""
+The elements of the intermediate model that each item of a DOML document
+maps to, built from the fields of the item. They are shared by the
+converters of `DOMLModel`s and by `doml_json_to_im`, so that the mapping
+from the document to the metamodel is written once.
+"""
+from collections.abc import Iterable
+from ipaddress import ip_address, ip_network
+
+from .builder import IMBuilder
+from .doml_element import Associations, Attributes, DOMLElement
+from .types import CompiledMetaModel
+
+# The association from each concrete class mapping an abstract element to it.
+MAPS_ASSOCIATIONS = {
+    "concrete_AutoScalingGroup": "concrete_AutoScalingGroup::maps",
+    "concrete_VirtualMachine": "concrete_VirtualMachine::maps",
+    "concrete_Storage": "concrete_Storage::maps",
+    "concrete_Network": "concrete_Network::maps",
+}
+
+
+def add_application_component(
+    builder: IMBuilder,
+    name: str,
+    type_id: str,
+    consumed_interfaces: dict[str, list[str]],
+    exposed_interfaces: dict[str, str],
+) -> None:
+    """
+    Adds an application component and the interfaces it exposes.
+
+    ### Parameters
+     - `consumed_interfaces` maps the name of each component whose interfaces
+       are consumed to the names of those interfaces;
+     - `exposed_interfaces` maps the name of each exposed interface to its
+       end point.
+
+    ### Effects
+    This procedure is effectful on `builder`.
+    """
+    builder.add(
+        DOMLElement(
+            name=name,
+            class_=type_id,
+            attributes={"commons_DOMLElement::name": name},
+            associations={
+                "application_SoftwarePackage::consumedInterfaces": {
+                    f"{cn}_{ifacen}"
+                    for cn, ifacens in consumed_interfaces.items()
+                    for ifacen in ifacens
+                },
+                "application_SoftwarePackage::exposedInterfaces": {
+                    f"{name}_{ifacen}" for ifacen in exposed_interfaces
+                },
+            },
+        )
+    )
+    for ifacen, end_point in exposed_interfaces.items():
+        elem_n = f"{name}_{ifacen}"
+        builder.add(
+            DOMLElement(
+                name=elem_n,
+                class_="application_SoftwareInterface",
+                attributes={
+                    "commons_DOMLElement::name": elem_n,
+                    "application_SoftwareInterface::endPoint": end_point,
+                },
+                associations={},
+            )
+        )
+
+
+def add_infrastructure_node(
+    builder: IMBuilder,
+    mm: CompiledMetaModel,
+    name: str,
+    type_id: str,
+    attributes: Attributes,
+    associations: Associations,
+    interfaces: Iterable[tuple[str, str, str]],
+) -> None:
+    """
+    Adds an infrastructure node and its network interfaces.
+
+    ### Parameters
+     - `attributes` and `associations` are those of the document, with
+       mangled names;
+     - `interfaces` are the name, network and end point of each interface.
+
+    ### Effects
+    This procedure is effectful on `builder`.
+    """
+    nifacereln = (
+        "infrastructure_Storage::ifaces"
+        if type_id in mm.subclasses["infrastructure_Storage"]
+        else "infrastructure_FunctionAsAService::ifaces"
+        if type_id in mm.subclasses["infrastructure_FunctionAsAService"]
+        else "infrastructure_ComputingNode::ifaces"
+    )
+    interfaces = list(interfaces)
+    builder.add(
+        DOMLElement(
+            name=name,
+            class_=type_id,
+            attributes=attributes | {"commons_DOMLElement::name": name},
+            associations=associations
+            | {nifacereln: {nifacen for nifacen, _, _ in interfaces}},
+        )
+    )
+    for nifacen, belongs_to, end_point in interfaces:
+        builder.add(
+            DOMLElement(
+                name=nifacen,
+                class_="infrastructure_NetworkInterface",
+                attributes={
+                    "commons_DOMLElement::name": nifacen,
+                    "infrastructure_NetworkInterface::endPoint": int(
+                        ip_address(end_point)
+                    ),
+                },
+                associations={
+                    "infrastructure_NetworkInterface::belongsTo": {belongs_to}
+                },
+            )
+        )
+
+
+def add_network(builder: IMBuilder, name: str, address_range: str) -> None:
+    """
+    ### Effects
+    This procedure is effectful on `builder`.
+    """
+    network = ip_network(address_range)
+    builder.add(
+        DOMLElement(
+            name=name,
+            class_="infrastructure_Network",
+            attributes={
+                "commons_DOMLElement::name": name,
+                "infrastructure_Network::address_lb": int(network[0]),
+                "infrastructure_Network::address_ub": int(network[-1]),
+            },
+            associations={},
+        )
+    )
+
+
+def add_group(builder: IMBuilder, name: str, type_id: str) -> None:
+    """
+    ### Effects
+    This procedure is effectful on `builder`.
+    """
+    builder.add(
+        DOMLElement(
+            name=name,
+            class_=type_id,
+            attributes={"commons_DOMLElement::name": name},
+            associations={},
+        )
+    )
+
+
+def add_mapping_element(
+    builder: IMBuilder, class_: str, name: str, maps: str
+) -> str:
+    """
+    Adds an element of `class_`, one of `MAPS_ASSOCIATIONS`, mapping the
+    element named `maps`, and returns its name.
+
+    ### Effects
+    This procedure is effectful on `builder`.
+    """
+    return builder.add(
+        DOMLElement(
+            name=name,
+            class_=class_,
+            attributes={"commons_DOMLElement::name": name},
+            associations={MAPS_ASSOCIATIONS[class_]: {maps}},
+        )
+    )
+
+
+def add_runtime_provider(
+    builder: IMBuilder,
+    name: str,
+    supported_groups: Iterable[str],
+    vms: Iterable[str],
+    networks: Iterable[str],
+    storages: Iterable[str],
+) -> str:
+    """
+    Adds a runtime provider and returns its name.
+
+    ### Effects
+    This procedure is effectful on `builder`.
+    """
+    return builder.add(
+        DOMLElement(
+            name=name,
+            class_="concrete_RuntimeProvider",
+            attributes={"commons_DOMLElement::name": name},
+            associations={
+                "concrete_RuntimeProvider::supportedGroups": set(
+                    supported_groups
+                ),
+                "concrete_RuntimeProvider::vms": set(vms),
+                "concrete_RuntimeProvider::networks": set(networks),
+                "concrete_RuntimeProvider::storages": set(storages),
+            },
+        )
+    )
+
+
+def add_concrete_infrastructure(
+    builder: IMBuilder,
+    name: str,
+    providers: Iterable[str],
+    nodes: Iterable[str],
+    as_groups: Iterable[str],
+    networks: Iterable[str],
+    storages: Iterable[str],
+) -> None:
+    """
+    Adds a concretization, given the names of the elements it is made of.
+
+    ### Effects
+    This procedure is effectful on `builder`.
+    """
+    builder.add(
+        DOMLElement(
+            name=name,
+            class_="concrete_ConcreteInfrastructure",
+            attributes={"commons_DOMLElement::name": name},
+            associations={
+                "concrete_ConcreteInfrastructure::providers": set(providers),
+                "concrete_ConcreteInfrastructure::nodes": set(nodes),
+                "concrete_ConcreteInfrastructure::asGroups": set(as_groups),
+                "concrete_ConcreteInfrastructure::networks": set(networks),
+                "concrete_ConcreteInfrastructure::storages": set(storages),
+            },
+        )
+    )
@@ -0,0 +1,168 @@
+from collections.abc import Callable
+import sys
+from typing import TextIO
+
+from .._json_stream import JSONStream
+from .._utils import gc_paused
+from ..instrumentation import instrumented
+
+from .builder import IMBuilder, parse_by_name
+from .doml_element import parse_attrs_and_assocs_from_doc
+from .elements import (
+    add_application_component,
+    add_concrete_infrastructure,
+    add_group,
+    add_infrastructure_node,
+    add_mapping_element,
+    add_network,
+    add_runtime_provider,
+)
+from .types import CompiledMetaModel, IntermediateModel
+
+
+def _require(seen: set[str], *keys: str) -> None:
+    # Mirrors the `KeyError`s that `parse_doml_model` raises on missing keys.
+    for key in keys:
+        if key not in seen:
+            raise KeyError(key)
+
+
+@instrumented
+def doml_json_to_im(f: TextIO, mm: CompiledMetaModel) -> IntermediateModel:
+    """
+    Builds the intermediate model of the DOML document in `f` while reading
+    it, without ever holding the whole JSON document or the `DOMLModel` tree
+    in memory. The result is the same as that of `doml_model_to_im` applied
+    to `parse_doml_model(json.load(f), mm)`.
+
+    Only one application component, infrastructure node, network, group or
+    concretization item is decoded at a time, and turned into elements by
+    the same functions of `elements` as in `doml_model_to_im`. Unlike
+    `parse_doml_model`, fields which do not end up in the intermediate model
+    are not validated.
+    """
+    stream = JSONStream(f)
+    builder = IMBuilder()
+
+    def application_component(doc: dict) -> None:
+        add_application_component(
+            builder,
+            doc["name"],
+            sys.intern(doc["typeId"]),
+            {
+                k[len("consumedInterfaces->") :]: ifacens
+                for k, ifacens in doc.items()
+                if k.startswith("consumedInterfaces->")
+            },
+            parse_by_name(
+                doc.get("exposedInterfaces", []),
+                lambda iface_doc: iface_doc["endPoint"],
+            ),
+        )
+
+    def infrastructure_node(doc: dict) -> None:
+        type_id = sys.intern(doc["typeId"])
+        attrs, assocs = parse_attrs_and_assocs_from_doc(doc, type_id, mm)
+        ifaces = parse_by_name(doc.get("interfaces", []), lambda d: d)
+        add_infrastructure_node(
+            builder,
+            mm,
+            doc["name"],
+            type_id,
+            attrs,
+            assocs,
+            (
+                (nifacen, niface_doc["belongsTo"], niface_doc["endPoint"])
+                for nifacen, niface_doc in ifaces.items()
+            ),
+        )
+
+    def infrastructure_network(doc: dict) -> None:
+        add_network(builder, doc["name"], doc["addressRange"])
+
+    def infrastructure_group(doc: dict) -> None:
+        add_group(builder, doc["name"], sys.intern(doc["typeId"]))
+
+    def mapping_elem(class_: str) -> Callable[[dict], str]:
+        return lambda doc: add_mapping_element(
+            builder, class_, doc["name"], doc["maps"]
+        )
+
+    def provider(doc: dict) -> str:
+        return add_runtime_provider(
+            builder,
+            doc["name"],
+            doc.get("supportedGroups", []),
+            doc["providedVMs"],
+            doc["providedNetworks"],
+            doc.get("storages", []),
+        )
+
+    # Handlers of the items of a concretization, by key, with the keyword of
+    # `add_concrete_infrastructure` they are gathered under.
+    conc_items: dict[str, tuple[str, Callable[[dict], str]]] = {
+        "asGroups": ("as_groups", mapping_elem("concrete_AutoScalingGroup")),
+        "vms": ("nodes", mapping_elem("concrete_VirtualMachine")),
+        "storages": ("storages", mapping_elem("concrete_Storage")),
+        "networks": ("networks", mapping_elem("concrete_Network")),
+        "providers": ("providers", provider),
+    }
+
+    def concretization() -> None:
+        name = None
+        members: dict[str, list[str]] = {
+            kw: [] for kw, _ in conc_items.values()
+        }
+        seen = set()
+        for key in stream.iter_object():
+            seen.add(key)
+            if key in conc_items:
+                kw, handle = conc_items[key]
+                for _ in stream.iter_array():
+                    members[kw].append(handle(stream.read_value()))
+            elif key == "name":
+                name = stream.read_value()
+            else:
+                stream.skip_value()
+        _require(seen, "name", "vms", "providers", "networks")
+        # The name may come after the items, so the concretization is added
+        # last.
+        add_concrete_infrastructure(builder, name, **members)
+
+    def read_items(handle) -> None:
+        for _ in stream.iter_array():
+            handle(stream.read_value())
+
+    with gc_paused():
+        seen = set()
+        for key in stream.iter_object():
+            seen.add(key)
+            if key == "application":
+                app_seen = set()
+                for akey in stream.iter_object():
+                    app_seen.add(akey)
+                    if akey == "children":
+                        read_items(application_component)
+                    else:
+                        stream.skip_value()
+                _require(app_seen, "children")
+            elif key == "infrastructure":
+                infra_seen = set()
+                for ikey in stream.iter_object():
+                    infra_seen.add(ikey)
+                    if ikey == "nodes":
+                        read_items(infrastructure_node)
+                    elif ikey == "networks":
+                        read_items(infrastructure_network)
+                    elif ikey == "groups":
+                        read_items(infrastructure_group)
+                    else:
+                        stream.skip_value()
+                _require(infra_seen, "nodes", "networks")
+            elif key == "concretizations":
+                for _ in stream.iter_array():
+                    concretization()
+            else:
+                stream.skip_value()
+        _require(seen, "application", "infrastructure", "concretizations")
+    return builder.im
@@ -1,10 +1,13 @@
 from dataclasses import dataclass
-from typing import cast, Literal, Optional, Union
-
-import networkx as nx
+import hashlib
+import sys
+from typing import cast, Literal, Optional, TYPE_CHECKING, Union
 
 from .._utils import merge_dicts
 
+if TYPE_CHECKING:
+    import networkx as nx
+
 Multiplicity = tuple[Literal["0", "1"], Literal["1", "*"]]
 
 
@@ -42,7 +45,7 @@ class DOMLAssociation:
 MetaModel = dict[str, DOMLClass]
 
 
-def parse_metamodel(mmdoc: dict) -> MetaModel:
+def parse_metamodel(mmdoc: dict) -> "CompiledMetaModel":
     def parse_class(cname: str, cdoc: dict) -> DOMLClass:
         def parse_mult(
             mults: Literal["0..1", "0..*", "1", "1..*"]
@@ -114,13 +117,15 @@ def parse_metamodel(mmdoc: dict) -> MetaModel:
         "concrete",
     }
 
-    return merge_dicts(
-        {
-            prefixed_name: parse_class(prefixed_name, cdoc)
-            for cname, cdoc in csdoc.items()
-            for prefixed_name in [f"{prefix}_{cname}"]
-        }
-        for prefix, csdoc in mmdoc.items()
+    return compile_metamodel(
+        merge_dicts(
+            {
+                prefixed_name: parse_class(prefixed_name, cdoc)
+                for cname, cdoc in csdoc.items()
+                for prefixed_name in [f"{prefix}_{cname}"]
+            }
+            for prefix, csdoc in mmdoc.items()
+        )
     )
 
 
@@ -156,6 +161,15 @@ def get_mangled_association_name(
     cname: str,
     aname: str,
 ) -> str:
+    if isinstance(mm, CompiledMetaModel):
+        try:
+            return mm.mangled_associations[cname][aname]
+        except KeyError:
+            if cname not in mm:
+                raise
+            raise AssociationNotFound(
+                f"Association {aname} not found in subclasses of {cname}."
+            )
     return f"{_find_association_class(mm, cname, aname).name}::{aname}"
 
 
@@ -163,6 +177,8 @@ def get_mangled_attribute_defaults(
     mm: MetaModel,
     cname: str,
 ) -> dict[str, Union[str, int, bool]]:
+    if isinstance(mm, CompiledMetaModel):
+        return mm.attribute_defaults[cname]
     c = mm[cname]
     defaults = {
         f"{cname}::{aname}": a.default
@@ -196,10 +212,23 @@ def get_mangled_attribute_name(
     cname: str,
     aname: str,
 ) -> str:
+    if isinstance(mm, CompiledMetaModel):
+        try:
+            return mm.mangled_attributes[cname][aname]
+        except KeyError:
+            if cname not in mm:
+                raise
+            raise AttributeNotFound(
+                f"Attribute {aname} not found in subclasses of {cname}."
+            )
     return f"{_find_attribute_class(mm, cname, aname).name}::{aname}"
 
 
-def get_subclasses_dict(mm: MetaModel) -> dict[str, set[str]]:
+def _inheritance_closure(mm: MetaModel) -> "nx.DiGraph":
+    # networkx is slow to import, and only needed for metamodels which have
+    # not been compiled, so it is imported on first use.
+    import networkx as nx
+
     inherits_dg = nx.DiGraph(
         [
             (c.name, c.superclass)
@@ -208,22 +237,158 @@ def get_subclasses_dict(mm: MetaModel) -> dict[str, set[str]]:
         ]
     )
     inherits_dg.add_nodes_from(mm)
-    inherits_dg_trans = cast(
-        nx.DiGraph, nx.transitive_closure(inherits_dg, reflexive=True)
-    )
+    return cast(nx.DiGraph, nx.transitive_closure(inherits_dg, reflexive=True))
+
+
+def get_subclasses_dict(mm: MetaModel) -> dict[str, set[str]]:
+    if isinstance(mm, CompiledMetaModel):
+        return mm.subclasses
+    inherits_dg_trans = _inheritance_closure(mm)
     return {cname: set(inherits_dg_trans.predecessors(cname)) for cname in mm}
 
 
 def get_superclasses_dict(mm: MetaModel) -> dict[str, set[str]]:
-    inherits_dg = nx.DiGraph(
-        [
-            (c.name, c.superclass)
-            for c in mm.values()
-            if c.superclass is not None
-        ]
-    )
-    inherits_dg.add_nodes_from(mm)
-    inherits_dg_trans = cast(
-        nx.DiGraph, nx.transitive_closure(inherits_dg, reflexive=True)
-    )
+    if isinstance(mm, CompiledMetaModel):
+        return mm.superclasses
+    inherits_dg_trans = _inheritance_closure(mm)
     return {cname: set(inherits_dg_trans.successors(cname)) for cname in mm}
+
+
+class CompiledMetaModel(dict[str, DOMLClass]):
+    """
+    A `MetaModel` bundled with lookup tables that are computed once, so that
+    subclass queries, attribute defaults and mangled name resolution need
+    neither a transitive closure nor a walk up the inheritance chain.
+
+    Being a `MetaModel` itself, it can be passed wherever one is expected, and
+    the functions of this module use its tables when given one. Build it with
+    `compile_metamodel`. The tables are shared with whoever queries them, so
+    neither they nor the classes they were computed from must be mutated.
+
+    Class names and mangled names are interned with `sys.intern`, and every
+    table refers to the same string objects, so that elements built from
+    these tables share their keys instead of holding copies of them.
+
+    ### Tables
+     - `class_names` lists the classes in order, and `class_index` maps each
+       class name to its position in `class_names`;
+     - `subclass_bits[i]` has bit `j` set iff `class_names[j]` is a subclass of
+       `class_names[i]`, and `superclass_bits` is its transpose. Both are
+       reflexive;
+     - `subclasses`/`superclasses` are the same relations as sets of names, as
+       returned by `get_subclasses_dict`/`get_superclasses_dict`;
+     - `attribute_defaults` maps each class to the defaults of all of its
+       attributes, inherited ones included, keyed by mangled name;
+     - `mangled_attributes`/`mangled_associations` map each class to a dict
+       from the plain names of its attributes/associations, inherited ones
+       included, to their mangled names;
+     - `digest` is a SHA-256 digest of the classes, which identifies the
+       metamodel in caches.
+    """
+
+    class_names: list[str]
+    class_index: dict[str, int]
+    subclass_bits: list[int]
+    superclass_bits: list[int]
+    subclasses: dict[str, set[str]]
+    superclasses: dict[str, set[str]]
+    attribute_defaults: dict[str, dict[str, Union[str, int, bool]]]
+    mangled_attributes: dict[str, dict[str, str]]
+    mangled_associations: dict[str, dict[str, str]]
+    digest: str
+
+    def __init__(self, mm: MetaModel) -> None:
+        super().__init__((sys.intern(cname), c) for cname, c in mm.items())
+        self.class_names = list(self)
+        self.class_index = {cname: i for i, cname in enumerate(self)}
+
+        # Inheritance chains, from each class up to its root. A superclass
+        # which is not part of the metamodel ends the chain, but is kept in
+        # the `superclasses` sets like `get_superclasses_dict` does.
+        chains: dict[str, list[str]] = {}
+        for cname in self:
+            chain = [cname]
+            while (scname := self[chain[-1]].superclass) is not None:
+                chain.append(sys.intern(scname))
+                if scname not in self:
+                    break
+            chains[cname] = chain
+
+        self.subclass_bits = [0] * len(self)
+        self.superclass_bits = [0] * len(self)
+        for i, cname in enumerate(self):
+            for scname in chains[cname]:
+                if (j := self.class_index.get(scname)) is not None:
+                    self.superclass_bits[i] |= 1 << j
+                    self.subclass_bits[j] |= 1 << i
+        self.subclasses = {
+            cname: self._names_of(self.subclass_bits[i])
+            for i, cname in enumerate(self)
+        }
+        self.superclasses = {cname: set(chains[cname]) for cname in self}
+
+        declared_attrs = {
+            cname: {
+                aname: sys.intern(f"{cname}::{aname}")
+                for aname in c.attributes
+            }
+            for cname, c in self.items()
+        }
+        declared_assocs = {
+            cname: {
+                aname: sys.intern(f"{cname}::{aname}")
+                for aname in c.associations
+            }
+            for cname, c in self.items()
+        }
+        self.attribute_defaults = {}
+        self.mangled_attributes = {}
+        self.mangled_associations = {}
+        for cname in self:
+            # Walking the chain from the root down lets the nearest
+            # declaration of a name win, as in `_find_attribute_class`.
+            root_first = [sc for sc in reversed(chains[cname]) if sc in self]
+            defaults: dict[str, Union[str, int, bool]] = {}
+            attrs: dict[str, str] = {}
+            assocs: dict[str, str] = {}
+            for scname in root_first:
+                sc = self[scname]
+                defaults.update(
+                    (declared_attrs[scname][aname], a.default)
+                    for aname, a in sc.attributes.items()
+                    if a.default is not None
+                )
+                attrs.update(declared_attrs[scname])
+                assocs.update(declared_assocs[scname])
+            self.attribute_defaults[cname] = defaults
+            self.mangled_attributes[cname] = attrs
+            self.mangled_associations[cname] = assocs
+
+        self.digest = hashlib.sha256(
+            repr(list(self.items())).encode()
+        ).hexdigest()
+
+    def _names_of(self, bits: int) -> set[str]:
+        names = set()
+        i = 0
+        while bits:
+            if bits & 1:
+                names.add(self.class_names[i])
+            bits >>= 1
+            i += 1
+        return names
+
+    def is_subclass(self, cname: str, scname: str) -> bool:
+        """Whether `cname` is (reflexively) a subclass of `scname`."""
+        return bool(
+            self.superclass_bits[self.class_index[cname]]
+            >> self.class_index[scname]
+            & 1
+        )
+
+
+def compile_metamodel(mm: MetaModel) -> CompiledMetaModel:
+    """Returns `mm` itself if it is already compiled."""
+    if isinstance(mm, CompiledMetaModel):
+        return mm
+    return CompiledMetaModel(mm)
@@ -0,0 +1,82 @@
+from collections.abc import Iterable
+
+from .metamodel import CompiledMetaModel, MetaModel, compile_metamodel
+from .types import IntermediateModel
+
+
+def slice_metamodel(
+    mm: MetaModel,
+    im: IntermediateModel,
+    inv_assoc: list[tuple[str, str]],
+    classes: Iterable[str] = (),
+    attributes: Iterable[str] = (),
+    associations: Iterable[str] = (),
+) -> tuple[CompiledMetaModel, list[tuple[str, str]]]:
+    """
+    Computes the part of `mm` that a check of `im` can involve, so that only
+    that part needs to be encoded.
+
+    The slice starts from the classes of the elements of `im` and from the
+    classes, attributes and associations mentioned by the requirements, and is
+    closed under
+     - superclasses, so that inherited attributes and associations are kept;
+     - the target classes of the associations of its classes, together with
+       all of their subclasses, since unbound elements may be synthesized as
+       targets of any of them;
+     - inverse associations.
+
+    Requirements must mention, through `classes`, `attributes` and
+    `associations`, everything they refer to, including the classes of the
+    elements they range over. Under that condition the slice is satisfiable
+    iff the whole metamodel is: an unbound element whose class falls outside
+    of the slice can be given its nearest superclass in the slice instead,
+    since no association of the slice can reach it.
+
+    ### Parameters
+     - `attributes` and `associations` are mangled names, e.g.,
+       `"infrastructure_ComputingNode::ifaces"`. Elements bearing them must
+       belong to a subclass of the declaring class, so all subclasses of the
+       declaring class are kept too.
+
+    ### Returns
+    The sliced metamodel, whose classes are those of `mm` in the same order,
+    and the inverse associations between its associations.
+    """
+    mm = compile_metamodel(mm)
+    inv_dict = dict(inv_assoc) | {an2: an1 for an1, an2 in inv_assoc}
+
+    def declaring_class(mangled_name: str) -> str:
+        return mangled_name.split("::", 1)[0]
+
+    seeds = {e.class_ for e in im.values()} | set(classes)
+    for mangled_name in attributes:
+        seeds |= mm.subclasses[declaring_class(mangled_name)]
+    for mangled_name in associations:
+        cname = declaring_class(mangled_name)
+        seeds |= mm.subclasses[cname]
+        aname = mangled_name.split("::", 1)[1]
+        seeds |= mm.subclasses[mm[cname].associations[aname].class_]
+
+    in_slice: set[str] = set()
+    worklist = list(seeds)
+    while worklist:
+        cname = worklist.pop()
+        if cname in in_slice or cname not in mm:
+            continue
+        in_slice.add(cname)
+        worklist.extend(mm.superclasses[cname])
+        for aname, mm_assoc in mm[cname].associations.items():
+            worklist.extend(mm.subclasses[mm_assoc.class_])
+            if (inv_name := inv_dict.get(f"{cname}::{aname}")) is not None:
+                worklist.extend(mm.subclasses[declaring_class(inv_name)])
+
+    mm_slice = compile_metamodel(
+        {cname: c for cname, c in mm.items() if cname in in_slice}
+    )
+    inv_slice = [
+        (an1, an2)
+        for an1, an2 in inv_assoc
+        if declaring_class(an1) in in_slice
+        and declaring_class(an2) in in_slice
+    ]
+    return mm_slice, inv_slice
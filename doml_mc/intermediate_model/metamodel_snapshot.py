@@ -0,0 +1,117 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from typing import Optional
+
+from .metamodel import (
+    CompiledMetaModel,
+    parse_inverse_associations,
+    parse_metamodel,
+)
+
+# Bump whenever the pickled structures (`DOMLClass`, `DOMLAttribute`,
+# `DOMLAssociation`, `CompiledMetaModel`) change shape, so that stale
+# snapshots are ignored instead of being unpickled into the wrong layout.
+SNAPSHOT_VERSION = 2
+
+InverseAssociations = list[tuple[str, str]]
+
+
+def default_cache_dir() -> str:
+    if (cache_dir := os.environ.get("DOML_MC_CACHE_DIR")) is not None:
+        return cache_dir
+    xdg_cache = os.environ.get(
+        "XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")
+    )
+    return os.path.join(xdg_cache, "doml_mc")
+
+
+def metamodel_digest(mmdoc_bytes: bytes) -> str:
+    return hashlib.sha256(mmdoc_bytes).hexdigest()
+
+
+def parse_metamodel_bytes(
+    mmdoc_bytes: bytes,
+) -> tuple[CompiledMetaModel, InverseAssociations]:
+    # Only needed on a snapshot miss.
+    import yaml
+
+    # The C loader is an order of magnitude faster than the pure Python one,
+    # and builds the same document.
+    loader = getattr(yaml, "CLoader", yaml.Loader)
+    mmdoc = yaml.load(mmdoc_bytes, loader)
+    return (
+        parse_metamodel(mmdoc),
+        parse_inverse_associations(mmdoc),
+    )
+
+
+def load_metamodel(
+    path: str,
+    cache_dir: Optional[str] = None,
+) -> tuple[CompiledMetaModel, InverseAssociations]:
+    """
+    Loads the metamodel at `path` together with its inverse associations,
+    going through a binary snapshot keyed by the hash of the YAML document.
+
+    On a miss, i.e., when there is no snapshot for this version of the document
+    or it cannot be read, the YAML document is parsed and a snapshot is
+    written for the next caller. Failing to write it is not an error.
+
+    ### Parameters
+     - `path` is the path of the metamodel YAML document;
+     - `cache_dir` is where snapshots are kept. It defaults to
+       `$DOML_MC_CACHE_DIR`, or to `doml_mc` in the user cache directory.
+       Snapshots are pickles, so it must only be writable by trusted users.
+    """
+    with open(path, "rb") as mmf:
+        mmdoc_bytes = mmf.read()
+    digest = metamodel_digest(mmdoc_bytes)
+    snapshot_path = os.path.join(
+        cache_dir if cache_dir is not None else default_cache_dir(),
+        f"metamodel-{digest}.v{SNAPSHOT_VERSION}.pickle",
+    )
+
+    try:
+        with open(snapshot_path, "rb") as snapf:
+            version, snap_digest, mm, inv_assoc = pickle.load(snapf)
+        if (
+            version == SNAPSHOT_VERSION
+            and snap_digest == digest
+            and isinstance(mm, CompiledMetaModel)
+        ):
+            return mm, inv_assoc
+    except (
+        OSError,
+        EOFError,
+        AttributeError,
+        ImportError,
+        TypeError,
+        ValueError,
+        pickle.UnpicklingError,
+    ):
+        # An unreadable snapshot is just a miss.
+        pass
+
+    mm, inv_assoc = parse_metamodel_bytes(mmdoc_bytes)
+    _write_snapshot(snapshot_path, (SNAPSHOT_VERSION, digest, mm, inv_assoc))
+    return mm, inv_assoc
+
+
+def _write_snapshot(snapshot_path: str, payload: tuple) -> None:
+    snapshot_dir = os.path.dirname(snapshot_path)
+    try:
+        os.makedirs(snapshot_dir, exist_ok=True)
+        # Write then rename, so that concurrent processes never read a
+        # partially written snapshot.
+        fd, tmp_path = tempfile.mkstemp(dir=snapshot_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmpf:
+                pickle.dump(payload, tmpf, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, snapshot_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError:
+        pass
@@ -1,4 +1,4 @@
-from .metamodel import MetaModel  # noqa: F401
+from .metamodel import CompiledMetaModel, MetaModel  # noqa: F401
 from . import doml_element as de  # noqa: F401
 
 IntermediateModel = dict[str, "de.DOMLElement"]
@@ -0,0 +1,228 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from .metamodel import (
+    DOMLAssociation,
+    CompiledMetaModel,
+    DOMLAttribute,
+    get_mangled_attribute_defaults,
+)
+from .types import IntermediateModel
+
+
+@dataclass
+class Violation:
+    # The kind of metamodel constraint violated, named as in the labels of
+    # the Z3 encoding, e.g., "association_mult_lb".
+    constraint: str
+    # The mangled name of the attribute or association the constraint is
+    # about, or the pair of inverse associations for "association_inverse",
+    # or the class for "elem_class".
+    feature: str
+    element: str
+    message: str
+
+    @property
+    def label(self) -> str:
+        """The label of the constraint in a tracked Z3 encoding."""
+        return f"{self.constraint} {self.feature}"
+
+
+_TYPE_CHECKS = {
+    "Boolean": lambda v: type(v) is bool,
+    "Integer": lambda v: type(v) is int,
+    "String": lambda v: type(v) is str,
+    "GeneratorKind": lambda v: v in ("IMAGE", "SCRIPT"),
+}
+
+
+def validate_im(
+    im: IntermediateModel,
+    mm: CompiledMetaModel,
+    inv_assoc: list[tuple[str, str]],
+) -> list[Violation]:
+    """
+    Checks `im` against the constraints that `metamodel_encoding` states on
+    the attributes and associations of the elements, i.e., their
+    multiplicities, the classes of their sources and targets, the data types
+    of attribute values and inverse associations, with a scan of `im` linear
+    in its size.
+
+    A model with no unbound elements satisfies the metamodel encoding iff no
+    violation is found. An element whose class is not in `mm` is reported as
+    violating "elem_class", and not checked further.
+
+    `im` must have gone through `reciprocate_inverse_associations`.
+    """
+    violations: list[Violation] = []
+
+    def find_attribute(amn: str) -> Optional[tuple[str, DOMLAttribute]]:
+        cname, _, aname = amn.partition("::")
+        if (c := mm.get(cname)) is None or aname not in c.attributes:
+            return None
+        return cname, c.attributes[aname]
+
+    def find_association(
+        amn: str,
+    ) -> Optional[tuple[str, DOMLAssociation]]:
+        cname, _, aname = amn.partition("::")
+        if (c := mm.get(cname)) is None or aname not in c.associations:
+            return None
+        return cname, c.associations[aname]
+
+    # Mangled names of the attributes and associations with a lower bound of
+    # 1, by class.
+    required: dict[str, tuple[list[str], list[str]]] = {}
+
+    def required_features(cname: str) -> tuple[list[str], list[str]]:
+        if (req := required.get(cname)) is None:
+            req = required[cname] = (
+                [
+                    amn
+                    for amn in mm.mangled_attributes[cname].values()
+                    if (attr := find_attribute(amn)) is not None
+                    and attr[1].multiplicity[0] == "1"
+                ],
+                [
+                    amn
+                    for amn in mm.mangled_associations[cname].values()
+                    if (assoc := find_association(amn)) is not None
+                    and assoc[1].multiplicity[0] == "1"
+                ],
+            )
+        return req
+
+    # The inverses of each association, with the pair they belong to.
+    inverses: dict[str, list[tuple[str, str]]] = {}
+    for an1, an2 in inv_assoc:
+        inverses.setdefault(an1, []).append((an2, f"{an1} {an2}"))
+        inverses.setdefault(an2, []).append((an1, f"{an1} {an2}"))
+
+    for ename, e in im.items():
+        if e.class_ not in mm:
+            violations.append(
+                Violation(
+                    "elem_class",
+                    e.class_,
+                    ename,
+                    f"Element {ename} is of class {e.class_}, which is not"
+                    " in the metamodel.",
+                )
+            )
+            continue
+        req_attrs, req_assocs = required_features(e.class_)
+
+        attrs = get_mangled_attribute_defaults(mm, e.class_) | e.attributes
+        for amn, avalue in attrs.items():
+            attr = find_attribute(amn)
+            if attr is None or not mm.is_subclass(e.class_, attr[0]):
+                violations.append(
+                    Violation(
+                        "attribute_st_types",
+                        amn,
+                        ename,
+                        f"Element {ename} of class {e.class_} has attribute"
+                        f" {amn}, which its class does not have.",
+                    )
+                )
+            elif not _TYPE_CHECKS[attr[1].type](avalue):
+                violations.append(
+                    Violation(
+                        "attribute_st_types",
+                        amn,
+                        ename,
+                        f"Attribute {amn} of element {ename} is {avalue!r},"
+                        f" which is not of type {attr[1].type}.",
+                    )
+                )
+        for amn in req_attrs:
+            if amn not in attrs:
+                violations.append(
+                    Violation(
+                        "attribute_mult_lb",
+                        amn,
+                        ename,
+                        f"Element {ename} of class {e.class_} lacks attribute"
+                        f" {amn}, which is required.",
+                    )
+                )
+
+        for amn, etns in e.associations.items():
+            if not etns:
+                continue
+            assoc = find_association(amn)
+            if assoc is None or not mm.is_subclass(e.class_, assoc[0]):
+                violations.append(
+                    Violation(
+                        "association_st_classes",
+                        amn,
+                        ename,
+                        f"Element {ename} of class {e.class_} has association"
+                        f" {amn}, which its class does not have.",
+                    )
+                )
+                continue
+            tcname = assoc[1].class_
+            for etn in etns:
+                if (et := im.get(etn)) is None:
+                    violations.append(
+                        Violation(
+                            "association_st_classes",
+                            amn,
+                            ename,
+                            f"Association {amn} of element {ename} targets"
+                            f" {etn}, which is not an element of the model.",
+                        )
+                    )
+                elif et.class_ not in mm or not mm.is_subclass(
+                    et.class_, tcname
+                ):
+                    violations.append(
+                        Violation(
+                            "association_st_classes",
+                            amn,
+                            ename,
+                            f"Association {amn} of element {ename} targets"
+                            f" {etn} of class {et.class_}, which is not a"
+                            f" subclass of {tcname}.",
+                        )
+                    )
+            for inv_amn, pair in inverses.get(amn, []):
+                for etn in etns:
+                    et = im.get(etn)
+                    if et is not None and ename not in et.associations.get(
+                        inv_amn, ()
+                    ):
+                        violations.append(
+                            Violation(
+                                "association_inverse",
+                                pair,
+                                ename,
+                                f"Element {ename} is associated to {etn} by"
+                                f" {amn}, but not the other way around by"
+                                f" {inv_amn}.",
+                            )
+                        )
+            if assoc[1].multiplicity[1] == "1" and len(etns) > 1:
+                violations.append(
+                    Violation(
+                        "association_mult_ub",
+                        amn,
+                        ename,
+                        f"Association {amn} of element {ename} has"
+                        f" {len(etns)} targets, but at most one is allowed.",
+                    )
+                )
+        for amn in req_assocs:
+            if not e.associations.get(amn):
+                violations.append(
+                    Violation(
+                        "association_mult_lb",
+                        amn,
+                        ename,
+                        f"Element {ename} of class {e.class_} lacks a target"
+                        f" for association {amn}, which is required.",
+                    )
+                )
+
+    return violations
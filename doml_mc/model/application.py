@@ -1,14 +1,21 @@
 from dataclasses import dataclass
+import sys
+
+from ..intermediate_model.builder import parse_by_name
 
 
 @dataclass
 class Application:
+    __slots__ = ("name", "children")
+
     name: str
     children: dict[str, "ApplicationComponent"]
 
 
 @dataclass
 class ApplicationComponent:
+    __slots__ = ("typeId", "name", "consumedInterfaces", "exposedInterfaces")
+
     typeId: str
     name: str
     consumedInterfaces: dict[str, list[str]]
@@ -17,6 +24,8 @@ class ApplicationComponent:
 
 @dataclass
 class ApplicationInterface:
+    __slots__ = ("name", "componentName", "typeId", "endPoint")
+
     name: str
     componentName: str
     typeId: str
@@ -34,30 +43,27 @@ def parse_application(doc: dict) -> Application:
             return ApplicationInterface(
                 name=doc["name"],
                 componentName=componentName,
-                typeId=doc["typeId"],
+                typeId=sys.intern(doc["typeId"]),
                 endPoint=doc["endPoint"],
             )
 
         return ApplicationComponent(
             name=doc["name"],
-            typeId=doc["typeId"],
+            typeId=sys.intern(doc["typeId"]),
             consumedInterfaces={
                 remove_prefix(k, "consumedInterfaces->"): d
                 for k, d in doc.items()
                 if k.startswith("consumedInterfaces->")
             },
-            exposedInterfaces={
-                intdoc["name"]: parse_application_interface(
+            exposedInterfaces=parse_by_name(
+                doc.get("exposedInterfaces", []),
+                lambda intdoc: parse_application_interface(
                     intdoc, doc["name"]
-                )
-                for intdoc in doc.get("exposedInterfaces", [])
-            },
+                ),
+            ),
         )
 
     return Application(
         name=doc["name"],
-        children={
-            compdoc["name"]: parse_application_component(compdoc)
-            for compdoc in doc["children"]
-        },
+        children=parse_by_name(doc["children"], parse_application_component),
     )
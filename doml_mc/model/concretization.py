@@ -1,8 +1,12 @@
 from dataclasses import dataclass
 
+from ..intermediate_model.builder import parse_by_name
+
 
 @dataclass
 class Concretization:
+    __slots__ = ("name", "groups", "vms", "providers", "storages", "networks")
+
     name: str
     groups: dict[str, "Group"]
     vms: dict[str, "VirtualMachine"]
@@ -13,18 +17,31 @@ class Concretization:
 
 @dataclass
 class Group:
+    __slots__ = ("name", "maps")
+
     name: str
     maps: str
 
 
 @dataclass
 class VirtualMachine:
+    __slots__ = ("name", "maps")
+
     name: str
     maps: str
 
 
 @dataclass
 class Provider:
+    __slots__ = (
+        "name",
+        "supportedGroups",
+        "providedVMs",
+        "storages",
+        "providedNetworks",
+        "description",
+    )
+
     name: str
     supportedGroups: list[str]
     providedVMs: list[str]
@@ -35,12 +52,16 @@ class Provider:
 
 @dataclass
 class Storage:
+    __slots__ = ("name", "maps")
+
     name: str
     maps: str
 
 
 @dataclass
 class Network:
+    __slots__ = ("name", "maps")
+
     name: str
     maps: str
 
@@ -82,21 +103,9 @@ def parse_concretization(doc: dict) -> Concretization:
 
     return Concretization(
         name=doc["name"],
-        groups={
-            gdoc["name"]: parse_group(gdoc) for gdoc in doc.get("asGroups", [])
-        },
-        vms={
-            vmdooc["name"]: parse_virtual_machine(vmdooc)
-            for vmdooc in doc["vms"]
-        },
-        providers={
-            pdoc["name"]: parse_provider(pdoc) for pdoc in doc["providers"]
-        },
-        storages={
-            sdoc["name"]: parse_storage(sdoc)
-            for sdoc in doc.get("storages", [])
-        },
-        networks={
-            ndoc["name"]: parse_network(ndoc) for ndoc in doc["networks"]
-        },
+        groups=parse_by_name(doc.get("asGroups", []), parse_group),
+        vms=parse_by_name(doc["vms"], parse_virtual_machine),
+        providers=parse_by_name(doc["providers"], parse_provider),
+        storages=parse_by_name(doc.get("storages", []), parse_storage),
+        networks=parse_by_name(doc["networks"], parse_network),
     )
@@ -1,7 +1,9 @@
 from dataclasses import dataclass
 from typing import Optional
 
-from ..intermediate_model.metamodel import MetaModel
+from ..instrumentation import instrumented
+from ..intermediate_model.builder import parse_by_name
+from ..intermediate_model.metamodel import CompiledMetaModel
 
 from .application import Application, parse_application
 from .infrastructure import Infrastructure, parse_infrastructure
@@ -11,6 +13,17 @@ from .concretization import Concretization, parse_concretization
 
 @dataclass
 class DOMLModel:
+    __slots__ = (
+        "name",
+        "modelname",
+        "id",
+        "version",
+        "application",
+        "infrastructure",
+        "optimization",
+        "concretizations",
+    )
+
     name: str
     modelname: str
     id: str
@@ -21,7 +34,13 @@ class DOMLModel:
     concretizations: dict[str, Concretization]
 
 
-def parse_doml_model(doc: dict, mm: MetaModel) -> DOMLModel:
+@instrumented
+def parse_doml_model(doc: dict, mm: CompiledMetaModel) -> DOMLModel:
+    """
+    ### Raises
+    `DuplicateElementName` if two elements of the same kind have the same
+    name; other duplicates are found by `doml_model_to_im`.
+    """
     return DOMLModel(
         name=doc["name"],
         modelname=doc["modelname"],
@@ -32,8 +51,7 @@ def parse_doml_model(doc: dict, mm: MetaModel) -> DOMLModel:
         optimization=parse_optimization(doc["optimization"])
         if "optimization" in doc
         else None,
-        concretizations={
-            concdoc["name"]: parse_concretization(concdoc)
-            for concdoc in doc["concretizations"]
-        },
+        concretizations=parse_by_name(
+            doc["concretizations"], parse_concretization
+        ),
     )
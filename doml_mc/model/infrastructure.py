@@ -1,11 +1,13 @@
 from dataclasses import dataclass
+import sys
 from typing import Union
 
 from doml_mc.intermediate_model.doml_element import (
     parse_attrs_and_assocs_from_doc,
 )
 
-from ..intermediate_model.metamodel import MetaModel
+from ..intermediate_model.builder import parse_by_name
+from ..intermediate_model.metamodel import CompiledMetaModel
 
 Attributes = dict[str, Union[str, int, bool]]
 Associations = dict[str, set[str]]
@@ -13,6 +15,8 @@ Associations = dict[str, set[str]]
 
 @dataclass
 class Infrastructure:
+    __slots__ = ("nodes", "networks", "groups")
+
     nodes: dict[str, "InfrastructureNode"]
     networks: dict[str, "Network"]
     groups: dict[str, "Group"]
@@ -20,6 +24,14 @@ class Infrastructure:
 
 @dataclass
 class InfrastructureNode:
+    __slots__ = (
+        "name",
+        "typeId",
+        "network_interfaces",
+        "attributes",
+        "associations",
+    )
+
     name: str
     typeId: str
     network_interfaces: dict[str, "NetworkInterface"]
@@ -29,6 +41,8 @@ class InfrastructureNode:
 
 @dataclass
 class Network:
+    __slots__ = ("name", "protocol", "addressRange")
+
     name: str
     protocol: str
     addressRange: str
@@ -36,6 +50,8 @@ class Network:
 
 @dataclass
 class NetworkInterface:
+    __slots__ = ("name", "belongsTo", "endPoint")
+
     name: str
     belongsTo: str
     endPoint: str
@@ -43,11 +59,13 @@ class NetworkInterface:
 
 @dataclass
 class Group:
+    __slots__ = ("name", "typeId")
+
     name: str
     typeId: str
 
 
-def parse_infrastructure(doc: dict, mm: MetaModel) -> Infrastructure:
+def parse_infrastructure(doc: dict, mm: CompiledMetaModel) -> Infrastructure:
     def parse_infrastructure_node(doc: dict) -> InfrastructureNode:
         def parse_network_interface(doc: dict) -> NetworkInterface:
             return NetworkInterface(
@@ -56,15 +74,14 @@ def parse_infrastructure(doc: dict, mm: MetaModel) -> Infrastructure:
                 endPoint=doc["endPoint"],
             )
 
-        typeId = doc["typeId"]
+        typeId = sys.intern(doc["typeId"])
         attrs, assocs = parse_attrs_and_assocs_from_doc(doc, typeId, mm)
         return InfrastructureNode(
             name=doc["name"],
             typeId=typeId,
-            network_interfaces={
-                niface_doc["name"]: parse_network_interface(niface_doc)
-                for niface_doc in doc.get("interfaces", [])
-            },
+            network_interfaces=parse_by_name(
+                doc.get("interfaces", []), parse_network_interface
+            ),
             attributes=attrs,
             associations=assocs,
         )
@@ -79,18 +96,11 @@ def parse_infrastructure(doc: dict, mm: MetaModel) -> Infrastructure:
     def parse_group(doc: dict) -> Group:
         return Group(
             name=doc["name"],
-            typeId=doc["typeId"],
+            typeId=sys.intern(doc["typeId"]),
         )
 
     return Infrastructure(
-        nodes={
-            ndoc["name"]: parse_infrastructure_node(ndoc)
-            for ndoc in doc["nodes"]
-        },
-        networks={
-            ndoc["name"]: parse_network(ndoc) for ndoc in doc["networks"]
-        },
-        groups={
-            gdoc["name"]: parse_group(gdoc) for gdoc in doc.get("groups", [])
-        },
+        nodes=parse_by_name(doc["nodes"], parse_infrastructure_node),
+        networks=parse_by_name(doc["networks"], parse_network),
+        groups=parse_by_name(doc.get("groups", []), parse_group),
     )
@@ -3,6 +3,8 @@ from dataclasses import dataclass
 
 @dataclass
 class Optimization:
+    __slots__ = ("typeId",)
+
     typeId: str
 
 
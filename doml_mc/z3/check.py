@@ -0,0 +1,127 @@
+from collections.abc import Callable
+from contextlib import nullcontext
+import time
+from dataclasses import dataclass, field, replace
+from typing import Optional
+
+from z3 import BoolRef, CheckSatResult, sat, unsat
+
+from ..intermediate_model.metamodel import compile_metamodel
+from ..intermediate_model.types import IntermediateModel, MetaModel
+from ..intermediate_model.validation import validate_im
+
+from .encoding import Encoding, EncodingOptions, encode_doml_model
+from .perf_store import PerfStore, mk_perf_record
+from .solver_pool import SolverPool
+from .utils import assert_tracked
+
+
+@dataclass
+class Requirement:
+    name: str
+    # Builds the formula stating the requirement on an encoded model.
+    formula: Callable[[Encoding], BoolRef]
+    # The classes, and the mangled names of the attributes and associations,
+    # that `formula` refers to, including the classes of the elements it
+    # ranges over. Needed only with `EncodingOptions.slice`.
+    classes: list[str] = field(default_factory=list)
+    attributes: list[str] = field(default_factory=list)
+    associations: list[str] = field(default_factory=list)
+
+
+@dataclass
+class CheckResult:
+    result: CheckSatResult
+    # Labels of the tracked assertions and names of the requirements in an
+    # unsat core, if `result` is `unsat`.
+    unsat_core: Optional[list[str]] = None
+
+
+def check_doml_model(
+    im: IntermediateModel,
+    mm: MetaModel,
+    inv_assoc: list[tuple[str, str]],
+    unbound_elems: list[str] = [],
+    requirements: list[Requirement] = [],
+    options: Optional[EncodingOptions] = None,
+    pool: Optional[SolverPool] = None,
+    validate: bool = True,
+    perf_store: Optional[PerfStore] = None,
+) -> CheckResult:
+    """
+    Checks whether `im`, extended with `unbound_elems`, can satisfy the
+    metamodel and `requirements`, on a solver of `pool` if it is given.
+
+    Unless `options.track` is set, the model is encoded without tracking,
+    which makes the usual, satisfiable case cheaper. Only if the result is
+    `unsat`, the model is encoded again with tracking to get an unsat core;
+    should the solver give up on that encoding, the result is still `unsat`,
+    with no core.
+
+    If `validate` is set and there are no `unbound_elems`, `im` is first
+    checked against the metamodel with `validate_im`, which decides the
+    result without a solver if there are no `requirements` or if it finds a
+    violation. In the latter case, the core is made of the labels of the
+    violated constraints.
+
+    If `perf_store` is given, a performance record of each check made by a
+    solver, with all its statistics, is appended to it.
+    """
+    if options is None:
+        options = EncodingOptions()
+    mm = compile_metamodel(mm)
+    if validate and not unbound_elems:
+        violations = validate_im(im, mm, inv_assoc)
+        if violations:
+            return CheckResult(
+                unsat, sorted({violation.label for violation in violations})
+            )
+        if not requirements:
+            return CheckResult(sat)
+
+    def check(options: EncodingOptions) -> CheckResult:
+        with (
+            nullcontext(
+                encode_doml_model(
+                    im,
+                    mm,
+                    inv_assoc,
+                    unbound_elems,
+                    options,
+                    requirements=requirements,
+                )
+            )
+            if pool is None
+            else pool.encode(im, mm, inv_assoc, unbound_elems, options)
+        ) as enc:
+            for req in requirements:
+                assert_tracked(enc.solver, req.formula(enc), req.name)
+            t = time.perf_counter()
+            result = enc.solver.check()
+            if perf_store is not None:
+                perf_store.append(
+                    mk_perf_record(
+                        im,
+                        unbound_elems,
+                        options,
+                        [req.name for req in requirements],
+                        str(result),
+                        time.perf_counter() - t,
+                        enc.solver,
+                    )
+                )
+            if result != unsat or not options.track:
+                return CheckResult(result)
+            return CheckResult(
+                result, [str(label) for label in enc.solver.unsat_core()]
+            )
+
+    check_result = check(options)
+    if check_result.result == unsat and not options.track:
+        # The tracked encoding is equivalent, but the solver may still give
+        # up on it, in which case the verdict stands without a core.
+        tracked_result = check(replace(options, track=True))
+        if tracked_result.result == unsat:
+            return tracked_result
+        return CheckResult(unsat)
+    return check_result
@@ -0,0 +1,306 @@
+from itertools import product
+from typing import Optional, Union
+
+from z3 import (
+    Z3_UNINTERPRETED_SORT,
+    DatatypeRef,
+    ExprRef,
+    FuncDeclRef,
+    ModelRef,
+    SortRef,
+    get_var_index,
+    is_and,
+    is_app,
+    is_eq,
+    is_false,
+    is_not,
+    is_or,
+    is_true,
+    is_var,
+)
+
+from ..intermediate_model.doml_element import DOMLElement
+from ..intermediate_model.types import IntermediateModel
+
+from .deepening import ABSENT_CLASS
+from .encoding import Encoding
+
+# Argument tuples of a function, as the ids of their ASTs.
+IdTuple = tuple[int, ...]
+# A set of argument tuples given by the ids of the values allowed and of
+# those excluded for some of the arguments, by index, the others being free.
+Box = tuple[dict[int, set[int]], dict[int, set[int]]]
+
+
+class _Interpretation:
+    """
+    Reads the argument tuples off the interpretations of the relations of a
+    model, whose `else` values are formulas over their arguments, usually
+    disjunctions of conjunctions of (dis)equalities between arguments, or
+    their images by projection functions introduced by Z3 (named "k!<n>"),
+    and values.
+    """
+
+    def __init__(self, model: ModelRef, universes: list[list[ExprRef]]):
+        self.model = model
+        # The values of each finite sort, by the id of the sort.
+        self.universes = {u[0].sort().get_id(): u for u in universes if u}
+        self.values: dict[int, ExprRef] = {}
+        self._preimages: dict[int, Optional[dict[int, set[int]]]] = {}
+
+    def preimages(self, f: FuncDeclRef) -> Optional[dict[int, set[int]]]:
+        """The values mapped by the unary function `f` to each value."""
+        if (pre := self._preimages.get(f.get_id(), ())) != ():
+            return pre
+        pre = None
+        if (universe := self.universes.get(f.domain(0).get_id())) is not None:
+            pre = {}
+            for v in universe:
+                self.values[v.get_id()] = v
+                image = self.model.eval(f(v), model_completion=True)
+                pre.setdefault(image.get_id(), set()).add(v.get_id())
+        self._preimages[f.get_id()] = pre
+        return pre
+
+    def literal(
+        self, lhs: ExprRef, rhs: ExprRef
+    ) -> Optional[dict[int, set[int]]]:
+        """The values allowed for an argument by `lhs == rhs`."""
+        if is_var(rhs) or any(map(is_var, rhs.children())):
+            lhs, rhs = rhs, lhs
+        if not is_app(rhs) or any(map(is_var, rhs.children())):
+            return None
+        if is_var(lhs):
+            self.values[rhs.get_id()] = rhs
+            return {get_var_index(lhs): {rhs.get_id()}}
+        if (
+            is_app(lhs)
+            and lhs.num_args() == 1
+            and is_var(lhs.arg(0))
+            and (pre := self.preimages(lhs.decl())) is not None
+        ):
+            return {get_var_index(lhs.arg(0)): pre.get(rhs.get_id(), set())}
+        return None
+
+    def boxes(self, expr: ExprRef) -> Optional[list[Box]]:
+        """`expr` as a union of boxes, or `None` if it cannot be read."""
+        if is_true(expr):
+            return [({}, {})]
+        if is_false(expr):
+            return []
+        if is_or(expr):
+            boxes: list[Box] = []
+            for child in expr.children():
+                if (child_boxes := self.boxes(child)) is None:
+                    return None
+                boxes += child_boxes
+            return boxes
+        if is_and(expr):
+            boxes = [({}, {})]
+            for child in expr.children():
+                if (child_boxes := self.boxes(child)) is None:
+                    return None
+                meets = (
+                    _meet(b1, b2) for b1, b2 in product(boxes, child_boxes)
+                )
+                # Boxes allowing no value for some argument are empty.
+                boxes = [box for box in meets if all(box[0].values())]
+            return boxes
+        is_neg = is_not(expr)
+        if is_neg:
+            expr = expr.arg(0)
+        if not is_eq(expr) or (lit := self.literal(*expr.children())) is None:
+            return None
+        return [({}, lit)] if is_neg else [(lit, {})]
+
+    def true_tuples(self, f: FuncDeclRef) -> Optional[set[IdTuple]]:
+        """
+        The argument tuples for which the Boolean function `f` is true, or
+        `None` if its interpretation cannot be read.
+        """
+        interp = self.model[f]
+        arity = f.arity()
+        entries: dict[IdTuple, bool] = {}
+        for i in range(interp.num_entries()):
+            entry = interp.entry(i)
+            args = [entry.arg_value(j) for j in range(arity)]
+            self.values.update((arg.get_id(), arg) for arg in args)
+            entries[tuple(arg.get_id() for arg in args)] = is_true(
+                entry.value()
+            )
+
+        tuples = {args for args, value in entries.items() if value}
+        else_value = interp.else_value()
+        if else_value is None:
+            return tuples
+        if (boxes := self.boxes(else_value)) is None:
+            return None
+        for pos, neg in boxes:
+            if len(pos) != arity:
+                return None  # Some argument is free.
+            tuples.update(
+                args
+                for args in product(
+                    *(pos[i] - neg.get(i, set()) for i in range(arity))
+                )
+                if args not in entries
+            )
+        return tuples
+
+
+def _meet(box1: Box, box2: Box) -> Box:
+    (pos1, neg1), (pos2, neg2) = box1, box2
+    pos = pos1 | pos2
+    for i in pos1.keys() & pos2.keys():
+        pos[i] = pos1[i] & pos2[i]
+    neg = neg1 | neg2
+    for i in neg1.keys() & neg2.keys():
+        neg[i] = neg1[i] | neg2[i]
+    return pos, neg
+
+
+def _value_of(model: ModelRef, ref: ExprRef) -> ExprRef:
+    if ref.sort().kind() == Z3_UNINTERPRETED_SORT:
+        return model.eval(ref, model_completion=True)
+    return ref
+
+
+def _ground_terms(exprs: list, sort: SortRef) -> list[ExprRef]:
+    """The distinct subterms of `exprs` of sort `sort` with no variables."""
+    terms: dict[int, ExprRef] = {}
+    seen: set[int] = set()
+
+    def visit(expr: ExprRef) -> bool:
+        # Whether `expr` is ground.
+        ground = not is_var(expr)
+        for child in expr.children():
+            if child.get_id() not in seen:
+                ground = visit(child) and ground
+        seen.add(expr.get_id())
+        if ground and expr.sort() == sort:
+            terms[expr.get_id()] = expr
+        return ground
+
+    for expr in exprs:
+        for e in expr if isinstance(expr, list) else [expr]:
+            visit(e)
+    return list(terms.values())
+
+
+def _decode_adata(
+    names: dict[int, str], value: DatatypeRef
+) -> Union[str, int, bool]:
+    kind = value.decl().name()
+    if kind == "int":
+        return value.arg(0).as_long()
+    elif kind == "bool":
+        return is_true(value.arg(0))
+    else:  # kind == "ss"
+        return names[value.arg(0).get_id()]
+
+
+def decode_unbound_elems(
+    enc: Encoding,
+    model: Optional[ModelRef] = None,
+    unbound_elems: Optional[list[str]] = None,
+) -> IntermediateModel:
+    """
+    Decodes from `model`, by default the model of `enc.solver`, what the
+    solver synthesized: the `unbound_elems` (by default, all those of `enc`)
+    whose class is one of the metamodel's, with their attributes and
+    associations, and the elements of the model which are associated to
+    them, with only those associations and no attributes.
+
+    The interpretations of the relations are read once, rather than queried
+    for each tuple of elements. Only if Z3 gives one in an unexpected form,
+    its tuples involving the unbound elements are evaluated one by one.
+    """
+    if model is None:
+        model = enc.solver.model()
+    if unbound_elems is None:
+        unbound_elems = enc.unbound_elems
+    # Values of uninterpreted sorts (see `SlotBase`) are not the constants
+    # they are bound to, so they are looked up in the model.
+    elem_values = {
+        name: _value_of(model, ref) for name, ref in enc.elem.items()
+    }
+    names = {value.get_id(): name for name, value in elem_values.items()}
+    names.update(
+        (_value_of(model, ref).get_id(), name) for name, ref in enc.ss.items()
+    )
+    names.update((ref.get_id(), name) for name, ref in enc.assoc.items())
+    names.update((ref.get_id(), name) for name, ref in enc.attr.items())
+    classes = {ref.get_id(): name for name, ref in enc.class_.items()}
+
+    def class_of(ename: str) -> str:
+        value = model.eval(
+            enc.elem_class_f(enc.elem[ename]), model_completion=True
+        )
+        return classes[value.get_id()]
+
+    delta: IntermediateModel = {}
+    for ubn in unbound_elems:
+        if (cname := class_of(ubn)) != ABSENT_CLASS:
+            delta[ubn] = DOMLElement(
+                name=ubn, class_=cname, attributes={}, associations={}
+            )
+    ubns = list(delta)
+    unbound_ids = {elem_values[ubn].get_id() for ubn in ubns}
+    interp = _Interpretation(
+        model,
+        [
+            list(elem_values.values()),
+            list(enc.assoc.values()),
+            list(enc.attr.values()),
+        ],
+    )
+
+    if (assoc_tuples := interp.true_tuples(enc.assoc_rel)) is not None:
+        edges = [
+            (names[es], names[a], names[et])
+            for es, a, et in assoc_tuples
+            if es in unbound_ids or et in unbound_ids
+        ]
+    else:
+        edges = [
+            (esn, amn, etn)
+            for (esn, etn) in {
+                *product(ubns, enc.elem),
+                *product(enc.elem, ubns),
+            }
+            for amn, a in enc.assoc.items()
+            if is_true(
+                model.eval(
+                    enc.assoc_rel(enc.elem[esn], a, enc.elem[etn]),
+                    model_completion=True,
+                )
+            )
+        ]
+    for esn, amn, etn in edges:
+        if (e := delta.get(esn)) is None:
+            e = delta[esn] = DOMLElement(
+                name=esn, class_=class_of(esn), attributes={}, associations={}
+            )
+        e.associations.setdefault(amn, set()).add(etn)
+
+    if (attr_tuples := interp.true_tuples(enc.attr_rel)) is not None:
+        attrs = [
+            (names[es], names[a], interp.values[d])
+            for es, a, d in attr_tuples
+            if es in unbound_ids
+        ]
+    else:
+        # The values of the attributes must occur in the interpretation.
+        candidates = _ground_terms(model[enc.attr_rel].as_list(), enc.AData)
+        attrs = [
+            (ubn, amn, d)
+            for ubn, (amn, a), d in product(ubns, enc.attr.items(), candidates)
+            if is_true(
+                model.eval(
+                    enc.attr_rel(enc.elem[ubn], a, d), model_completion=True
+                )
+            )
+        ]
+    for esn, amn, d in attrs:
+        delta[esn].attributes[amn] = _decode_adata(names, d)
+    return delta
@@ -0,0 +1,200 @@
+from dataclasses import dataclass, field
+from typing import Optional
+
+from z3 import (
+    And,
+    Bool,
+    CheckSatResult,
+    Context,
+    Implies,
+    Not,
+    Solver,
+    sat,
+    unsat,
+)
+
+from ..intermediate_model.metamodel import compile_metamodel
+from ..intermediate_model.types import IntermediateModel, MetaModel
+
+from .check import CheckResult, Requirement
+from .encoding import Encoding, EncodingOptions
+from .im_encoding import (
+    assert_im_associations_sparse,
+    assert_im_attributes,
+    def_elem_class_f_and_assert_classes,
+    mk_elem_sort_dict,
+    mk_stringsym_sort_dict,
+)
+from .metamodel_encoding import (
+    mk_association_rel,
+    mk_association_sort_dict,
+    mk_attribute_rel,
+    mk_attribute_sort_dict,
+)
+from .smtlib_encoding import assert_metamodel_template
+from .template_cache import metamodel_template_cache
+from .utils import UntrackedSolver, mk_adata_sort, mk_enum_sort_dict
+
+# The class of the unbound elements which are not enabled. Being a subclass
+# of no class of the metamodel, its elements can have no attributes and no
+# associations, and no metamodel constraint applies to them.
+ABSENT_CLASS = "absent"
+
+
+@dataclass
+class DeepeningResult:
+    # The least number of unbound elements for which the check is `sat`, or
+    # `None` if there is none up to the maximum, or if the solver gave up
+    # on a smaller number.
+    n_unbound: Optional[int]
+    # The result with `n_unbound` unbound elements, or with the maximum
+    # number if there is none, or the `unknown` result which ended the
+    # search.
+    check_result: CheckResult
+    # The encoding, with all the unbound elements up to the maximum. If the
+    # result is `sat`, the ones after the first `n_unbound` are of
+    # `ABSENT_CLASS` in the model of the solver.
+    encoding: Encoding
+    # The result for each number of unbound elements tried.
+    results: list[CheckSatResult] = field(default_factory=list)
+
+
+def check_doml_model_deepening(
+    im: IntermediateModel,
+    mm: MetaModel,
+    inv_assoc: list[tuple[str, str]],
+    requirements: list[Requirement] = [],
+    max_unbound: int = 8,
+    track: bool = False,
+) -> DeepeningResult:
+    """
+    Finds the least number of unbound elements, up to `max_unbound`, with
+    which `im` can satisfy the metamodel and `requirements`, trying 0, 1, 2
+    and so on, all on the same solver.
+
+    The model is encoded once with `max_unbound` unbound elements,
+    "unbound0", "unbound1" and so on, with the "quantified" metamodel and
+    "sparse" associations encodings. The Class sort has an extra value,
+    `ABSENT_CLASS`, and enabling `n` unbound elements means that the first
+    `n` are not of that class and the others are. This is guarded by a
+    literal named "unbound_elems <n>", which the check for `n` assumes, so
+    that what the solver learned in the previous checks is kept.
+
+    Requirements are stated on the encoding with all `max_unbound` unbound
+    elements, so those that range over all elements rather than over the
+    ones of some classes must allow for elements of `ABSENT_CLASS`.
+
+    If no number works, the core of the last check names the number of
+    unbound elements and the requirements involved and, if `track` is set,
+    the assertions of the model. If the solver gives up on a number, the
+    search stops there, with an `unknown` result and no number, since a
+    larger one that works might not be the least.
+    """
+    mm = compile_metamodel(mm)
+    unbound_elems = [f"unbound{i}" for i in range(max_unbound)]
+    ctx = Context()
+    solver = Solver(ctx=ctx) if track else UntrackedSolver(ctx=ctx)
+
+    class_sort, class_ = mk_enum_sort_dict(
+        "Class", list(mm) + [ABSENT_CLASS], ctx
+    )
+    assoc_sort, assoc = mk_association_sort_dict(mm, ctx)
+    attr_sort, attr = mk_attribute_sort_dict(mm, ctx)
+    elem_sort, elem = mk_elem_sort_dict(im, unbound_elems, ctx)
+    ss_sort, ss = mk_stringsym_sort_dict(im, mm, ctx)
+    AData = mk_adata_sort(ss_sort)
+
+    elem_class_f = def_elem_class_f_and_assert_classes(
+        im, solver, elem_sort, elem, class_sort, class_
+    )
+    attr_rel = mk_attribute_rel(elem_sort, attr_sort, AData)
+    assoc_rel = mk_association_rel(elem_sort, assoc_sort)
+    assert_metamodel_template(
+        metamodel_template_cache.get(mm, inv_assoc),
+        solver,
+        class_sort,
+        assoc_sort,
+        attr_sort,
+        elem_sort,
+        AData,
+        ss,
+        elem_class_f,
+        attr_rel,
+        assoc_rel,
+    )
+    assert_im_attributes(
+        attr_rel, solver, im, mm, elem, attr_sort, attr, AData, ss
+    )
+    assert_im_associations_sparse(
+        assoc_rel,
+        solver,
+        im,
+        elem_sort,
+        elem,
+        assoc_sort,
+        assoc,
+        unbound_elems,
+    )
+    enc = Encoding(
+        solver=solver,
+        unbound_elems=unbound_elems,
+        class_sort=class_sort,
+        class_=class_,
+        assoc_sort=assoc_sort,
+        assoc=assoc,
+        attr_sort=attr_sort,
+        attr=attr,
+        elem_sort=elem_sort,
+        elem=elem,
+        ss_sort=ss_sort,
+        ss=ss,
+        AData=AData,
+        elem_class_f=elem_class_f,
+        attr_rel=attr_rel,
+        assoc_rel=assoc_rel,
+        options=EncodingOptions(associations="sparse", track=track),
+    )
+
+    req_guards = []
+    for req in requirements:
+        guard = Bool(req.name, ctx)
+        solver.add(Implies(guard, req.formula(enc)))
+        req_guards.append(guard)
+
+    absent = class_[ABSENT_CLASS]
+    results: list[CheckSatResult] = []
+    for n in range(max_unbound + 1):
+        guard = Bool(f"unbound_elems {n}", ctx)
+        solver.add(
+            Implies(
+                guard,
+                And(
+                    *(
+                        elem_class_f(elem[ubn]) != absent
+                        for ubn in unbound_elems[:n]
+                    ),
+                    *(
+                        elem_class_f(elem[ubn]) == absent
+                        for ubn in unbound_elems[n:]
+                    ),
+                    ctx,
+                ),
+            )
+        )
+        result = solver.check(guard, *req_guards)
+        results.append(result)
+        if result == sat:
+            return DeepeningResult(n, CheckResult(result), enc, results)
+        if result != unsat:
+            return DeepeningResult(None, CheckResult(result), enc, results)
+        if n < max_unbound:
+            # Numbers are never tried again, so their guards are falsified
+            # for good, sparing the solver from considering them.
+            solver.add(Not(guard))
+
+    return DeepeningResult(
+        None,
+        CheckResult(result, [str(label) for label in solver.unsat_core()]),
+        enc,
+        results,
+    )
@@ -0,0 +1,328 @@
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Optional
+
+from z3 import Context, DatatypeSortRef, FuncDeclRef, Solver, SortRef
+
+from ..instrumentation import instrumented
+from ..intermediate_model.metamodel import compile_metamodel
+from ..intermediate_model.metamodel_slicing import slice_metamodel
+from ..intermediate_model.types import (
+    CompiledMetaModel,
+    IntermediateModel,
+    MetaModel,
+)
+
+from .im_encoding import (
+    assert_im_associations,
+    assert_im_associations_q,
+    assert_im_associations_sparse,
+    assert_im_attributes,
+    def_elem_class_f_and_assert_classes,
+    mk_elem_sort_dict,
+    mk_stringsym_sort_dict,
+)
+from .metamodel_encoding import (
+    def_association_rel_and_assert_constraints,
+    def_association_rel_and_assert_constraints_ground,
+    def_attribute_rel_and_assert_constraints,
+    def_attribute_rel_and_assert_constraints_ground,
+    mk_association_sort_dict,
+    mk_attribute_sort_dict,
+    mk_association_rel,
+    mk_attribute_rel,
+    mk_class_sort_dict,
+)
+from .smtlib_encoding import (
+    assert_metamodel_template,
+    def_rels_and_assert_smtlib,
+)
+from .template_cache import metamodel_template_cache
+from .types import (
+    AssociationsEncoding,
+    EncoderBackend,
+    MetaModelEncoding,
+    Refs,
+)
+from .utils import UntrackedSolver, mk_adata_sort
+
+if TYPE_CHECKING:
+    # `check` imports this module to define `Requirement`.
+    from .check import Requirement
+
+
+@dataclass
+class EncodingOptions:
+    associations: AssociationsEncoding = "quantified"
+    metamodel: MetaModelEncoding = "quantified"
+    # Whether assertions are tracked, so that the solver can produce unsat
+    # cores. See `check_doml_model` for getting them on demand instead.
+    track: bool = False
+    backend: EncoderBackend = "api"
+    # Whether the "quantified" metamodel constraints are instantiated from a
+    # template kept in `metamodel_template_cache` rather than built anew.
+    template_cache: bool = True
+    # Whether only the part of the metamodel that the model and the
+    # requirements can involve is encoded, see `slice_metamodel`. The
+    # requirements must then declare everything their formulas refer to.
+    slice: bool = False
+
+
+@dataclass
+class Encoding:
+    """
+    A DOML model encoded in a Z3 solver, with the sorts, constants and
+    functions needed to state requirements on it.
+    """
+
+    solver: Solver
+    unbound_elems: list[str]
+
+    class_sort: DatatypeSortRef
+    class_: Refs
+    assoc_sort: DatatypeSortRef
+    assoc: Refs
+    attr_sort: DatatypeSortRef
+    attr: Refs
+    # Enumerations, or uninterpreted sorts with `SlotBase`.
+    elem_sort: SortRef
+    elem: Refs
+    ss_sort: SortRef
+    ss: Refs
+    AData: DatatypeSortRef
+
+    elem_class_f: FuncDeclRef
+    attr_rel: FuncDeclRef
+    assoc_rel: FuncDeclRef
+
+    options: EncodingOptions = field(default_factory=EncodingOptions)
+
+
+@instrumented
+def encode_doml_model(
+    im: IntermediateModel,
+    mm: MetaModel,
+    inv_assoc: list[tuple[str, str]],
+    unbound_elems: list[str] = [],
+    options: Optional[EncodingOptions] = None,
+    ctx: Optional[Context] = None,
+    requirements: Sequence["Requirement"] = (),
+) -> Encoding:
+    """
+    Encodes `mm` and `im`, with `unbound_elems` as the names of the elements
+    the solver may add to `im`, in a new solver.
+
+    With `options.slice`, `mm` is sliced down to what `im` and the classes,
+    attributes and associations declared by `requirements` can involve.
+    The requirements are not asserted.
+
+    Everything is created in `ctx`, or in a new context if it is `None`, so
+    that several models can be encoded in the same process: Z3 does not allow
+    declaring two sorts with the same name in the same context.
+
+    `im` must have gone through `reciprocate_inverse_associations`.
+    """
+    if options is None:
+        options = EncodingOptions()
+    if ctx is None:
+        ctx = Context()
+    if options.backend == "smtlib" and options.metamodel != "quantified":
+        raise ValueError(
+            "The smtlib backend only supports the quantified metamodel"
+            " encoding."
+        )
+    mm = compile_metamodel(mm)
+    if options.slice:
+        mm, inv_assoc = slice_metamodel(
+            mm,
+            im,
+            inv_assoc,
+            [cname for req in requirements for cname in req.classes],
+            [aname for req in requirements for aname in req.attributes],
+            [aname for req in requirements for aname in req.associations],
+        )
+
+    solver = Solver(ctx=ctx) if options.track else UntrackedSolver(ctx=ctx)
+
+    class_sort, class_ = mk_class_sort_dict(mm, ctx)
+    assoc_sort, assoc = mk_association_sort_dict(mm, ctx)
+    attr_sort, attr = mk_attribute_sort_dict(mm, ctx)
+    elem_sort, elem = mk_elem_sort_dict(im, unbound_elems, ctx)
+    ss_sort, ss = mk_stringsym_sort_dict(im, mm, ctx)
+    AData = mk_adata_sort(ss_sort)
+
+    if options.backend == "api":
+        elem_class_f, attr_rel, assoc_rel = _def_rels_and_assert_api(
+            im,
+            mm,
+            inv_assoc,
+            unbound_elems,
+            options,
+            solver,
+            class_sort,
+            class_,
+            assoc_sort,
+            assoc,
+            attr_sort,
+            attr,
+            elem_sort,
+            elem,
+            AData,
+            ss,
+        )
+    else:  # options.backend == "smtlib"
+        elem_class_f, attr_rel, assoc_rel = def_rels_and_assert_smtlib(
+            im,
+            mm,
+            inv_assoc,
+            unbound_elems,
+            options.associations,
+            solver,
+            class_sort,
+            assoc_sort,
+            attr_sort,
+            elem_sort,
+            AData,
+            ss,
+            (
+                metamodel_template_cache.get(mm, inv_assoc)
+                if options.template_cache
+                else None
+            ),
+        )
+
+    return Encoding(
+        solver=solver,
+        unbound_elems=unbound_elems,
+        class_sort=class_sort,
+        class_=class_,
+        assoc_sort=assoc_sort,
+        assoc=assoc,
+        attr_sort=attr_sort,
+        attr=attr,
+        elem_sort=elem_sort,
+        elem=elem,
+        ss_sort=ss_sort,
+        ss=ss,
+        AData=AData,
+        elem_class_f=elem_class_f,
+        attr_rel=attr_rel,
+        assoc_rel=assoc_rel,
+        options=options,
+    )
+
+
+def _def_rels_and_assert_api(
+    im: IntermediateModel,
+    mm: CompiledMetaModel,
+    inv_assoc: list[tuple[str, str]],
+    unbound_elems: list[str],
+    options: EncodingOptions,
+    solver: Solver,
+    class_sort: DatatypeSortRef,
+    class_: Refs,
+    assoc_sort: DatatypeSortRef,
+    assoc: Refs,
+    attr_sort: DatatypeSortRef,
+    attr: Refs,
+    elem_sort: DatatypeSortRef,
+    elem: Refs,
+    AData: DatatypeSortRef,
+    ss: Refs,
+) -> tuple[FuncDeclRef, FuncDeclRef, FuncDeclRef]:
+    """
+    ### Effects
+    This procedure is effectful on `solver`.
+    """
+    elem_class_f = def_elem_class_f_and_assert_classes(
+        im, solver, elem_sort, elem, class_sort, class_
+    )
+    if options.metamodel == "quantified" and options.template_cache:
+        attr_rel = mk_attribute_rel(elem_sort, attr_sort, AData)
+        assoc_rel = mk_association_rel(elem_sort, assoc_sort)
+        assert_metamodel_template(
+            metamodel_template_cache.get(mm, inv_assoc),
+            solver,
+            class_sort,
+            assoc_sort,
+            attr_sort,
+            elem_sort,
+            AData,
+            ss,
+            elem_class_f,
+            attr_rel,
+            assoc_rel,
+        )
+    elif options.metamodel == "quantified":
+        attr_rel = def_attribute_rel_and_assert_constraints(
+            mm,
+            solver,
+            attr_sort,
+            attr,
+            class_,
+            elem_class_f,
+            elem_sort,
+            AData,
+            ss,
+        )
+    else:  # options.metamodel == "ground"
+        attr_rel = def_attribute_rel_and_assert_constraints_ground(
+            mm,
+            solver,
+            attr_sort,
+            attr,
+            class_,
+            elem_class_f,
+            elem_sort,
+            AData,
+            ss,
+            im,
+            elem,
+            unbound_elems,
+        )
+    assert_im_attributes(
+        attr_rel, solver, im, mm, elem, attr_sort, attr, AData, ss
+    )
+    if options.metamodel == "quantified" and not options.template_cache:
+        assoc_rel = def_association_rel_and_assert_constraints(
+            mm,
+            solver,
+            assoc_sort,
+            assoc,
+            class_,
+            elem_class_f,
+            elem_sort,
+            inv_assoc,
+        )
+    elif options.metamodel == "ground":
+        assoc_rel = def_association_rel_and_assert_constraints_ground(
+            mm,
+            solver,
+            assoc_sort,
+            assoc,
+            class_,
+            elem_class_f,
+            elem_sort,
+            inv_assoc,
+            im,
+            elem,
+            unbound_elems,
+        )
+    if options.associations == "tuples":
+        assert_im_associations(assoc_rel, solver, im, mm, elem, assoc)
+    elif options.associations == "quantified":
+        assert_im_associations_q(
+            assoc_rel, solver, im, elem, assoc_sort, assoc
+        )
+    else:  # options.associations == "sparse"
+        assert_im_associations_sparse(
+            assoc_rel,
+            solver,
+            im,
+            elem_sort,
+            elem,
+            assoc_sort,
+            assoc,
+            unbound_elems,
+        )
+    return elem_class_f, attr_rel, assoc_rel
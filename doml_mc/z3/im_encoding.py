@@ -1,36 +1,48 @@
-from typing import Union
+from typing import Optional, Union
 from itertools import product
 
 from z3 import (
     And,
+    BoolRef,
     Const,
+    Context,
     DatatypeRef,
     DatatypeSortRef,
     ForAll,
     FuncDeclRef,
     Function,
+    Implies,
     Or,
     Solver,
 )
 
-from ..intermediate_model.types import IntermediateModel, MetaModel
-from ..intermediate_model.metamodel import get_mangled_attribute_defaults
+from ..instrumentation import instrumented
+from ..intermediate_model.doml_element import DOMLElement, iter_im_edges
+from ..intermediate_model.types import CompiledMetaModel, IntermediateModel
+from ..intermediate_model.metamodel import (
+    get_mangled_attribute_defaults,
+)
 
 from .types import Refs, SortAndRefs
 from .utils import (
     assert_relation_tuples,
+    assert_tracked,
     Iff,
     mk_enum_sort_dict,
     mk_stringsym_sort_from_strings,
 )
 
 
+@instrumented
 def mk_elem_sort_dict(
-    im: IntermediateModel, additional_elems: list[str] = []
+    im: IntermediateModel,
+    additional_elems: list[str] = [],
+    ctx: Optional[Context] = None,
 ) -> SortAndRefs:
-    return mk_enum_sort_dict("Element", list(im) + additional_elems)
+    return mk_enum_sort_dict("Element", list(im) + additional_elems, ctx)
 
 
+@instrumented
 def def_elem_class_f_and_assert_classes(
     im: IntermediateModel,
     solver: Solver,
@@ -44,19 +56,87 @@ def def_elem_class_f_and_assert_classes(
     This procedure is effectful on `solver`.
     """
     elem_class_f = Function("elem_class", elem_sort, class_sort)
+    assert_im_classes(elem_class_f, solver, im, elem, class_)
+    return elem_class_f
+
+
+def assert_im_classes(
+    elem_class_f: FuncDeclRef,
+    solver: Solver,
+    im: IntermediateModel,
+    elem: Refs,
+    class_: Refs,
+) -> None:
+    """
+    ### Effects
+    This procedure is effectful on `solver`.
+    """
     for ename, e in im.items():
-        solver.assert_and_track(
+        assert_tracked(
+            solver,
             elem_class_f(elem[ename]) == class_[e.class_],
-            f"elem_class {ename} {e.class_}",
+            lambda: f"elem_class {ename} {e.class_}",
         )
-    return elem_class_f
 
 
+def _encode_adata(
+    AData: DatatypeSortRef, ss: Refs, v: Union[str, int, bool]
+) -> DatatypeRef:
+    if type(v) is str:
+        return AData.ss(ss[v])  # type: ignore
+    elif type(v) is int:
+        return AData.int(v)  # type: ignore
+    else:  # type(v) is bool
+        return AData.bool(v)  # type: ignore
+
+
+def mk_im_attributes_assn(
+    attr_rel: FuncDeclRef,
+    mm: CompiledMetaModel,
+    esn: str,
+    im_es: DOMLElement,
+    elem: Refs,
+    attr_sort: DatatypeSortRef,
+    attr: Refs,
+    AData: DatatypeSortRef,
+    ss: Refs,
+) -> BoolRef:
+    """
+    States that the attributes of element `esn` of the intermediate model
+    are exactly those of `im_es`, defaults included.
+
+    ### Parameters
+     - `mm` is a compiled metamodel.
+    """
+    a = Const("a", attr_sort)
+    d = Const("d", AData)
+    mangled_attrs = (
+        get_mangled_attribute_defaults(mm, im_es.class_) | im_es.attributes
+    )
+    return ForAll(
+        [a, d],
+        Iff(
+            attr_rel(elem[esn], a, d),
+            Or(
+                *(
+                    And(
+                        a == attr[amn],
+                        d == _encode_adata(AData, ss, avalue),
+                    )
+                    for amn, avalue in mangled_attrs.items()
+                ),
+                attr_sort.ctx,
+            ),
+        ),
+    )
+
+
+@instrumented
 def assert_im_attributes(
     attr_rel: FuncDeclRef,
     solver: Solver,
     im: IntermediateModel,
-    mm: MetaModel,
+    mm: CompiledMetaModel,
     elem: Refs,
     attr_sort: DatatypeSortRef,
     attr: Refs,
@@ -67,44 +147,19 @@ def assert_im_attributes(
     ### Effects
     This procedure is effectful on `solver`.
     """
-
-    def encode_adata(v: Union[str, int, bool]) -> DatatypeRef:
-        if type(v) is str:
-            return AData.ss(ss[v])  # type: ignore
-        elif type(v) is int:
-            return AData.int(v)  # type: ignore
-        else:  # type(v) is bool
-            return AData.bool(v)  # type: ignore
-
-    a = Const("a", attr_sort)
-    d = Const("d", AData)
     for esn, im_es in im.items():
-        mangled_attrs = (
-            get_mangled_attribute_defaults(mm, im_es.class_) | im_es.attributes
+        assn = mk_im_attributes_assn(
+            attr_rel, mm, esn, im_es, elem, attr_sort, attr, AData, ss
         )
-        assn = ForAll(
-            [a, d],
-            Iff(
-                attr_rel(elem[esn], a, d),
-                Or(
-                    *(
-                        And(
-                            a == attr[amn],
-                            d == encode_adata(avalue),
-                        )
-                        for amn, avalue in mangled_attrs.items()
-                    )
-                ),
-            ),
-        )
-        solver.assert_and_track(assn, f"attribute_values {esn}")
+        assert_tracked(solver, assn, lambda: f"attribute_values {esn}")
 
 
+@instrumented
 def assert_im_associations(
     assoc_rel: FuncDeclRef,
     solver: Solver,
     im: IntermediateModel,
-    mm: MetaModel,
+    mm: CompiledMetaModel,
     elem: Refs,
     assoc: Refs,
 ) -> None:
@@ -112,7 +167,6 @@ def assert_im_associations(
     ### Effects
     This procedure is effectful on `solver`.
     """
-    elem_names = set(im.keys())
     assoc_mangled_names = {
         f"{cname}::{aname}"
         for cname, c in mm.items()
@@ -120,14 +174,13 @@ def assert_im_associations(
     }
     rel_tpls = [
         [esn, amn, etn]
-        for esn, amn, etn in product(
-            elem_names, assoc_mangled_names, elem_names
-        )
-        if etn in im[esn].associations.get(amn, set())
+        for esn, amn, etn in iter_im_edges(im)
+        if amn in assoc_mangled_names
     ]
     assert_relation_tuples(assoc_rel, solver, rel_tpls, elem, assoc, elem)
 
 
+@instrumented
 def assert_im_associations_q(
     assoc_rel: FuncDeclRef,
     solver: Solver,
@@ -141,8 +194,14 @@ def assert_im_associations_q(
     This procedure is effectful on `solver`.
     """
 
+    # Associations relating each pair of elements, computed from the actual
+    # pairs of associations only.
+    pair_assocs: dict[tuple[str, str], list[str]] = {}
+    for esn, amn, etn in iter_im_edges(im):
+        pair_assocs.setdefault((esn, etn), []).append(amn)
+
     a = Const("a", assoc_sort)
-    for (esn, im_es), etn in product(im.items(), im):
+    for esn, etn in product(im, im):
         assn = ForAll(
             [a],
             Iff(
@@ -150,20 +209,108 @@ def assert_im_associations_q(
                 Or(
                     *(
                         a == assoc[amn]
-                        for amn, etns in im_es.associations.items()
-                        if etn in etns
-                    )
+                        for amn in pair_assocs.get((esn, etn), [])
+                    ),
+                    assoc_sort.ctx,
                 ),
             ),
         )
-        solver.assert_and_track(assn, f"associations {esn} {etn}")
+        assert_tracked(solver, assn, lambda: f"associations {esn} {etn}")
+
+
+@instrumented
+def assert_im_associations_sparse(
+    assoc_rel: FuncDeclRef,
+    solver: Solver,
+    im: IntermediateModel,
+    elem_sort: DatatypeSortRef,
+    elem: Refs,
+    assoc_sort: DatatypeSortRef,
+    assoc: Refs,
+    unbound_elems: list[str],
+) -> None:
+    """
+    Asserts the same as `assert_im_associations_q`, with one assertion per
+    element of `im` instead of one per pair of elements: the pairs of `im`
+    starting from the element, and a closed-world axiom stating that the
+    element is related to no other element of `im`. Its associations with
+    `unbound_elems` are left free.
+
+    The size of the encoding is thus linear in the number of pairs of
+    associations, rather than quadratic in the number of elements.
+
+    ### Effects
+    This procedure is effectful on `solver`.
+    """
+    out_edges: dict[str, list[tuple[str, str]]] = {}
+    for esn, amn, etn in iter_im_edges(im):
+        out_edges.setdefault(esn, []).append((amn, etn))
+    unbound_refs = [elem[ubn] for ubn in unbound_elems]
+
+    for esn in im:
+        assn = mk_im_associations_sparse_assn(
+            assoc_rel,
+            esn,
+            out_edges.get(esn, []),
+            elem_sort,
+            elem,
+            assoc_sort,
+            assoc,
+            unbound_refs,
+        )
+        assert_tracked(solver, assn, lambda: f"associations {esn}")
 
 
+def mk_im_associations_sparse_assn(
+    assoc_rel: FuncDeclRef,
+    esn: str,
+    edges: list[tuple[str, str]],
+    elem_sort: DatatypeSortRef,
+    elem: Refs,
+    assoc_sort: DatatypeSortRef,
+    assoc: Refs,
+    unbound_refs: list[DatatypeRef],
+) -> BoolRef:
+    """
+    States that element `esn` of the intermediate model is related exactly
+    by the (association, target) pairs in `edges`, apart from its
+    associations with the elements in `unbound_refs`, which are left free.
+    See `assert_im_associations_sparse`.
+    """
+    a = Const("a", assoc_sort)
+    t = Const("t", elem_sort)
+    closed_world = ForAll(
+        [a, t],
+        Implies(
+            assoc_rel(elem[esn], a, t),
+            Or(
+                *(And(a == assoc[amn], t == elem[etn]) for amn, etn in edges),
+                *(t == ubr for ubr in unbound_refs),
+                elem_sort.ctx,
+            ),
+        ),
+    )
+    return And(
+        *(assoc_rel(elem[esn], assoc[amn], elem[etn]) for amn, etn in edges),
+        closed_world,
+    )
+
+
+@instrumented
 def mk_stringsym_sort_dict(
     im: IntermediateModel,
-    mm: MetaModel,
+    mm: CompiledMetaModel,
+    ctx: Optional[Context] = None,
 ) -> SortAndRefs:
-    strings = (
+    return mk_stringsym_sort_from_strings(list(get_im_strings(im, mm)), ctx)
+
+
+def get_im_strings(im: IntermediateModel, mm: CompiledMetaModel) -> set[str]:
+    """
+    The strings the StringSym sort must have values for: the string
+    attribute values of `im` and the string defaults of `mm`.
+    """
+    return (
         {
             v
             for e in im.values()
@@ -178,4 +325,3 @@ def mk_stringsym_sort_dict(
         }
         | {"SCRIPT", "IMAGE"}  # GeneratorKind values
     )
-    return mk_stringsym_sort_from_strings(list(strings))
@@ -1,54 +1,97 @@
+from collections.abc import Callable
+from itertools import chain, product
+from typing import Optional, Union
+
 from z3 import (
     And,
+    AtMost,
+    BoolRef,
     BoolSort,
+    BoolVal,
     Const,
     Consts,
+    Context,
     DatatypeSortRef,
     Exists,
     ForAll,
     FuncDeclRef,
     Function,
     Implies,
+    Not,
     Or,
     Solver,
 )
-from ..intermediate_model.types import MetaModel
-from ..intermediate_model.metamodel import get_subclasses_dict
+from ..instrumentation import instrumented
+from ..intermediate_model.doml_element import iter_im_edges
+from ..intermediate_model.types import CompiledMetaModel, IntermediateModel
+from ..intermediate_model.metamodel import (
+    get_mangled_attribute_defaults,
+)
 
 from .types import Refs, SortAndRefs
-from .utils import Iff, mk_enum_sort_dict
+from .utils import Iff, Label, assert_tracked, mk_enum_sort_dict
 
 
+@instrumented
 def mk_class_sort_dict(
-    mm: MetaModel,
+    mm: CompiledMetaModel,
+    ctx: Optional[Context] = None,
 ) -> SortAndRefs:
-    return mk_enum_sort_dict("Class", list(mm))
+    return mk_enum_sort_dict("Class", list(mm), ctx)
 
 
+@instrumented
 def mk_attribute_sort_dict(
-    mm: MetaModel,
+    mm: CompiledMetaModel,
+    ctx: Optional[Context] = None,
 ) -> SortAndRefs:
     atts = [
         f"{cname}::{aname}"
         for cname, c in mm.items()
         for aname in c.attributes
     ]
-    return mk_enum_sort_dict("Attribute", atts)
+    return mk_enum_sort_dict("Attribute", atts, ctx)
 
 
+@instrumented
 def mk_association_sort_dict(
-    mm: MetaModel,
+    mm: CompiledMetaModel,
+    ctx: Optional[Context] = None,
 ) -> SortAndRefs:
     assocs = [
         f"{cname}::{aname}"
         for cname, c in mm.items()
         for aname in c.associations
     ]
-    return mk_enum_sort_dict("Association", assocs)
+    return mk_enum_sort_dict("Association", assocs, ctx)
+
+
+def mk_attribute_rel(
+    elem_sort: DatatypeSortRef,
+    attr_sort: DatatypeSortRef,
+    AData: DatatypeSortRef,
+) -> FuncDeclRef:
+    return Function(
+        "attribute", elem_sort, attr_sort, AData, BoolSort(elem_sort.ctx)
+    )
+
+
+def mk_association_rel(
+    elem_sort: DatatypeSortRef,
+    assoc_sort: DatatypeSortRef,
+) -> FuncDeclRef:
+    return Function(
+        "association",
+        elem_sort,
+        assoc_sort,
+        elem_sort,
+        BoolSort(elem_sort.ctx),
+    )
 
 
+@instrumented
 def def_attribute_rel_and_assert_constraints(
-    mm: MetaModel,
+    mm: CompiledMetaModel,
     solver: Solver,
     attr_sort: DatatypeSortRef,
     attr: Refs,
@@ -62,8 +105,8 @@ def def_attribute_rel_and_assert_constraints(
     ### Effects
     This procedure is effectful on `solver`.
     """
-    attr_rel = Function("attribute", elem_sort, attr_sort, AData, BoolSort())
-    subclasses_dict = get_subclasses_dict(mm)
+    attr_rel = mk_attribute_rel(elem_sort, attr_sort, AData)
+    subclasses_dict = mm.subclasses
     es = Const("es", elem_sort)
     ad, ad_ = Consts("ad ad_", AData)
     # A type validity constraint is added for every attribute:
@@ -99,8 +142,10 @@ def def_attribute_rel_and_assert_constraints(
                     ),
                 ),
             )
-            solver.assert_and_track(
-                assn, f"attribute_st_types {cname}::{mm_attr.name}"
+            assert_tracked(
+                solver,
+                assn,
+                lambda: f"attribute_st_types {cname}::{mm_attr.name}",
             )
 
             # Multiplicity constraints
@@ -116,9 +161,10 @@ def def_attribute_rel_and_assert_constraints(
                         ),
                     ),
                 )
-                solver.assert_and_track(
+                assert_tracked(
+                    solver,
                     mult_lb_assn,
-                    f"attribute_mult_lb {cname}::{mm_attr.name}",
+                    lambda: f"attribute_mult_lb {cname}::{mm_attr.name}",
                 )
             if ub == "1":
                 mult_ub_assn = ForAll(
@@ -133,15 +179,17 @@ def def_attribute_rel_and_assert_constraints(
                         ad == ad_,
                     ),
                 )
-                solver.assert_and_track(
+                assert_tracked(
+                    solver,
                     mult_ub_assn,
-                    f"attribute_mult_ub {cname}::{mm_attr.name}",
+                    lambda: f"attribute_mult_ub {cname}::{mm_attr.name}",
                 )
     return attr_rel
 
 
+@instrumented
 def def_association_rel_and_assert_constraints(
-    mm: MetaModel,
+    mm: CompiledMetaModel,
     solver: Solver,
     assoc_sort: DatatypeSortRef,
     assoc: Refs,
@@ -154,10 +202,8 @@ def def_association_rel_and_assert_constraints(
     ### Effects
     This procedure is effectful on `solver`.
     """
-    assoc_rel = Function(
-        "association", elem_sort, assoc_sort, elem_sort, BoolSort()
-    )
-    subclasses_dict = get_subclasses_dict(mm)
+    assoc_rel = mk_association_rel(elem_sort, assoc_sort)
+    subclasses_dict = mm.subclasses
     es, et, et_ = Consts("es et et_", elem_sort)
     # A type validity constraint is added for every association:
     for cname, c in mm.items():
@@ -186,8 +232,10 @@ def def_association_rel_and_assert_constraints(
                     ),
                 ),
             )
-            solver.assert_and_track(
-                class_assn, f"association_st_classes {cname}::{mm_assoc.name}"
+            assert_tracked(
+                solver,
+                class_assn,
+                lambda: f"association_st_classes {cname}::{mm_assoc.name}",
             )
 
             # Multiplicity constraints
@@ -205,9 +253,10 @@ def def_association_rel_and_assert_constraints(
                         ),
                     ),
                 )
-                solver.assert_and_track(
+                assert_tracked(
+                    solver,
                     mult_lb_assn,
-                    f"association_mult_lb {cname}::{mm_assoc.name}",
+                    lambda: f"association_mult_lb {cname}::{mm_assoc.name}",
                 )
             if ub == "1":
                 mult_ub_assn = ForAll(
@@ -224,9 +273,10 @@ def def_association_rel_and_assert_constraints(
                         et == et_,
                     ),
                 )
-                solver.assert_and_track(
+                assert_tracked(
+                    solver,
                     mult_ub_assn,
-                    f"association_mult_ub {cname}::{mm_assoc.name}",
+                    lambda: f"association_mult_ub {cname}::{mm_assoc.name}",
                 )
 
     # Inverse association assertions
@@ -235,6 +285,322 @@ def def_association_rel_and_assert_constraints(
             [es, et],
             Iff(assoc_rel(es, assoc[an1], et), assoc_rel(et, assoc[an2], es)),
         )
-        solver.assert_and_track(inv_assn, f"association_inverse {an1} {an2}")
+        assert_tracked(
+            solver, inv_assn, lambda: f"association_inverse {an1} {an2}"
+        )
+
+    return assoc_rel
+
+
+def _mk_subclass_cond(
+    subclasses_dict: dict[str, set[str]],
+    im: IntermediateModel,
+    elem_class_f: FuncDeclRef,
+    class_: Refs,
+    elem: Refs,
+) -> Callable[[str, str], Union[bool, BoolRef]]:
+    """
+    Returns a function telling whether the element with the given name belongs
+    to a subclass of the given class: a `bool` for elements of `im`, whose
+    class is known, and a Z3 formula for unbound ones.
+    """
+    conds: dict[tuple[str, str], BoolRef] = {}
+
+    def subclass_cond(cname: str, ename: str) -> Union[bool, BoolRef]:
+        if (im_elem := im.get(ename)) is not None:
+            return im_elem.class_ in subclasses_dict[cname]
+        if (cond := conds.get((cname, ename))) is None:
+            cond = conds[cname, ename] = Or(
+                *(
+                    elem_class_f(elem[ename]) == class_[scname]
+                    for scname in subclasses_dict[cname]
+                )
+            )
+        return cond
+
+    return subclass_cond
+
+
+def _assert_ground(
+    solver: Solver,
+    clauses: list[Union[bool, BoolRef]],
+    label: Label,
+) -> None:
+    """
+    Asserts the conjunction of `clauses` tracked as `label`, unless it is
+    trivially true. Clauses which are Python `bool`s have been decided
+    statically.
+    """
+    if any(c is False for c in clauses):
+        assert_tracked(solver, BoolVal(False, solver.ctx), label)
+        return
+    clauses = [c for c in clauses if c is not True]
+    if clauses:
+        assert_tracked(solver, And(*clauses), label)
+
+
+@instrumented
+def def_attribute_rel_and_assert_constraints_ground(
+    mm: CompiledMetaModel,
+    solver: Solver,
+    attr_sort: DatatypeSortRef,
+    attr: Refs,
+    class_: Refs,
+    elem_class_f: FuncDeclRef,
+    elem_sort: DatatypeSortRef,
+    AData: DatatypeSortRef,
+    ss: Refs,
+    im: IntermediateModel,
+    elem: Refs,
+    unbound_elems: list[str],
+) -> FuncDeclRef:
+    """
+    Asserts the same constraints as `def_attribute_rel_and_assert_constraints`
+    under the same labels, expanded over the elements of `im` and
+    `unbound_elems` instead of quantified over the element sort.
+
+    The attributes of the elements of `im` are fixed by `assert_im_attributes`,
+    so the constraints on them are checked here, and only a violation is
+    asserted, as `False`. The constraints on unbound elements are still
+    quantified over the attribute data, since its sort is infinite.
+
+    ### Effects
+    This procedure is effectful on `solver`.
+    """
+    attr_rel = mk_attribute_rel(elem_sort, attr_sort, AData)
+    subclass_cond = _mk_subclass_cond(
+        mm.subclasses, im, elem_class_f, class_, elem
+    )
+    ad, ad_ = Consts("ad ad_", AData)
+    im_attrs = {
+        ename: get_mangled_attribute_defaults(mm, e.class_) | e.attributes
+        for ename, e in im.items()
+    }
+
+    for cname, c in mm.items():
+
+        def src_subclass_cond(ename: str) -> Union[bool, BoolRef]:
+            return subclass_cond(cname, ename)
+
+        for mm_attr in c.attributes.values():
+            amn = f"{cname}::{mm_attr.name}"
+            if mm_attr.type == "Boolean":
+                tgt_type_cond = AData.is_bool(ad)  # type: ignore
+                value_ok = lambda v: type(v) is bool  # noqa: E731
+            elif mm_attr.type == "Integer":
+                tgt_type_cond = AData.is_int(ad)  # type: ignore
+                value_ok = lambda v: type(v) is int  # noqa: E731
+            elif mm_attr.type == "String":
+                tgt_type_cond = AData.is_ss(ad)  # type: ignore
+                value_ok = lambda v: type(v) is str  # noqa: E731
+            else:  # mm_attr.type == "GeneratorKind"
+                tgt_type_cond = Or(
+                    ad == AData.ss(ss["IMAGE"]),  # type: ignore
+                    ad == AData.ss(ss["SCRIPT"]),  # type: ignore
+                )
+                value_ok = lambda v: v in ("IMAGE", "SCRIPT")  # noqa: E731
+
+            st_types: list[Union[bool, BoolRef]] = [
+                src_subclass_cond(ename) and value_ok(attrs[amn])
+                for ename, attrs in im_attrs.items()
+                if amn in attrs
+            ]
+            st_types.extend(
+                ForAll(
+                    [ad],
+                    Implies(
+                        attr_rel(elem[ubn], attr[amn], ad),
+                        And(src_subclass_cond(ubn), tgt_type_cond),
+                    ),
+                )
+                for ubn in unbound_elems
+            )
+            _assert_ground(
+                solver, st_types, lambda: f"attribute_st_types {amn}"
+            )
+
+            # Multiplicity constraints
+            lb, ub = mm_attr.multiplicity
+            if lb == "1":
+                mult_lb: list[Union[bool, BoolRef]] = [
+                    amn in attrs
+                    for ename, attrs in im_attrs.items()
+                    if src_subclass_cond(ename)
+                ]
+                mult_lb.extend(
+                    Implies(
+                        src_subclass_cond(ubn),
+                        Exists([ad], attr_rel(elem[ubn], attr[amn], ad)),
+                    )
+                    for ubn in unbound_elems
+                )
+                _assert_ground(
+                    solver, mult_lb, lambda: f"attribute_mult_lb {amn}"
+                )
+            if ub == "1":
+                # Elements of `im` have at most one value per attribute.
+                _assert_ground(
+                    solver,
+                    [
+                        ForAll(
+                            [ad, ad_],
+                            Implies(
+                                And(
+                                    attr_rel(elem[ubn], attr[amn], ad),
+                                    attr_rel(elem[ubn], attr[amn], ad_),
+                                ),
+                                ad == ad_,
+                            ),
+                        )
+                        for ubn in unbound_elems
+                    ],
+                    lambda: f"attribute_mult_ub {amn}",
+                )
+    return attr_rel
+
+
+@instrumented
+def def_association_rel_and_assert_constraints_ground(
+    mm: CompiledMetaModel,
+    solver: Solver,
+    assoc_sort: DatatypeSortRef,
+    assoc: Refs,
+    class_: Refs,
+    elem_class_f: FuncDeclRef,
+    elem_sort: DatatypeSortRef,
+    inv_assoc: list[tuple[str, str]],
+    im: IntermediateModel,
+    elem: Refs,
+    unbound_elems: list[str],
+) -> FuncDeclRef:
+    """
+    Asserts the same constraints as
+    `def_association_rel_and_assert_constraints` under the same labels, as
+    quantifier-free clauses over the elements of `im` and `unbound_elems`.
+
+    The associations between elements of `im` must be fixed by one of the
+    encodings of `im_encoding`, so the constraints on them are checked here,
+    and only a violation is asserted, as `False`. Clauses are emitted only for
+    pairs involving unbound elements, whose number is linear in the size of
+    `im`. Multiplicity upper bounds are stated with `AtMost`.
+
+    ### Effects
+    This procedure is effectful on `solver`.
+    """
+    assoc_rel = mk_association_rel(elem_sort, assoc_sort)
+    subclass_cond = _mk_subclass_cond(
+        mm.subclasses, im, elem_class_f, class_, elem
+    )
+    all_elems = list(im) + unbound_elems
+
+    im_targets: dict[tuple[str, str], list[str]] = {}
+    for esn, amn, etn in iter_im_edges(im):
+        im_targets.setdefault((esn, amn), []).append(etn)
+
+    rels: dict[tuple[str, str, str], BoolRef] = {}
+
+    def rel(esn: str, amn: str, etn: str) -> BoolRef:
+        if (r := rels.get((esn, amn, etn))) is None:
+            r = rels[esn, amn, etn] = assoc_rel(
+                elem[esn], assoc[amn], elem[etn]
+            )
+        return r
+
+    for cname, c in mm.items():
+
+        def src_subclass_cond(ename: str) -> Union[bool, BoolRef]:
+            return subclass_cond(cname, ename)
+
+        for mm_assoc in c.associations.values():
+            amn = f"{cname}::{mm_assoc.name}"
+            tcname = mm_assoc.class_
+
+            st_classes: list[Union[bool, BoolRef]] = [
+                bool(src_subclass_cond(esn))
+                and bool(subclass_cond(tcname, etn))
+                for esn in im
+                for etn in im_targets.get((esn, amn), [])
+            ]
+            # Pairs with an unbound target or source.
+            for esn, etn in chain(
+                product(im, unbound_elems), product(unbound_elems, all_elems)
+            ):
+                conds = [src_subclass_cond(esn), subclass_cond(tcname, etn)]
+                if any(cnd is False for cnd in conds):
+                    st_classes.append(Not(rel(esn, amn, etn)))
+                else:
+                    st_classes.append(
+                        Implies(
+                            rel(esn, amn, etn),
+                            And(*(cnd for cnd in conds if cnd is not True)),
+                        )
+                    )
+            _assert_ground(
+                solver, st_classes, lambda: f"association_st_classes {amn}"
+            )
+
+            # Multiplicity constraints
+            lb, ub = mm_assoc.multiplicity
+            if lb == "1":
+                mult_lb: list[Union[bool, BoolRef]] = [
+                    bool(im_targets.get((esn, amn)))
+                    or Or(
+                        *(rel(esn, amn, ubn) for ubn in unbound_elems),
+                        elem_sort.ctx,
+                    )
+                    for esn in im
+                    if src_subclass_cond(esn)
+                ]
+                mult_lb.extend(
+                    Implies(
+                        src_subclass_cond(ubn),
+                        Or(*(rel(ubn, amn, etn) for etn in all_elems)),
+                    )
+                    for ubn in unbound_elems
+                )
+                _assert_ground(
+                    solver, mult_lb, lambda: f"association_mult_lb {amn}"
+                )
+            if ub == "1":
+                mult_ub: list[Union[bool, BoolRef]] = []
+                for esn in im:
+                    n_tgts = len(im_targets.get((esn, amn), []))
+                    if n_tgts > 1:
+                        mult_ub.append(False)
+                    elif n_tgts == 1:
+                        mult_ub.extend(
+                            Not(rel(esn, amn, ubn)) for ubn in unbound_elems
+                        )
+                    elif len(unbound_elems) > 1:
+                        mult_ub.append(
+                            AtMost(
+                                *(rel(esn, amn, ubn) for ubn in unbound_elems),
+                                1,
+                            )
+                        )
+                mult_ub.extend(
+                    AtMost(*(rel(ubn, amn, etn) for etn in all_elems), 1)
+                    for ubn in unbound_elems
+                )
+                _assert_ground(
+                    solver, mult_ub, lambda: f"association_mult_ub {amn}"
+                )
+
+    # Inverse association assertions
+    for an1, an2 in inv_assoc:
+        inv: list[Union[bool, BoolRef]] = [
+            esn in im_targets.get((etn, an2), [])
+            for esn in im
+            for etn in im_targets.get((esn, an1), [])
+        ] + [
+            esn in im_targets.get((etn, an1), [])
+            for esn in im
+            for etn in im_targets.get((esn, an2), [])
+        ]
+        for ubn in unbound_elems:
+            for en in all_elems:
+                inv.append(Iff(rel(en, an1, ubn), rel(ubn, an2, en)))
+                inv.append(Iff(rel(ubn, an1, en), rel(en, an2, ubn)))
+        _assert_ground(solver, inv, lambda: f"association_inverse {an1} {an2}")
 
     return assoc_rel
@@ -0,0 +1,152 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+from z3 import (
+    Z3_OP_UNINTERPRETED,
+    Bool,
+    BoolRef,
+    Context,
+    Implies,
+    Not,
+    Solver,
+    is_const,
+    is_implies,
+    set_param,
+    unsat,
+)
+
+from ..intermediate_model.types import IntermediateModel, MetaModel
+
+from .check import CheckResult, Requirement
+from .encoding import Encoding, EncodingOptions, encode_doml_model
+
+
+@dataclass
+class RequirementResult:
+    name: str
+    check_result: CheckResult
+    # The statistics of the solver which checked the requirement.
+    statistics: dict[str, float]
+
+
+def serialize_requirement_checks(
+    enc: Encoding, requirements: list[Requirement]
+) -> str:
+    """
+    Serializes `enc` and `requirements` as an SMT-LIB script in which each
+    requirement is asserted under a literal named after it, so that the
+    requirements can be checked one by one by loading the script once.
+    """
+    solver = Solver(ctx=enc.solver.ctx)
+    solver.add(enc.solver.assertions())
+    for req in requirements:
+        solver.add(Implies(Bool(req.name, solver.ctx), req.formula(enc)))
+    return solver.sexpr()
+
+
+def load_requirement_checks(
+    text: str, ctx: Context
+) -> tuple[list[BoolRef], list[BoolRef]]:
+    """
+    Parses a script made by `serialize_requirement_checks` in `ctx`, giving
+    its assertions and the literals guarding them, i.e., the requirement
+    literals and the labels of tracked assertions.
+    """
+    solver = Solver(ctx=ctx)
+    solver.from_string(text)
+    assertions = list(solver.assertions())
+    # Tracked assertions, like requirements, are serialized as implications
+    # from their label.
+    guards = [
+        assn.arg(0)
+        for assn in assertions
+        if is_implies(assn)
+        and is_const(assn.arg(0))
+        and assn.arg(0).decl().kind() == Z3_OP_UNINTERPRETED
+    ]
+    return assertions, guards
+
+
+# The script loaded by the worker process, with its guard literals.
+_worker_script: Optional[tuple[Context, list[BoolRef], list[BoolRef]]] = None
+
+
+def _init_worker(text: str, seed: int) -> None:
+    global _worker_script
+    set_param("smt.random_seed", seed, "sat.random_seed", seed)
+    ctx = Context()
+    _worker_script = (ctx, *load_requirement_checks(text, ctx))
+
+
+def _check_requirement(
+    name: str, req_names: list[str]
+) -> tuple[CheckResult, dict[str, float]]:
+    assert _worker_script is not None
+    ctx, assertions, guards = _worker_script
+    solver = Solver(ctx=ctx)
+    solver.add(assertions)
+    others = set(req_names).difference([name])
+    assumptions = []
+    for guard in guards:
+        if guard.decl().name() in others:
+            solver.add(Not(guard))
+        else:
+            assumptions.append(guard)
+
+    result = solver.check(*assumptions)
+    stats = solver.statistics()
+    statistics = {key: stats.get_key_value(key) for key in stats.keys()}
+    if result != unsat:
+        return CheckResult(result), statistics
+    return (
+        CheckResult(result, [str(label) for label in solver.unsat_core()]),
+        statistics,
+    )
+
+
+def check_requirements_parallel(
+    im: IntermediateModel,
+    mm: MetaModel,
+    inv_assoc: list[tuple[str, str]],
+    unbound_elems: list[str] = [],
+    requirements: list[Requirement] = [],
+    options: Optional[EncodingOptions] = None,
+    processes: Optional[int] = None,
+    seed: int = 0,
+) -> list[RequirementResult]:
+    """
+    Checks whether `im`, extended with `unbound_elems`, can satisfy the
+    metamodel together with each of `requirements`, one at a time.
+
+    The model is encoded once and serialized with
+    `serialize_requirement_checks`; then each requirement is checked on a
+    pool of `processes` processes (by default, one per CPU), each of which
+    loads the script once and checks a requirement at a time on a new
+    solver, assuming its literal and the negation of the others.
+
+    The results are in the order of `requirements`, and do not depend on
+    the number of processes, since every solver starts from the same script
+    with its random seeds set to `seed`. If a result is `unsat`, its core
+    names the requirement, if it is involved, and, if `options.track` is
+    set, the assertions of the model involved.
+    """
+    if options is None:
+        options = EncodingOptions()
+    enc = encode_doml_model(
+        im, mm, inv_assoc, unbound_elems, options, requirements=requirements
+    )
+    text = serialize_requirement_checks(enc, requirements)
+    req_names = [req.name for req in requirements]
+
+    with ProcessPoolExecutor(
+        max_workers=processes, initializer=_init_worker, initargs=(text, seed)
+    ) as executor:
+        futures = [
+            executor.submit(_check_requirement, name, req_names)
+            for name in req_names
+        ]
+        return [
+            RequirementResult(name, *future.result())
+            for name, future in zip(req_names, futures)
+        ]
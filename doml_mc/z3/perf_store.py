@@ -0,0 +1,323 @@
+"""
+A store of performance records of checks, in an SQLite database, so that
+solving times and Z3 statistics can be correlated with the features of the
+models checked, across processes and over time.
+
+Query it with `python -m doml_mc.z3.perf_store <database> trends` or
+`outliers`; see `--help`.
+"""
+import argparse
+import hashlib
+import json
+import sqlite3
+import statistics
+import time
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from z3 import Solver
+
+from ..intermediate_model.types import IntermediateModel
+
+from .encoding import EncodingOptions
+
+
+@dataclass
+class PerfRecord:
+    # Seconds since the epoch.
+    timestamp: float
+    # See `im_fingerprint`.
+    fingerprint: str
+    elements: int
+    associations: int
+    attributes: int
+    unbound_elems: int
+    options: EncodingOptions
+    requirements: list[str]
+    result: str
+    # Wall time of the check, in seconds.
+    time: float
+    # All the statistics of the solver after the check.
+    statistics: dict[str, float]
+
+
+def z3_statistics(solver: Solver) -> dict[str, float]:
+    stats = solver.statistics()
+    return {key: stats.get_key_value(key) for key in stats.keys()}
+
+
+def im_fingerprint(im: IntermediateModel) -> str:
+    """A digest of `im` which does not depend on the order of its elements."""
+    h = hashlib.sha256()
+    for ename in sorted(im):
+        e = im[ename]
+        h.update(
+            json.dumps(
+                [
+                    ename,
+                    e.class_,
+                    sorted(e.attributes.items()),
+                    sorted(
+                        (amn, sorted(etns))
+                        for amn, etns in e.associations.items()
+                    ),
+                ]
+            ).encode()
+        )
+    return h.hexdigest()
+
+
+def mk_perf_record(
+    im: IntermediateModel,
+    unbound_elems: list[str],
+    options: EncodingOptions,
+    requirements: list[str],
+    result: str,
+    check_time: float,
+    solver: Solver,
+) -> PerfRecord:
+    return PerfRecord(
+        timestamp=time.time(),
+        fingerprint=im_fingerprint(im),
+        elements=len(im),
+        associations=sum(
+            len(etns) for e in im.values() for etns in e.associations.values()
+        ),
+        attributes=sum(len(e.attributes) for e in im.values()),
+        unbound_elems=len(unbound_elems),
+        options=options,
+        requirements=requirements,
+        result=result,
+        time=check_time,
+        statistics=z3_statistics(solver),
+    )
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checks (
+    id INTEGER PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    fingerprint TEXT NOT NULL,
+    elements INTEGER NOT NULL,
+    associations INTEGER NOT NULL,
+    attributes INTEGER NOT NULL,
+    unbound_elems INTEGER NOT NULL,
+    options TEXT NOT NULL,
+    requirements TEXT NOT NULL,
+    result TEXT NOT NULL,
+    time REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS statistics (
+    check_id INTEGER NOT NULL REFERENCES checks (id),
+    key TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (check_id, key)
+);
+"""
+
+
+class PerfStore:
+    """
+    Performance records in the SQLite database at `path`, in the table
+    "checks", with their Z3 statistics in the table "statistics", one row
+    per key, so that they can be queried in SQL too.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "PerfStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def append(self, rec: PerfRecord) -> None:
+        with self.conn:
+            cur = self.conn.execute(
+                "INSERT INTO checks (timestamp, fingerprint, elements,"
+                " associations, attributes, unbound_elems, options,"
+                " requirements, result, time)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    rec.timestamp,
+                    rec.fingerprint,
+                    rec.elements,
+                    rec.associations,
+                    rec.attributes,
+                    rec.unbound_elems,
+                    json.dumps(asdict(rec.options), sort_keys=True),
+                    json.dumps(rec.requirements),
+                    rec.result,
+                    rec.time,
+                ),
+            )
+            self.conn.executemany(
+                "INSERT INTO statistics (check_id, key, value)"
+                " VALUES (?, ?, ?)",
+                [
+                    (cur.lastrowid, key, value)
+                    for key, value in rec.statistics.items()
+                ],
+            )
+
+    def records(self, fingerprint: Optional[str] = None) -> list[PerfRecord]:
+        """
+        The records, only those of the model with `fingerprint` if given,
+        oldest first.
+        """
+        rows = self.conn.execute(
+            "SELECT id, timestamp, fingerprint, elements, associations,"
+            " attributes, unbound_elems, options, requirements, result, time"
+            " FROM checks"
+            + (" WHERE fingerprint = ?" if fingerprint is not None else "")
+            + " ORDER BY timestamp",
+            () if fingerprint is None else (fingerprint,),
+        ).fetchall()
+        stats: dict[int, dict[str, float]] = {}
+        for check_id, key, value in self.conn.execute(
+            "SELECT check_id, key, value FROM statistics"
+        ):
+            stats.setdefault(check_id, {})[key] = value
+        return [
+            PerfRecord(
+                timestamp=row[1],
+                fingerprint=row[2],
+                elements=row[3],
+                associations=row[4],
+                attributes=row[5],
+                unbound_elems=row[6],
+                options=EncodingOptions(**json.loads(row[7])),
+                requirements=json.loads(row[8]),
+                result=row[9],
+                time=row[10],
+                statistics=stats.get(row[0], {}),
+            )
+            for row in rows
+        ]
+
+
+def _value(rec: PerfRecord, key: str) -> Optional[float]:
+    return rec.time if key == "time" else rec.statistics.get(key)
+
+
+def _groups(
+    records: list[PerfRecord],
+) -> dict[tuple[str, str, int, str], list[PerfRecord]]:
+    """
+    The records grouped by problem: model, options, number of unbound
+    elements and requirements.
+    """
+    groups: dict[tuple[str, str, int, str], list[PerfRecord]] = {}
+    for rec in records:
+        groups.setdefault(
+            (
+                rec.fingerprint,
+                json.dumps(asdict(rec.options), sort_keys=True),
+                rec.unbound_elems,
+                json.dumps(rec.requirements),
+            ),
+            [],
+        ).append(rec)
+    return groups
+
+
+def trends(
+    records: list[PerfRecord], key: str = "time"
+) -> list[tuple[PerfRecord, int, float, float]]:
+    """
+    For each problem, its latest record, the number of records, the median
+    of `key`, a Z3 statistic or "time", over them, and the ratio of the
+    latest value to that median.
+    """
+    rows = []
+    for recs in _groups(records).values():
+        values = [v for rec in recs if (v := _value(rec, key)) is not None]
+        if not values:
+            continue
+        median = statistics.median(values)
+        latest = _value(recs[-1], key)
+        rows.append(
+            (
+                recs[-1],
+                len(recs),
+                median,
+                latest / median if latest is not None and median else 1.0,
+            )
+        )
+    return rows
+
+
+def outliers(
+    records: list[PerfRecord], key: str = "time", factor: float = 3.0
+) -> list[tuple[PerfRecord, float]]:
+    """
+    The records whose `key` is more than `factor` times the median over the
+    records of the same problem, or of the problems with the same number of
+    elements, if there are fewer than three, with that median.
+    """
+    by_size: dict[int, list[float]] = {}
+    for rec in records:
+        if (v := _value(rec, key)) is not None:
+            by_size.setdefault(rec.elements, []).append(v)
+    found = []
+    for recs in _groups(records).values():
+        values = [v for rec in recs if (v := _value(rec, key)) is not None]
+        for rec in recs:
+            if (v := _value(rec, key)) is None:
+                continue
+            median = statistics.median(
+                values if len(values) >= 3 else by_size[rec.elements]
+            )
+            if median and v > factor * median:
+                found.append((rec, median))
+    return found
+
+
+def _describe(rec: PerfRecord) -> str:
+    return (
+        f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(rec.timestamp))}"
+        f" {rec.fingerprint[:12]} {rec.elements:>6} {rec.associations:>6}"
+        f" {rec.unbound_elems:>3} {rec.options.associations:>10}"
+        f" {rec.options.metamodel:>10} {rec.result:>7}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("database")
+    parser.add_argument("command", choices=["trends", "outliers"])
+    parser.add_argument(
+        "--key",
+        default="time",
+        help='"time", for the wall time, or a Z3 statistic',
+    )
+    parser.add_argument("--factor", type=float, default=3.0)
+    parser.add_argument("--fingerprint")
+    args = parser.parse_args()
+
+    with PerfStore(args.database) as store:
+        records = store.records(args.fingerprint)
+    header = (
+        f"{'latest':>16} {'fingerprint':>12} {'elems':>6} {'assocs':>6}"
+        f" {'unb':>3} {'assoc enc':>10} {'mm enc':>10} {'result':>7}"
+    )
+    if args.command == "trends":
+        print(f"{header} {'checks':>6} {'median':>10} {'latest/med':>10}")
+        for rec, n, median, ratio in trends(records, args.key):
+            print(f"{_describe(rec)} {n:>6} {median:>10.3f} {ratio:>10.2f}")
+    else:  # args.command == "outliers"
+        print(f"{header} {args.key:>10} {'median':>10}")
+        for rec, median in outliers(records, args.key, args.factor):
+            print(
+                f"{_describe(rec)} {_value(rec, args.key):>10.3f}"
+                f" {median:>10.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import multiprocessing
+import queue
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Optional, Union
+
+from z3 import Context, Solver, Tactic, set_param, unknown, unsat
+
+from ..intermediate_model.types import IntermediateModel, MetaModel
+
+from .check import CheckResult, Requirement
+from .encoding import EncodingOptions, encode_doml_model
+from .parallel import load_requirement_checks, serialize_requirement_checks
+
+
+@dataclass(frozen=True)
+class SolverConfig:
+    name: str
+    # Global Z3 parameters, e.g., {"smt.mbqi": False}.
+    params: dict[str, Union[bool, int, float, str]] = field(
+        default_factory=dict
+    )
+    # The name of a tactic to build the solver from, instead of `Solver`.
+    tactic: Optional[str] = None
+
+
+DEFAULT_PORTFOLIO = [
+    SolverConfig("default"),
+    # Without MBQI, only `unsat` can be definitive, but it may come sooner.
+    SolverConfig("ematching", {"smt.mbqi": False}),
+    SolverConfig("mbqi", {"smt.ematching": False}),
+    SolverConfig("no_auto_config", {"auto_config": False}),
+    SolverConfig("seed_1", {"smt.random_seed": 1, "sat.random_seed": 1}),
+]
+
+
+# Seconds between checks for processes which died without a result.
+_POLL_INTERVAL = 0.1
+
+
+@dataclass
+class PortfolioResult:
+    # The configuration which gave the result, or `None` if none of them
+    # gave a definitive one.
+    config: Optional[str]
+    check_result: CheckResult
+    # Wall clock time, in seconds, from starting the configurations.
+    time: float
+
+
+def _run_config(
+    text: str, config: SolverConfig, index: int, results: multiprocessing.Queue
+) -> None:
+    try:
+        for key, value in config.params.items():
+            set_param(key, value)
+        ctx = Context()
+        assertions, guards = load_requirement_checks(text, ctx)
+        solver = (
+            Solver(ctx=ctx)
+            if config.tactic is None
+            else Tactic(config.tactic, ctx).solver()
+        )
+        solver.add(assertions)
+        result = solver.check(*guards)
+        if result != unsat:
+            results.put((index, CheckResult(result)))
+        else:
+            results.put(
+                (
+                    index,
+                    CheckResult(
+                        result, [str(label) for label in solver.unsat_core()]
+                    ),
+                )
+            )
+    except Exception:
+        results.put((index, CheckResult(unknown)))
+
+
+def check_doml_model_portfolio(
+    im: IntermediateModel,
+    mm: MetaModel,
+    inv_assoc: list[tuple[str, str]],
+    unbound_elems: list[str] = [],
+    requirements: list[Requirement] = [],
+    options: Optional[EncodingOptions] = None,
+    portfolio: list[SolverConfig] = DEFAULT_PORTFOLIO,
+    timeout: Optional[float] = None,
+    log_path: Optional[str] = None,
+) -> PortfolioResult:
+    """
+    Checks whether `im`, extended with `unbound_elems`, can satisfy the
+    metamodel and `requirements`, racing the configurations of `portfolio`,
+    each in a process of its own, on the same encoding (see
+    `serialize_requirement_checks`). The first `sat` or `unsat` result wins,
+    and the other processes are terminated; so are all of them after
+    `timeout` seconds, if given, giving an `unknown` result. A process which
+    dies without a result, e.g., killed by a crash in Z3, counts as giving
+    `unknown`.
+
+    If `log_path` is given, a JSON line recording the problem, the winning
+    configuration and the time is appended to it, for `portfolio_wins`.
+    """
+    if options is None:
+        options = EncodingOptions()
+    enc = encode_doml_model(
+        im, mm, inv_assoc, unbound_elems, options, requirements=requirements
+    )
+    text = serialize_requirement_checks(enc, requirements)
+
+    results: multiprocessing.Queue = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(
+            target=_run_config, args=(text, config, i, results), daemon=True
+        )
+        for i, config in enumerate(portfolio)
+    ]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    winner: Optional[str] = None
+    check_result = CheckResult(unknown)
+    pending = set(range(len(processes)))
+    try:
+        while pending:
+            remaining = (
+                None
+                if timeout is None
+                else timeout - (time.perf_counter() - start)
+            )
+            if remaining is not None and remaining <= 0:
+                break
+            try:
+                index, result = results.get(
+                    timeout=_POLL_INTERVAL
+                    if remaining is None
+                    else min(_POLL_INTERVAL, remaining)
+                )
+            except queue.Empty:
+                # A process killed in native code, e.g., by a crash or by
+                # running out of memory, never posts a result, and counts as
+                # giving `unknown`. The others post before exiting normally.
+                pending -= {
+                    i
+                    for i in pending
+                    if processes[i].exitcode not in (None, 0)
+                }
+                continue
+            pending.discard(index)
+            if result.result != unknown:
+                winner = portfolio[index].name
+                check_result = result
+                break
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+    elapsed = time.perf_counter() - start
+
+    if log_path is not None:
+        with open(log_path, "a") as logf:
+            record = {
+                "problem": hashlib.sha256(text.encode()).hexdigest(),
+                "portfolio": [config.name for config in portfolio],
+                "winner": winner,
+                "result": str(check_result.result),
+                "time": elapsed,
+            }
+            logf.write(json.dumps(record) + "\n")
+    return PortfolioResult(winner, check_result, elapsed)
+
+
+def portfolio_wins(log_path: str) -> Counter[str]:
+    """
+    How many times each configuration won in the log written by
+    `check_doml_model_portfolio` at `log_path`.
+    """
+    with open(log_path) as logf:
+        return Counter(
+            record["winner"]
+            for record in map(json.loads, logf)
+            if record["winner"] is not None
+        )
@@ -0,0 +1,297 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from z3 import And, Bool, BoolRef, ExprRef, Implies, Not, unsat
+
+from ..intermediate_model.doml_element import iter_im_edges
+from ..intermediate_model.metamodel import compile_metamodel
+from ..intermediate_model.types import IntermediateModel, MetaModel
+
+from .check import CheckResult, Requirement
+from .encoding import Encoding
+from .im_encoding import (
+    get_im_strings,
+    mk_im_associations_sparse_assn,
+    mk_im_attributes_assn,
+)
+from .solver_pool import (
+    FIXED_STRINGS,
+    SlotBase,
+    capacity_for,
+    mk_closed_sort_assn,
+    mk_slot_base,
+)
+
+
+@dataclass
+class SessionUpdate:
+    """How much of the encoding an update of a `CheckSession` reused."""
+
+    # Elements whose assertions were kept as they were.
+    reused: int
+    # Elements whose assertions were added, new and changed ones.
+    asserted: int
+    # Elements whose assertions were retracted, changed and removed ones.
+    retracted: int
+    # Whether the session started over on a new solver, reusing nothing.
+    rebuilt: bool
+
+    @property
+    def reused_ratio(self) -> float:
+        total = self.reused + self.asserted
+        return self.reused / total if total else 1.0
+
+
+class CheckSession:
+    """
+    Keeps a model encoded in a solver across edits, so that re-checking it
+    only costs asserting the elements that changed.
+
+    Elements are bound to slots of a `SlotBase`. The assertions about each
+    element, i.e., its class, attribute values and associations (encoded as
+    with `EncodingOptions.associations == "sparse"`), form a group which is
+    asserted under a guard literal, and the solver is checked assuming the
+    guards of the current groups. A group is retracted by asserting the
+    negation of its guard. The closure of the Element and StringSym sorts
+    is guarded likewise, as it changes whenever elements or strings do.
+
+    Retracted groups stay in the solver, so it is rebuilt when they
+    outnumber the current ones, or when the model outgrows the capacity of
+    the slots.
+    """
+
+    def __init__(
+        self,
+        mm: MetaModel,
+        inv_assoc: list[tuple[str, str]],
+        unbound_elems: list[str] = [],
+        track: bool = False,
+    ) -> None:
+        self.mm = compile_metamodel(mm)
+        self.inv_assoc = inv_assoc
+        self.unbound_elems = unbound_elems
+        self.track = track
+        self._base: Optional[SlotBase] = None
+        self._im: IntermediateModel = {}
+
+    def _reset(self, im: IntermediateModel) -> None:
+        n_elems = len(im) + len(self.unbound_elems)
+        n_strings = len(get_im_strings(im, self.mm))
+        self._base = mk_slot_base(
+            self.mm,
+            self.inv_assoc,
+            capacity_for(n_elems),
+            capacity_for(n_strings),
+            self.track,
+        )
+        self._im = {}
+        self._elem: dict[str, ExprRef] = dict(
+            zip(self.unbound_elems, self._base.elem_slots)
+        )
+        self._free_elem_slots = self._base.elem_slots[
+            len(self.unbound_elems) :
+        ][::-1]
+        self._ss: dict[str, ExprRef] = dict(
+            zip(FIXED_STRINGS, self._base.ss_slots)
+        )
+        self._free_ss_slots = self._base.ss_slots[len(FIXED_STRINGS) :][::-1]
+        # Guards of the current groups, by element name.
+        self._guards: dict[str, BoolRef] = {}
+        self._domain_guard: Optional[BoolRef] = None
+        self._n_retracted = 0
+        self._n_guards = 0
+
+    @property
+    def base(self) -> SlotBase:
+        if self._base is None:
+            raise RuntimeError("The session has no model yet.")
+        return self._base
+
+    def _new_guard(self, label: str) -> BoolRef:
+        self._n_guards += 1
+        return Bool(f"{label} #{self._n_guards}", self.base.solver.ctx)
+
+    def _retract(self, guard: BoolRef) -> None:
+        self.base.solver.add(Not(guard))
+        self._n_retracted += 1
+
+    @property
+    def encoding(self) -> Encoding:
+        """
+        The encoding of the current model. Its solver must be checked
+        assuming `self.assumptions()`.
+        """
+        base = self.base
+        return Encoding(
+            solver=base.solver,
+            unbound_elems=self.unbound_elems,
+            class_sort=base.class_sort,
+            class_=base.class_,
+            assoc_sort=base.assoc_sort,
+            assoc=base.assoc,
+            attr_sort=base.attr_sort,
+            attr=base.attr,
+            elem_sort=base.elem_sort,
+            elem=self._elem,
+            ss_sort=base.ss_sort,
+            ss=self._ss,
+            AData=base.AData,
+            elem_class_f=base.elem_class_f,
+            attr_rel=base.attr_rel,
+            assoc_rel=base.assoc_rel,
+        )
+
+    def assumptions(self) -> list[BoolRef]:
+        guards = list(self._guards.values())
+        if self._domain_guard is not None:
+            guards.append(self._domain_guard)
+        return guards
+
+    def update(self, im: IntermediateModel) -> SessionUpdate:
+        """
+        Makes `im` the model of the session, asserting only the elements
+        that differ from the previous one.
+
+        `im` must have gone through `reciprocate_inverse_associations`, and
+        must not be mutated afterwards, since the session keeps it to diff it
+        against the next one.
+
+        ### Effects
+        This procedure is effectful on the session.
+        """
+        strings = get_im_strings(im, self.mm)
+        rebuilt = (
+            self._base is None
+            or len(im) + len(self.unbound_elems) > len(self._base.elem_slots)
+            or len(strings) > len(self._base.ss_slots)
+            or self._n_retracted > max(len(self._guards), 64)
+        )
+        if rebuilt:
+            self._reset(im)
+        old_im = self._im
+        base = self.base
+        domain_changed = self._domain_guard is None
+
+        retracted = 0
+        for ename, old_e in old_im.items():
+            if (e := im.get(ename)) is not None and e == old_e:
+                continue
+            self._retract(self._guards.pop(ename))
+            retracted += 1
+            if e is None:
+                self._free_elem_slots.append(self._elem.pop(ename))
+                domain_changed = True
+
+        changed = [
+            ename
+            for ename, e in im.items()
+            if ename not in old_im or old_im[ename] != e
+        ]
+        for ename in changed:
+            if ename not in self._elem:
+                self._elem[ename] = self._free_elem_slots.pop()
+                domain_changed = True
+
+        for s in list(self._ss):
+            if s not in strings:
+                self._free_ss_slots.append(self._ss.pop(s))
+                domain_changed = True
+        for s in strings:
+            if s not in self._ss:
+                self._ss[s] = self._free_ss_slots.pop()
+                domain_changed = True
+
+        if domain_changed:
+            if self._domain_guard is not None:
+                self._retract(self._domain_guard)
+            self._domain_guard = self._new_guard("domain")
+            base.solver.add(
+                Implies(
+                    self._domain_guard,
+                    And(
+                        mk_closed_sort_assn(
+                            base.elem_sort, list(self._elem.values())
+                        ),
+                        mk_closed_sort_assn(
+                            base.ss_sort, list(self._ss.values())
+                        ),
+                    ),
+                )
+            )
+
+        self._assert_elements(im, changed)
+        self._im = im
+        return SessionUpdate(
+            reused=len(im) - len(changed),
+            asserted=len(changed),
+            retracted=retracted,
+            rebuilt=rebuilt,
+        )
+
+    def _assert_elements(
+        self, im: IntermediateModel, enames: list[str]
+    ) -> None:
+        base = self.base
+        out_edges: dict[str, list[tuple[str, str]]] = {
+            ename: [] for ename in enames
+        }
+        for esn, amn, etn in iter_im_edges(
+            {ename: im[ename] for ename in enames}
+        ):
+            out_edges[esn].append((amn, etn))
+        unbound_refs = [self._elem[ubn] for ubn in self.unbound_elems]
+
+        for ename in enames:
+            e = im[ename]
+            guard = self._guards[ename] = self._new_guard(f"element {ename}")
+            group = And(
+                base.elem_class_f(self._elem[ename]) == base.class_[e.class_],
+                mk_im_attributes_assn(
+                    base.attr_rel,
+                    self.mm,
+                    ename,
+                    e,
+                    self._elem,
+                    base.attr_sort,
+                    base.attr,
+                    base.AData,
+                    self._ss,
+                ),
+                mk_im_associations_sparse_assn(
+                    base.assoc_rel,
+                    ename,
+                    out_edges[ename],
+                    base.elem_sort,
+                    self._elem,
+                    base.assoc_sort,
+                    base.assoc,
+                    unbound_refs,
+                ),
+            )
+            base.solver.add(Implies(guard, group))
+
+    def check(self, requirements: list[Requirement] = []) -> CheckResult:
+        """
+        Checks the current model against the metamodel and `requirements`.
+        If the result is `unsat`, the core names the element groups (as
+        "element <name> #<n>"), the closure of the sorts ("domain #<n>") and
+        the requirements involved, and, if the session is tracked, the
+        metamodel constraints.
+        """
+        solver = self.base.solver
+        enc = self.encoding
+        solver.push()
+        try:
+            req_guards = []
+            for req in requirements:
+                guard = Bool(req.name, solver.ctx)
+                solver.add(Implies(guard, req.formula(enc)))
+                req_guards.append(guard)
+            result = solver.check(*self.assumptions(), *req_guards)
+            if result != unsat:
+                return CheckResult(result)
+            return CheckResult(
+                result, [str(label) for label in solver.unsat_core()]
+            )
+        finally:
+            solver.pop()
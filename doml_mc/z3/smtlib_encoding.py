@@ -0,0 +1,510 @@
+from collections.abc import Iterable
+from dataclasses import dataclass
+from io import StringIO
+from itertools import product
+from typing import Optional, TextIO, Union
+
+from z3 import (
+    AstVector,
+    DatatypeSortRef,
+    FuncDeclRef,
+    Function,
+    Solver,
+    parse_smt2_string,
+)
+
+from ..instrumentation import instrumented
+from ..intermediate_model.doml_element import iter_im_edges
+from ..intermediate_model.metamodel import (
+    get_mangled_attribute_defaults,
+)
+from ..intermediate_model.types import CompiledMetaModel, IntermediateModel
+
+from .metamodel_encoding import mk_association_rel, mk_attribute_rel
+from .types import AssociationsEncoding, Refs
+from .utils import Label, UntrackedSolver
+
+# Names of the bound variables. Constants with the same names would be
+# shadowed by them, so they are rejected by `_quote_all`.
+_VARS = {"?es", "?et", "?et_", "?ad", "?ad_", "?a", "?d", "?t"}
+
+
+def _quote(sym: str) -> str:
+    if "|" in sym or "\\" in sym:
+        raise ValueError(f"Cannot write {sym!r} as an SMT-LIB2 symbol.")
+    return f"|{sym}|"
+
+
+def _quote_all(syms: Iterable[str]) -> dict[str, str]:
+    quoted = {sym: _quote(sym) for sym in syms}
+    if clashes := _VARS & quoted.keys():
+        raise ValueError(
+            f"Symbols {sorted(clashes)} clash with SMT-LIB2 variable names."
+        )
+    return quoted
+
+
+def _or(terms: list[str]) -> str:
+    if not terms:
+        return "false"
+    return terms[0] if len(terms) == 1 else f"(or {' '.join(terms)})"
+
+
+def _and(terms: list[str]) -> str:
+    if not terms:
+        return "true"
+    return terms[0] if len(terms) == 1 else f"(and {' '.join(terms)})"
+
+
+# Aliases of the `StringSym` values of the GeneratorKind values, whose names
+# depend on the strings of each model, so that the metamodel constraints do
+# not. `write_doml_model_smtlib` defines them.
+_IMAGE = "|GeneratorKind::IMAGE|"
+_SCRIPT = "|GeneratorKind::SCRIPT|"
+
+
+def _quote_metamodel(
+    mm: CompiledMetaModel,
+) -> tuple[dict[str, str], dict[str, str], dict[str, str]]:
+    class_ = _quote_all(mm)
+    attr = _quote_all(
+        f"{cname}::{aname}"
+        for cname, c in mm.items()
+        for aname in c.attributes
+    )
+    assoc = _quote_all(
+        f"{cname}::{aname}"
+        for cname, c in mm.items()
+        for aname in c.associations
+    )
+    return class_, attr, assoc
+
+
+class SMTLibWriter:
+    """
+    Writes assertions as SMT-LIB2 text to `out`. If `track` is set, they are
+    named with their labels, which are also collected in `labels`, in the
+    same order, since Z3 does not track named assertions it parses.
+    """
+
+    __slots__ = ("out", "track", "labels")
+
+    def __init__(self, out: TextIO, track: bool = False) -> None:
+        self.out = out
+        self.track = track
+        self.labels: list[str] = []
+
+    def assert_(self, term: str, label: Label) -> None:
+        if self.track:
+            label = label if type(label) is str else label()
+            self.labels.append(label)
+            self.out.write(f"(assert (! {term} :named {_quote(label)}))\n")
+        else:
+            self.out.write(f"(assert {term})\n")
+
+    def write_template(self, template: "MetaModelTemplate") -> None:
+        if self.track:
+            self.labels.extend(template.labels)
+            self.out.write(template.tracked_text)
+        else:
+            self.out.write(template.text)
+
+
+@dataclass(frozen=True)
+class MetaModelTemplate:
+    """
+    The metamodel constraints of the "quantified" metamodel encoding as
+    SMT-LIB2 assertions, which are the same for every model: `text` asserts
+    them, `tracked_text` asserts them named with `labels`.
+
+    They refer to the sorts, functions and values declared by
+    `write_doml_model_smtlib` by name, and to the GeneratorKind values through
+    aliases, so that they can be instantiated in any context, see
+    `assert_metamodel_template`.
+    """
+
+    text: str
+    tracked_text: str
+    labels: list[str]
+
+
+def write_metamodel_constraints_smtlib(
+    writer: SMTLibWriter,
+    mm: CompiledMetaModel,
+    inv_assoc: list[tuple[str, str]],
+) -> None:
+    """
+    Writes the assertions of `def_attribute_rel_and_assert_constraints` and
+    `def_association_rel_and_assert_constraints`, under the same labels.
+
+    ### Effects
+    This procedure is effectful on `writer`.
+    """
+    class_, attr, assoc = _quote_metamodel(mm)
+    subclasses_dict = mm.subclasses
+
+    def subclass_cond(cname: str, var: str) -> str:
+        return _or(
+            [
+                f"(= (elem_class {var}) {class_[scname]})"
+                for scname in subclasses_dict[cname]
+            ]
+        )
+
+    # Metamodel constraints on attributes
+    for cname, c in mm.items():
+        src_subclass_cond = subclass_cond(cname, "?es")
+        for mm_attr in c.attributes.values():
+            amn = f"{cname}::{mm_attr.name}"
+            if mm_attr.type == "Boolean":
+                tgt_type_cond = "((_ is bool) ?ad)"
+            elif mm_attr.type == "Integer":
+                tgt_type_cond = "((_ is int) ?ad)"
+            elif mm_attr.type == "String":
+                tgt_type_cond = "((_ is ss) ?ad)"
+            else:  # mm_attr.type == "GeneratorKind"
+                tgt_type_cond = (
+                    f"(or (= ?ad (ss {_IMAGE}))" f" (= ?ad (ss {_SCRIPT})))"
+                )
+            writer.assert_(
+                "(forall ((?es Element) (?ad AttributeData))"
+                f" (=> (attribute ?es {attr[amn]} ?ad)"
+                f" (and {src_subclass_cond} {tgt_type_cond})))",
+                lambda: f"attribute_st_types {amn}",
+            )
+
+            # Multiplicity constraints
+            lb, ub = mm_attr.multiplicity
+            if lb == "1":
+                writer.assert_(
+                    f"(forall ((?es Element)) (=> {src_subclass_cond}"
+                    " (exists ((?ad AttributeData))"
+                    f" (attribute ?es {attr[amn]} ?ad))))",
+                    lambda: f"attribute_mult_lb {amn}",
+                )
+            if ub == "1":
+                writer.assert_(
+                    "(forall ((?es Element) (?ad AttributeData)"
+                    " (?ad_ AttributeData))"
+                    f" (=> (and (attribute ?es {attr[amn]} ?ad)"
+                    f" (attribute ?es {attr[amn]} ?ad_)) (= ?ad ?ad_)))",
+                    lambda: f"attribute_mult_ub {amn}",
+                )
+
+    # Metamodel constraints on associations
+    for cname, c in mm.items():
+        src_subclass_cond = subclass_cond(cname, "?es")
+        for mm_assoc in c.associations.values():
+            amn = f"{cname}::{mm_assoc.name}"
+            tgt_subclass_cond = subclass_cond(mm_assoc.class_, "?et")
+            writer.assert_(
+                "(forall ((?es Element) (?et Element))"
+                f" (=> (association ?es {assoc[amn]} ?et)"
+                f" (and {src_subclass_cond} {tgt_subclass_cond})))",
+                lambda: f"association_st_classes {amn}",
+            )
+
+            # Multiplicity constraints
+            lb, ub = mm_assoc.multiplicity
+            if lb == "1":
+                writer.assert_(
+                    f"(forall ((?es Element)) (=> {src_subclass_cond}"
+                    " (exists ((?et Element))"
+                    f" (association ?es {assoc[amn]} ?et))))",
+                    lambda: f"association_mult_lb {amn}",
+                )
+            if ub == "1":
+                writer.assert_(
+                    "(forall ((?es Element) (?et Element) (?et_ Element))"
+                    f" (=> (and (association ?es {assoc[amn]} ?et)"
+                    f" (association ?es {assoc[amn]} ?et_)) (= ?et ?et_)))",
+                    lambda: f"association_mult_ub {amn}",
+                )
+
+    # Inverse association assertions
+    for an1, an2 in inv_assoc:
+        writer.assert_(
+            "(forall ((?es Element) (?et Element))"
+            f" (= (association ?es {assoc[an1]} ?et)"
+            f" (association ?et {assoc[an2]} ?es)))",
+            lambda: f"association_inverse {an1} {an2}",
+        )
+
+
+def mk_metamodel_template(
+    mm: CompiledMetaModel, inv_assoc: list[tuple[str, str]]
+) -> MetaModelTemplate:
+    """
+    ### Parameters
+     - `mm` is a compiled metamodel.
+    """
+    writer = SMTLibWriter(StringIO(), track=False)
+    write_metamodel_constraints_smtlib(writer, mm, inv_assoc)
+    tracked_writer = SMTLibWriter(StringIO(), track=True)
+    write_metamodel_constraints_smtlib(tracked_writer, mm, inv_assoc)
+    return MetaModelTemplate(
+        text=writer.out.getvalue(),
+        tracked_text=tracked_writer.out.getvalue(),
+        labels=tracked_writer.labels,
+    )
+
+
+def write_doml_model_smtlib(
+    writer: SMTLibWriter,
+    im: IntermediateModel,
+    mm: CompiledMetaModel,
+    inv_assoc: list[tuple[str, str]],
+    unbound_elems: list[str],
+    ss: dict[str, str],
+    associations: AssociationsEncoding,
+    template: Optional[MetaModelTemplate] = None,
+) -> None:
+    """
+    Writes the declarations and assertions of `encode_doml_model` with the
+    "quantified" metamodel encoding, under the same names and labels.
+
+    ### Parameters
+     - `mm` is a compiled metamodel;
+     - `ss` maps strings to the names of their `StringSym` values;
+     - `template`, if given, is written instead of the metamodel constraints.
+       It must have been made from `mm` and `inv_assoc`.
+
+    ### Effects
+    This procedure is effectful on `writer`.
+    """
+    out = writer.out
+    elem = _quote_all(list(im) + unbound_elems)
+    class_, attr, assoc = _quote_metamodel(mm)
+    ss_names = _quote_all(ss.values())
+    ssq = {s: ss_names[ssn] for s, ssn in ss.items()}
+
+    def write_enum(name: str, values: Iterable[str]) -> None:
+        out.write(f"(declare-datatype {name} (")
+        out.write(" ".join(f"({v})" for v in values))
+        out.write("))\n")
+
+    write_enum("Class", class_.values())
+    write_enum("Association", assoc.values())
+    write_enum("Attribute", attr.values())
+    write_enum("Element", elem.values())
+    write_enum("StringSym", ssq.values())
+    out.write(
+        "(declare-datatype AttributeData ("
+        "(int (get_int Int)) (bool (get_bool Bool)) (ss (get_ss StringSym))"
+        "))\n"
+        "(declare-fun elem_class (Element) Class)\n"
+        "(declare-fun attribute (Element Attribute AttributeData) Bool)\n"
+        "(declare-fun association (Element Association Element) Bool)\n"
+        f"(define-fun {_IMAGE} () StringSym {ssq['IMAGE']})\n"
+        f"(define-fun {_SCRIPT} () StringSym {ssq['SCRIPT']})\n"
+    )
+
+    if template is None:
+        write_metamodel_constraints_smtlib(writer, mm, inv_assoc)
+    else:
+        writer.write_template(template)
+
+    def adata(v: Union[str, int, bool]) -> str:
+        if type(v) is str:
+            return f"(ss {ssq[v]})"
+        elif type(v) is int:
+            return f"(int {v})" if v >= 0 else f"(int (- {-v}))"
+        else:  # type(v) is bool
+            return f"(bool {'true' if v else 'false'})"
+
+    # Classes of the elements
+    for ename, e in im.items():
+        writer.assert_(
+            f"(= (elem_class {elem[ename]}) {class_[e.class_]})",
+            lambda: f"elem_class {ename} {e.class_}",
+        )
+
+    # Attributes of the elements
+    for esn, im_es in im.items():
+        mangled_attrs = (
+            get_mangled_attribute_defaults(mm, im_es.class_) | im_es.attributes
+        )
+        values = _or(
+            [
+                f"(and (= ?a {attr[amn]}) (= ?d {adata(avalue)}))"
+                for amn, avalue in mangled_attrs.items()
+            ]
+        )
+        writer.assert_(
+            "(forall ((?a Attribute) (?d AttributeData))"
+            f" (= (attribute {elem[esn]} ?a ?d) {values}))",
+            lambda: f"attribute_values {esn}",
+        )
+
+    # Associations of the elements
+    if associations == "tuples":
+        edges = {edge for edge in iter_im_edges(im) if edge[1] in assoc.keys()}
+        for esn, amn, etn in product(elem, assoc, elem):
+            value = (esn, amn, etn) in edges
+            writer.assert_(
+                f"(= (association {elem[esn]} {assoc[amn]} {elem[etn]})"
+                f" {'true' if value else 'false'})",
+                lambda: f"association {esn} {amn} {etn} {value}",
+            )
+    elif associations == "quantified":
+        pair_assocs: dict[tuple[str, str], list[str]] = {}
+        for esn, amn, etn in iter_im_edges(im):
+            pair_assocs.setdefault((esn, etn), []).append(amn)
+        for esn, etn in product(im, im):
+            amns = _or(
+                [
+                    f"(= ?a {assoc[amn]})"
+                    for amn in pair_assocs.get((esn, etn), [])
+                ]
+            )
+            writer.assert_(
+                "(forall ((?a Association))"
+                f" (= (association {elem[esn]} ?a {elem[etn]}) {amns}))",
+                lambda: f"associations {esn} {etn}",
+            )
+    else:  # associations == "sparse"
+        out_edges: dict[str, list[tuple[str, str]]] = {}
+        for esn, amn, etn in iter_im_edges(im):
+            out_edges.setdefault(esn, []).append((amn, etn))
+        unbound_conds = [f"(= ?t {elem[ubn]})" for ubn in unbound_elems]
+        for esn in im:
+            edges = out_edges.get(esn, [])
+            allowed = _or(
+                [
+                    f"(and (= ?a {assoc[amn]}) (= ?t {elem[etn]}))"
+                    for amn, etn in edges
+                ]
+                + unbound_conds
+            )
+            closed_world = (
+                "(forall ((?a Association) (?t Element))"
+                f" (=> (association {elem[esn]} ?a ?t) {allowed}))"
+            )
+            writer.assert_(
+                _and(
+                    [
+                        f"(association {elem[esn]} {assoc[amn]} {elem[etn]})"
+                        for amn, etn in edges
+                    ]
+                    + [closed_world]
+                ),
+                lambda: f"associations {esn}",
+            )
+
+
+def load_smtlib(
+    solver: Solver, text: str, labels: Optional[list[str]] = None
+) -> None:
+    """
+    Asserts on `solver` the assertions in the SMT-LIB2 `text`, tracked with
+    `labels` if they are given. The declarations in `text` resolve to the
+    sorts and functions with the same names already declared in the context
+    of `solver`.
+
+    ### Effects
+    This procedure is effectful on `solver`.
+    """
+    if labels is None:
+        solver.from_string(text)
+    else:
+        _assert_parsed(solver, parse_smt2_string(text, ctx=solver.ctx), labels)
+
+
+def _assert_parsed(
+    solver: Solver, assns: AstVector, labels: Optional[list[str]]
+) -> None:
+    if labels is None:
+        solver.add(assns)
+        return
+    assert len(assns) == len(labels)
+    for assn, label in zip(assns, labels):
+        solver.assert_and_track(assn, label)
+
+
+@instrumented
+def assert_metamodel_template(
+    template: MetaModelTemplate,
+    solver: Solver,
+    class_sort: DatatypeSortRef,
+    assoc_sort: DatatypeSortRef,
+    attr_sort: DatatypeSortRef,
+    elem_sort: DatatypeSortRef,
+    AData: DatatypeSortRef,
+    ss: Refs,
+    elem_class_f: FuncDeclRef,
+    attr_rel: FuncDeclRef,
+    assoc_rel: FuncDeclRef,
+) -> None:
+    """
+    Asserts the metamodel constraints in `template` on `solver`, tracked if
+    `solver` is not an `UntrackedSolver`, over the given sorts and functions.
+
+    ### Effects
+    This procedure is effectful on `solver`.
+    """
+    assns = parse_smt2_string(
+        template.text,
+        sorts={
+            sort.name(): sort
+            for sort in (class_sort, assoc_sort, attr_sort, elem_sort, AData)
+        },
+        decls={
+            "elem_class": elem_class_f,
+            "attribute": attr_rel,
+            "association": assoc_rel,
+            _IMAGE.strip("|"): ss["IMAGE"],
+            _SCRIPT.strip("|"): ss["SCRIPT"],
+        },
+        ctx=solver.ctx,
+    )
+    _assert_parsed(
+        solver,
+        assns,
+        None if isinstance(solver, UntrackedSolver) else template.labels,
+    )
+
+
+@instrumented
+def def_rels_and_assert_smtlib(
+    im: IntermediateModel,
+    mm: CompiledMetaModel,
+    inv_assoc: list[tuple[str, str]],
+    unbound_elems: list[str],
+    associations: AssociationsEncoding,
+    solver: Solver,
+    class_sort: DatatypeSortRef,
+    assoc_sort: DatatypeSortRef,
+    attr_sort: DatatypeSortRef,
+    elem_sort: DatatypeSortRef,
+    AData: DatatypeSortRef,
+    ss: Refs,
+    template: Optional[MetaModelTemplate] = None,
+) -> tuple[FuncDeclRef, FuncDeclRef, FuncDeclRef]:
+    """
+    Asserts on `solver` what `write_doml_model_smtlib` writes, tracked if
+    `solver` is not an `UntrackedSolver`, and returns the `elem_class`,
+    `attribute` and `association` functions it declares.
+
+    ### Effects
+    This procedure is effectful on `solver`.
+    """
+    elem_class_f = Function("elem_class", elem_sort, class_sort)
+    attr_rel = mk_attribute_rel(elem_sort, attr_sort, AData)
+    assoc_rel = mk_association_rel(elem_sort, assoc_sort)
+
+    track = not isinstance(solver, UntrackedSolver)
+    writer = SMTLibWriter(StringIO(), track)
+    write_doml_model_smtlib(
+        writer,
+        im,
+        mm,
+        inv_assoc,
+        unbound_elems,
+        {s: ssr.decl().name() for s, ssr in ss.items()},
+        associations,
+        template,
+    )
+    load_smtlib(
+        solver, writer.out.getvalue(), writer.labels if track else None
+    )
+    return elem_class_f, attr_rel, assoc_rel
@@ -0,0 +1,365 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Optional
+
+from z3 import (
+    And,
+    BoolRef,
+    Const,
+    Context,
+    DatatypeSortRef,
+    DeclareSort,
+    Distinct,
+    ExprRef,
+    ForAll,
+    FuncDeclRef,
+    Function,
+    Or,
+    Solver,
+    SortRef,
+)
+
+from ..intermediate_model.metamodel import compile_metamodel
+from ..intermediate_model.types import IntermediateModel, MetaModel
+
+from .encoding import Encoding, EncodingOptions
+from .im_encoding import (
+    assert_im_associations,
+    assert_im_associations_q,
+    assert_im_associations_sparse,
+    assert_im_attributes,
+    assert_im_classes,
+    get_im_strings,
+)
+from .metamodel_encoding import (
+    mk_association_rel,
+    mk_association_sort_dict,
+    mk_attribute_rel,
+    mk_attribute_sort_dict,
+    mk_class_sort_dict,
+)
+from .smtlib_encoding import assert_metamodel_template
+from .template_cache import (
+    TemplateKey,
+    metamodel_template_cache,
+    metamodel_template_key,
+)
+from .types import Refs
+from .utils import UntrackedSolver, assert_tracked, mk_adata_sort
+
+CAPACITY_CLASSES = (64, 256, 1024)
+
+# The first StringSym slots hold the GeneratorKind values, to which the
+# metamodel constraints refer.
+FIXED_STRINGS = ["IMAGE", "SCRIPT"]
+
+
+def capacity_for(n: int) -> int:
+    """
+    The smallest of `CAPACITY_CLASSES` holding `n` slots, or the smallest
+    multiple of the largest one if none does.
+    """
+    for capacity in CAPACITY_CLASSES:
+        if n <= capacity:
+            return capacity
+    largest = CAPACITY_CLASSES[-1]
+    return -(-n // largest) * largest
+
+
+# Metamodel key, element capacity, string capacity, tracking.
+SlotBaseKey = tuple[TemplateKey, int, int, bool]
+
+
+@dataclass
+class SlotBase:
+    """
+    A solver holding the "quantified" metamodel constraints over
+    uninterpreted Element and StringSym sorts, with `elem_slots` and
+    `ss_slots` as constants to bind the elements and strings of a model to.
+
+    The sorts are closed over the slots bound to a model by
+    `bind_doml_model`, so that the encoding is equivalent to the one of
+    `encode_doml_model`, whose sorts are enumerations.
+    """
+
+    key: SlotBaseKey
+    solver: Solver
+
+    class_sort: DatatypeSortRef
+    class_: Refs
+    assoc_sort: DatatypeSortRef
+    assoc: Refs
+    attr_sort: DatatypeSortRef
+    attr: Refs
+    elem_sort: SortRef
+    elem_slots: list[ExprRef]
+    ss_sort: SortRef
+    ss_slots: list[ExprRef]
+    AData: DatatypeSortRef
+
+    elem_class_f: FuncDeclRef
+    attr_rel: FuncDeclRef
+    assoc_rel: FuncDeclRef
+
+
+def mk_slot_base(
+    mm: MetaModel,
+    inv_assoc: list[tuple[str, str]],
+    elem_capacity: int,
+    ss_capacity: int,
+    track: bool = False,
+) -> SlotBase:
+    ctx = Context()
+    mm = compile_metamodel(mm)
+    solver = Solver(ctx=ctx) if track else UntrackedSolver(ctx=ctx)
+
+    class_sort, class_ = mk_class_sort_dict(mm, ctx)
+    assoc_sort, assoc = mk_association_sort_dict(mm, ctx)
+    attr_sort, attr = mk_attribute_sort_dict(mm, ctx)
+    elem_sort = DeclareSort("Element", ctx)
+    elem_slots = [Const(f"elem_{i}", elem_sort) for i in range(elem_capacity)]
+    ss_sort = DeclareSort("StringSym", ctx)
+    ss_slots = [Const(f"ss_{i}", ss_sort) for i in range(ss_capacity)]
+    AData = mk_adata_sort(ss_sort)
+
+    elem_class_f = Function("elem_class", elem_sort, class_sort)
+    attr_rel = mk_attribute_rel(elem_sort, attr_sort, AData)
+    assoc_rel = mk_association_rel(elem_sort, assoc_sort)
+    assert_metamodel_template(
+        metamodel_template_cache.get(mm, inv_assoc),
+        solver,
+        class_sort,
+        assoc_sort,
+        attr_sort,
+        elem_sort,
+        AData,
+        dict(zip(FIXED_STRINGS, ss_slots)),
+        elem_class_f,
+        attr_rel,
+        assoc_rel,
+    )
+
+    return SlotBase(
+        key=(
+            metamodel_template_key(mm, inv_assoc),
+            elem_capacity,
+            ss_capacity,
+            track,
+        ),
+        solver=solver,
+        class_sort=class_sort,
+        class_=class_,
+        assoc_sort=assoc_sort,
+        assoc=assoc,
+        attr_sort=attr_sort,
+        attr=attr,
+        elem_sort=elem_sort,
+        elem_slots=elem_slots,
+        ss_sort=ss_sort,
+        ss_slots=ss_slots,
+        AData=AData,
+        elem_class_f=elem_class_f,
+        attr_rel=attr_rel,
+        assoc_rel=assoc_rel,
+    )
+
+
+def mk_closed_sort_assn(sort: SortRef, consts: list[ExprRef]) -> BoolRef:
+    """
+    States that the values of `sort` are exactly the distinct `consts`.
+    """
+    x = Const("x", sort)
+    return And(Distinct(*consts), ForAll([x], Or(*(x == c for c in consts))))
+
+
+def bind_doml_model(
+    base: SlotBase,
+    im: IntermediateModel,
+    mm: MetaModel,
+    unbound_elems: list[str] = [],
+    options: Optional[EncodingOptions] = None,
+) -> Encoding:
+    """
+    Binds the elements of `im` and `unbound_elems`, and the strings of `im`,
+    to slots of `base`, and asserts `im` on them, like `encode_doml_model`
+    does, together with the closure of the Element and StringSym sorts.
+    Only `options.associations` is taken into account.
+
+    The assertions should be made in a scope of `base.solver` of their own,
+    to be popped when done with the model.
+
+    ### Effects
+    This procedure is effectful on `base.solver`.
+    """
+    if options is None:
+        options = EncodingOptions()
+    mm = compile_metamodel(mm)
+    solver = base.solver
+
+    elem_names = list(im) + unbound_elems
+    strings = FIXED_STRINGS + sorted(
+        get_im_strings(im, mm).difference(FIXED_STRINGS)
+    )
+    if len(elem_names) > len(base.elem_slots) or len(strings) > len(
+        base.ss_slots
+    ):
+        raise ValueError("The model does not fit in the slots of the base.")
+    elem = dict(zip(elem_names, base.elem_slots))
+    ss = dict(zip(strings, base.ss_slots))
+
+    assert_tracked(
+        solver,
+        mk_closed_sort_assn(base.elem_sort, list(elem.values())),
+        "elem_domain",
+    )
+    assert_tracked(
+        solver,
+        mk_closed_sort_assn(base.ss_sort, list(ss.values())),
+        "stringsym_domain",
+    )
+    assert_im_classes(base.elem_class_f, solver, im, elem, base.class_)
+    assert_im_attributes(
+        base.attr_rel,
+        solver,
+        im,
+        mm,
+        elem,
+        base.attr_sort,
+        base.attr,
+        base.AData,
+        ss,
+    )
+    if options.associations == "tuples":
+        assert_im_associations(
+            base.assoc_rel, solver, im, mm, elem, base.assoc
+        )
+    elif options.associations == "quantified":
+        assert_im_associations_q(
+            base.assoc_rel, solver, im, elem, base.assoc_sort, base.assoc
+        )
+    else:  # options.associations == "sparse"
+        assert_im_associations_sparse(
+            base.assoc_rel,
+            solver,
+            im,
+            base.elem_sort,
+            elem,
+            base.assoc_sort,
+            base.assoc,
+            unbound_elems,
+        )
+
+    return Encoding(
+        solver=solver,
+        unbound_elems=unbound_elems,
+        class_sort=base.class_sort,
+        class_=base.class_,
+        assoc_sort=base.assoc_sort,
+        assoc=base.assoc,
+        attr_sort=base.attr_sort,
+        attr=base.attr,
+        elem_sort=base.elem_sort,
+        elem=elem,
+        ss_sort=base.ss_sort,
+        ss=ss,
+        AData=base.AData,
+        elem_class_f=base.elem_class_f,
+        attr_rel=base.attr_rel,
+        assoc_rel=base.assoc_rel,
+        options=options,
+    )
+
+
+class SolverPool:
+    """
+    Keeps `SlotBase`s between checks, so that checking a model only costs
+    asserting it and solving. Up to `maxsize` idle bases are kept, the least
+    recently used being dropped first.
+    """
+
+    def __init__(self, maxsize: int = 4) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._idle: list[SlotBase] = []
+
+    def acquire(
+        self,
+        mm: MetaModel,
+        inv_assoc: list[tuple[str, str]],
+        n_elems: int,
+        n_strings: int,
+        track: bool = False,
+    ) -> SlotBase:
+        """
+        Takes an idle base with room for `n_elems` elements and `n_strings`
+        strings out of the pool, or makes a new one.
+        """
+        elem_capacity = capacity_for(n_elems)
+        ss_capacity = capacity_for(n_strings)
+        key = (
+            metamodel_template_key(mm, inv_assoc),
+            elem_capacity,
+            ss_capacity,
+            track,
+        )
+        for i in reversed(range(len(self._idle))):
+            if self._idle[i].key == key:
+                self.hits += 1
+                return self._idle.pop(i)
+        self.misses += 1
+        return mk_slot_base(mm, inv_assoc, elem_capacity, ss_capacity, track)
+
+    def release(self, base: SlotBase) -> None:
+        """
+        Puts `base` back into the pool. Its solver must be back to the scope
+        it was acquired in.
+        """
+        self._idle.append(base)
+        if len(self._idle) > self.maxsize:
+            self._idle.pop(0)
+
+    @contextmanager
+    def encode(
+        self,
+        im: IntermediateModel,
+        mm: MetaModel,
+        inv_assoc: list[tuple[str, str]],
+        unbound_elems: list[str] = [],
+        options: Optional[EncodingOptions] = None,
+    ) -> Iterator[Encoding]:
+        """
+        Encodes `im` on a pooled base in a new scope of its solver, which is
+        popped and returned to the pool when the block exits. The encoding
+        must not be used after that.
+
+        `options.metamodel` must be "quantified", and `options.slice` must
+        not be set. `options.backend` and `options.template_cache` are
+        ignored.
+        """
+        if options is None:
+            options = EncodingOptions()
+        if options.metamodel != "quantified":
+            raise ValueError(
+                "Pooled solvers only support the quantified metamodel"
+                " encoding."
+            )
+        if options.slice:
+            raise ValueError(
+                "Pooled solvers do not support slicing the metamodel."
+            )
+        mm = compile_metamodel(mm)
+        base = self.acquire(
+            mm,
+            inv_assoc,
+            len(im) + len(unbound_elems),
+            len(get_im_strings(im, mm)),
+            options.track,
+        )
+        base.solver.push()
+        try:
+            yield bind_doml_model(base, im, mm, unbound_elems, options)
+        finally:
+            base.solver.pop()
+            self.release(base)
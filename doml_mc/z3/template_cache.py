@@ -0,0 +1,67 @@
+from collections import OrderedDict
+
+from ..intermediate_model.types import CompiledMetaModel
+
+from .smtlib_encoding import MetaModelTemplate, mk_metamodel_template
+
+TemplateKey = tuple[str, tuple[tuple[str, str], ...]]
+
+
+def metamodel_template_key(
+    mm: CompiledMetaModel, inv_assoc: list[tuple[str, str]]
+) -> TemplateKey:
+    """
+    Identifies `mm` and `inv_assoc`, which are all a `MetaModelTemplate`
+    depends on: the Element sort is referred to by name only. The digest of
+    `mm` is computed once, by `compile_metamodel`.
+    """
+    return mm.digest, tuple(map(tuple, inv_assoc))
+
+
+class MetaModelTemplateCache:
+    """
+    Holds the `MetaModelTemplate`s of the last `maxsize` metamodels it was
+    asked for, evicting the least recently used one first.
+    """
+
+    def __init__(self, maxsize: int = 8) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._templates: OrderedDict[
+            TemplateKey, MetaModelTemplate
+        ] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def get(
+        self, mm: CompiledMetaModel, inv_assoc: list[tuple[str, str]]
+    ) -> MetaModelTemplate:
+        """
+        Returns the template of `mm` and `inv_assoc`, making it on a miss.
+
+        ### Effects
+        This procedure is effectful on the cache.
+        """
+        key = metamodel_template_key(mm, inv_assoc)
+        if (template := self._templates.get(key)) is not None:
+            self.hits += 1
+            self._templates.move_to_end(key)
+            return template
+
+        self.misses += 1
+        template = mk_metamodel_template(mm, inv_assoc)
+        self._templates[key] = template
+        while len(self._templates) > self.maxsize:
+            self._templates.popitem(last=False)
+        return template
+
+    def clear(self) -> None:
+        self._templates.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# The cache used by `encode_doml_model`.
+metamodel_template_cache = MetaModelTemplateCache()
@@ -1,4 +1,29 @@
+from typing import Literal
+
 from z3 import DatatypeRef, DatatypeSortRef
 
 Refs = dict[str, DatatypeRef]
 SortAndRefs = tuple[DatatypeSortRef, Refs]
+
+# How the associations of the bound elements are encoded:
+#  - "tuples" asserts the value of the association relation on every
+#    (element, association, element) triple, unbound elements included, which
+#    are thus left with no associations;
+#  - "quantified" asserts one quantified formula per pair of bound elements;
+#  - "sparse" asserts, for each bound element, its pairs and one closed-world
+#    quantified formula, see `assert_im_associations_sparse`.
+# "quantified" and "sparse" are equivalent.
+AssociationsEncoding = Literal["tuples", "quantified", "sparse"]
+
+# How the constraints of the metamodel are encoded:
+#  - "quantified" quantifies them over the element sort;
+#  - "ground" checks them on the bound elements and expands them into
+#    quantifier-free clauses on the unbound ones, see
+#    `def_association_rel_and_assert_constraints_ground`.
+MetaModelEncoding = Literal["quantified", "ground"]
+
+# How the assertions are built:
+#  - "api" builds them through the Z3 Python API;
+#  - "smtlib" writes them as SMT-LIB2 text, which the solver parses at once,
+#    see `write_doml_model_smtlib`.
+EncoderBackend = Literal["api", "smtlib"]
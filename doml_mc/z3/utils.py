@@ -1,10 +1,11 @@
-from typing import cast
-from collections.abc import Sequence
+from typing import Optional, Union, cast
+from collections.abc import Callable, Sequence
 from itertools import product
 
 from z3 import (
     BoolSort,
     BoolVal,
+    Context,
     Datatype,
     DatatypeSortRef,
     ExprRef,
@@ -16,11 +17,43 @@ from z3 import (
 
 from .types import Refs, SortAndRefs
 
+# A tracking label, or a function computing it, so that it is only formatted
+# if the assertion is actually tracked.
+Label = Union[str, Callable[[], str]]
 
-def mk_enum_sort_dict(name: str, values: list[str]) -> SortAndRefs:
-    """Makes a Z3 sort and a dict indexing sort values by their name"""
 
-    sort, dtrefs = EnumSort(name, values)
+class UntrackedSolver(Solver):
+    """
+    A solver on which `assert_tracked` asserts without tracking, so that no
+    tracking literal is created and no label is formatted. Unsat cores are
+    thus not available: the problem must be encoded again on a `Solver` to
+    get one.
+    """
+
+
+def assert_tracked(solver: Solver, assn: ExprRef, label: Label) -> None:
+    """
+    Asserts `assn` on `solver`, tracked as `label` unless `solver` is an
+    `UntrackedSolver`.
+
+    ### Effects
+    This procedure is effectful on `solver`.
+    """
+    if isinstance(solver, UntrackedSolver):
+        solver.add(assn)
+    else:
+        solver.assert_and_track(assn, label if type(label) is str else label())
+
+
+def mk_enum_sort_dict(
+    name: str, values: list[str], ctx: Optional[Context] = None
+) -> SortAndRefs:
+    """
+    Makes a Z3 sort and a dict indexing sort values by their name, in context
+    `ctx`, or in the default one if it is `None`.
+    """
+
+    sort, dtrefs = EnumSort(name, values, ctx=ctx)
     return sort, dict(zip(values, dtrefs))
 
 
@@ -48,13 +81,15 @@ def assert_relation_tuples(
         assert min(lengths) == max(lengths)
         assert lengths[0] == len(sig_dicts)
 
+    rel_tpls_set = set(map(tuple, rel_tpls))
+    ctx = rel.ctx
     sym_tpls = [
         cast(
             list[ExprRef],
             [dom[sym_name] for sym_name, dom in zip(doms_tpl, sig_dicts)],
         )
-        + [BoolVal(doms_tpl in rel_tpls)]
-        for doms_tpl in map(list, product(*sig_dicts))
+        + [BoolVal(doms_tpl in rel_tpls_set, ctx)]
+        for doms_tpl in product(*sig_dicts)
     ]
 
     assert_function_tuples_raw(rel, solver, sym_tpls)
@@ -113,20 +148,22 @@ def assert_function_tuples_raw(
         assert min(lengths) == max(lengths)
 
     for *xs, y in f_tpls:
-        solver.assert_and_track(
+        assert_tracked(
+            solver,
             f(*xs) == y,
-            f"{f.name()} " + " ".join(str(x) for x in xs) + f" {y}",
+            lambda: f"{f.name()} " + " ".join(str(x) for x in xs) + f" {y}",
         )
 
 
 def mk_stringsym_sort_from_strings(
     strings: list[str],
+    ctx: Optional[Context] = None,
 ) -> SortAndRefs:
     def symbolize(s: str) -> str:
         return "".join([c.lower() if c.isalnum() else "_" for c in s[:16]])
 
     ss_list = [f"ss_{i}_{symbolize(s)}" for i, s in enumerate(strings)]
-    stringsym_sort, ss_refs_dict = mk_enum_sort_dict("StringSym", ss_list)
+    stringsym_sort, ss_refs_dict = mk_enum_sort_dict("StringSym", ss_list, ctx)
     stringsym_sort_dict = {
         s: ss_refs_dict[ss] for s, ss in zip(strings, ss_list)
     }
@@ -136,9 +173,10 @@ def mk_stringsym_sort_from_strings(
 def mk_adata_sort(
     ss_sort: DatatypeSortRef,
 ) -> DatatypeSortRef:
-    AData = Datatype("AttributeData")
-    AData.declare("int", ("get_int", IntSort()))
-    AData.declare("bool", ("get_bool", BoolSort()))
+    ctx = ss_sort.ctx
+    AData = Datatype("AttributeData", ctx)
+    AData.declare("int", ("get_int", IntSort(ctx)))
+    AData.declare("bool", ("get_bool", BoolSort(ctx)))
     AData.declare("ss", ("get_ss", ss_sort))
     return AData.create()
 